@@ -0,0 +1,331 @@
+"""bench_generate.py
+
+Benchmarks generate_mod_project for configs of increasing size.
+
+For every size, a synthetic config with that many entries (half items, half
+blocks, each with its own generated PNG texture) is generated twice in a
+fresh child process: once into an empty directory (cold) and once more
+unchanged (incremental). Each size records wall times, time per entry, peak
+RSS, files written and bytes written. ModConfig construction and lookup cost
+is measured as well.
+
+Results are written as JSON so they can be kept as a baseline and compared
+with a later run::
+
+    python benchmarks/bench_generate.py -o baseline.json
+    python benchmarks/bench_generate.py --compare baseline.json
+
+Time per entry that grows with the size points at accidentally quadratic
+code.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import fabricpy  # noqa: E402
+from fabricpy import Block, Item, ModConfig  # noqa: E402
+from fabricpy.generator import generate_mod_project  # noqa: E402
+
+DEFAULT_SIZES = [10, 1000, 100000]
+
+# Metrics compared against a baseline, where lower is better
+COMPARED_METRICS = ["cold_seconds", "incremental_seconds", "peak_rss_kb"]
+
+
+def synthetic_png(index: int, size: int = 16) -> bytes:
+	"""Return a small solid-color RGBA PNG that is unique for ``index``."""
+	pixel = struct.pack(">I", (index * 2654435761) & 0xFFFFFF00 | 0xFF)
+	raw = (b"\x00" + pixel * size) * size
+
+	def chunk(kind, body):
+		crc = zlib.crc32(kind + body) & 0xFFFFFFFF
+		return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", crc)
+
+	return b"".join(
+		[
+			b"\x89PNG\r\n\x1a\n",
+			chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 6, 0, 0, 0)),
+			chunk(b"IDAT", zlib.compress(raw, 9)),
+			chunk(b"IEND", b""),
+		]
+	)
+
+
+def make_fixtures(directory: str, entries: int) -> str:
+	"""Create (or reuse) ``entries`` textures in ``directory``; return it."""
+	os.makedirs(directory, exist_ok=True)
+	marker = os.path.join(directory, ".complete")
+	if not os.path.exists(marker):
+		for index in range(entries):
+			with open(os.path.join(directory, f"t{index}.png"), "wb") as f:
+				f.write(synthetic_png(index))
+		open(marker, "w").close()
+	return directory
+
+
+def make_config(texture_dir: str, entries: int):
+	"""Return ``(mod_config, blocks, items)`` with ``entries`` entries."""
+	mod_config = ModConfig(
+		"Benchmark Mod", "benchmod", mc_version="1.21.4", group="com.example"
+	)
+	items = [
+		Item(f"item_{i}", f"Item {i}", os.path.join(texture_dir, f"t{i}.png"))
+		for i in range(0, entries, 2)
+	]
+	blocks = [
+		Block(f"block_{i}", f"Block {i}", os.path.join(texture_dir, f"t{i}.png"))
+		for i in range(1, entries, 2)
+	]
+	return mod_config, blocks, items
+
+
+def peak_rss_kb() -> int:
+	"""Peak resident set size of this process, in KiB (0 if unknown)."""
+	try:
+		import resource
+	except ImportError:
+		return 0
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# ru_maxrss is in bytes on macOS and KiB elsewhere
+	return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def directory_size(path: str):
+	"""Return ``(file_count, total_bytes)`` of the files under ``path``."""
+	files = size = 0
+	for root, _, names in os.walk(path):
+		for name in names:
+			files += 1
+			size += os.path.getsize(os.path.join(root, name))
+	return files, size
+
+
+def run_size(entries: int, workdir: str, registration: str, repeat: int = 1) -> dict:
+	"""Benchmark one size in this process and return its results.
+
+	With ``repeat`` > 1, the fastest of that many cold/incremental runs is kept.
+	"""
+	texture_dir = make_fixtures(os.path.join(workdir, f"textures-{entries}"), entries)
+	output_dir = os.path.join(workdir, f"out-{entries}")
+
+	start = time.perf_counter()
+	mod_config, blocks, items = make_config(texture_dir, entries)
+	config_seconds = time.perf_counter() - start
+
+	cold_seconds = incremental_seconds = float("inf")
+	for _ in range(repeat):
+		shutil.rmtree(output_dir, ignore_errors=True)
+		with redirect_stdout(io.StringIO()):
+			start = time.perf_counter()
+			cold = generate_mod_project(
+				mod_config, blocks, items, output_dir, registration=registration
+			)
+			cold_seconds = min(cold_seconds, time.perf_counter() - start)
+
+			start = time.perf_counter()
+			incremental = generate_mod_project(
+				mod_config, blocks, items, output_dir, registration=registration
+			)
+			incremental_seconds = min(incremental_seconds, time.perf_counter() - start)
+
+	files, size = directory_size(output_dir)
+	shutil.rmtree(output_dir, ignore_errors=True)
+	return {
+		"entries": entries,
+		"config_seconds": config_seconds,
+		"cold_seconds": cold_seconds,
+		"cold_us_per_entry": cold_seconds / entries * 1e6,
+		"incremental_seconds": incremental_seconds,
+		"incremental_us_per_entry": incremental_seconds / entries * 1e6,
+		"peak_rss_kb": peak_rss_kb(),
+		"files_written": cold.written,
+		"files_rewritten_incremental": incremental.written,
+		"output_files": files,
+		"bytes_written": size,
+	}
+
+
+def bench_mod_config(repeat: int = 20000) -> dict:
+	"""Measure ModConfig construction and version lookup cost."""
+	versions = ModConfig.VALID_MC_VERSIONS
+
+	start = time.perf_counter()
+	configs = [
+		ModConfig("Mod", "mod", mc_version=versions[i % len(versions)])
+		for i in range(repeat)
+	]
+	construct = time.perf_counter() - start
+
+	start = time.perf_counter()
+	for config in configs:
+		config.get_fabric_api_version()
+		config.get_fabric_loom_version()
+	lookup = time.perf_counter() - start
+
+	start = time.perf_counter()
+	for config in configs:
+		config.get_required_java_version()
+	java = time.perf_counter() - start
+
+	return {
+		"construct_us": construct / repeat * 1e6,
+		"version_lookup_us": lookup / repeat * 1e6,
+		"java_lookup_us": java / repeat * 1e6,
+	}
+
+
+def run_child(entries: int, workdir: str, registration: str, repeat: int) -> dict:
+	"""Benchmark one size in a fresh interpreter, so peak RSS is per size."""
+	result = subprocess.run(
+		[
+			sys.executable,
+			__file__,
+			"--child",
+			str(entries),
+			"--workdir",
+			workdir,
+			"--registration",
+			registration,
+			"--repeat",
+			str(repeat),
+		],
+		stdout=subprocess.PIPE,
+		check=True,
+		text=True,
+	)
+	return json.loads(result.stdout)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+	"""Print a comparison with ``baseline`` and return the regressions."""
+	regressions = []
+	previous = {size["entries"]: size for size in baseline.get("sizes", [])}
+	print(f"{'entries':>8}  {'metric':<20} {'baseline':>12} {'current':>12}  ratio")
+	for size in results["sizes"]:
+		old = previous.get(size["entries"])
+		if old is None:
+			continue
+		for metric in COMPARED_METRICS:
+			if not old.get(metric):
+				continue
+			ratio = size[metric] / old[metric]
+			flag = ""
+			if ratio > 1 + tolerance:
+				flag = "  REGRESSION"
+				regressions.append((size["entries"], metric, ratio))
+			print(
+				f"{size['entries']:>8}  {metric:<20} {old[metric]:>12.4g} "
+				f"{size[metric]:>12.4g}  {ratio:5.2f}x{flag}"
+			)
+	return regressions
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+	parser.add_argument(
+		"-s",
+		"--sizes",
+		type=int,
+		nargs="+",
+		default=DEFAULT_SIZES,
+		help=f"Entry counts to benchmark (default: {DEFAULT_SIZES}).",
+	)
+	parser.add_argument(
+		"--registration",
+		choices=["static", "data"],
+		default="data",
+		help="Registration mode passed to generate_mod_project (default: data).",
+	)
+	parser.add_argument(
+		"--workdir",
+		type=str,
+		default=os.path.join(tempfile.gettempdir(), "fabricpy-bench"),
+		help="Directory for texture fixtures (kept between runs) and outputs.",
+	)
+	parser.add_argument(
+		"-r",
+		"--repeat",
+		type=int,
+		default=1,
+		help="Runs per size; the fastest is kept (default: 1).",
+	)
+	parser.add_argument(
+		"-o", "--output", type=str, default=None, help="Write results to this file."
+	)
+	parser.add_argument(
+		"--compare",
+		type=str,
+		default=None,
+		help="Baseline results file to compare against.",
+	)
+	parser.add_argument(
+		"--tolerance",
+		type=float,
+		default=0.25,
+		help="Allowed slowdown before a metric counts as a regression (default: 0.25).",
+	)
+	parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.child is not None:
+		json.dump(
+			run_size(args.child, args.workdir, args.registration, args.repeat),
+			sys.stdout,
+		)
+		return
+
+	results = {
+		"fabricpy_version": fabricpy.__version__,
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"registration": args.registration,
+		"mod_config": bench_mod_config(),
+		"sizes": [],
+	}
+	for entries in args.sizes:
+		size = run_child(entries, args.workdir, args.registration, args.repeat)
+		results["sizes"].append(size)
+		print(
+			f"{entries:>8} entries: cold {size['cold_seconds']:.3f} s "
+			f"({size['cold_us_per_entry']:.1f} us/entry), incremental "
+			f"{size['incremental_seconds']:.3f} s, peak RSS "
+			f"{size['peak_rss_kb'] / 1024:.1f} MiB, {size['files_written']} files, "
+			f"{size['bytes_written'] / 1024:.1f} KiB"
+		)
+	timings = results["mod_config"]
+	print(
+		f"ModConfig: construct {timings['construct_us']:.2f} us, version lookups "
+		f"{timings['version_lookup_us']:.2f} us, java lookup "
+		f"{timings['java_lookup_us']:.2f} us"
+	)
+
+	if args.output:
+		with open(args.output, "w", encoding="utf-8") as f:
+			json.dump(results, f, indent=2)
+		print(f"Results written to {args.output}")
+
+	if args.compare:
+		with open(args.compare, encoding="utf-8") as f:
+			baseline = json.load(f)
+		regressions = compare(results, baseline, args.tolerance)
+		if regressions:
+			print(f"{len(regressions)} metric(s) regressed", file=sys.stderr)
+			sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,94 @@
+"""bench_templates.py
+
+Benchmarks rendering the project templates, as done once per generated project.
+
+Compares the template registry (templates compiled once per process) with
+the previous approach of dedenting an indented template on every call.
+
+Usage::
+
+    python benchmarks/bench_templates.py [-n PROJECTS]
+"""
+
+import argparse
+import os
+import sys
+import time
+from textwrap import dedent, indent
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fabricpy import ModConfig  # noqa: E402
+from fabricpy.generator import _template_context  # noqa: E402
+from fabricpy.templating import BUILTIN_TEMPLATE_DIR, get_registry  # noqa: E402
+
+TEMPLATES = [
+	"gradle-wrapper.properties",
+	"settings.gradle",
+	"build.gradle",
+	"Main.java",
+	"RegistryMain.java",
+]
+
+
+def bench_registry(contexts):
+	"""Render every template per context with the shared registry."""
+	start = time.perf_counter()
+	registry = get_registry()
+	for context in contexts:
+		for name in TEMPLATES:
+			registry.render(name, context)
+	return time.perf_counter() - start
+
+
+def bench_dedent(contexts):
+	"""Dedent and fill every template per context, like the old f-strings."""
+	sources = {}
+	for name in TEMPLATES:
+		with open(os.path.join(BUILTIN_TEMPLATE_DIR, name), encoding="utf-8") as f:
+			text = f.read().replace("{", "{{").replace("}", "}}")
+		# "{{{{ name }}}}" -> "{name}", as the f-strings referenced values
+		text = text.replace("{{{{ ", "{").replace(" }}}}", "}")
+		sources[name] = "\n" + indent(text, "    ") + "\n"
+
+	start = time.perf_counter()
+	for context in contexts:
+		for name in TEMPLATES:
+			dedent(sources[name]).strip().format(**context)
+	return time.perf_counter() - start
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+	parser.add_argument(
+		"-n",
+		"--projects",
+		type=int,
+		default=2000,
+		help="Number of projects to render templates for (default: 2000).",
+	)
+	args = parser.parse_args()
+
+	contexts = [
+		_template_context(
+			ModConfig(f"Mod {i}", f"mod{i}", mc_version="1.21.4", group="com.example")
+		)
+		for i in range(args.projects)
+	]
+	dedent_seconds = bench_dedent(contexts)
+	registry_seconds = bench_registry(contexts)
+
+	renders = args.projects * len(TEMPLATES)
+	for label, seconds in (
+		("dedent + format", dedent_seconds),
+		("template registry", registry_seconds),
+	):
+		print(
+			f"{label:<18} {seconds * 1000:8.1f} ms total, "
+			f"{seconds / renders * 1e6:6.1f} us/render"
+		)
+	print(f"speedup: {dedent_seconds / registry_seconds:.1f}x over {renders} renders")
+
+
+if __name__ == "__main__":
+	main()
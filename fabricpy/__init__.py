@@ -9,5 +9,6 @@ __version__ = "0.1.0-alpha"
 from .block import Block
 from .item import Item
 from .mod_config import ModConfig
+from .tables import BlockTable, ItemTable
 
-__all__ = ["Block", "Item", "ModConfig"]
+__all__ = ["Block", "BlockTable", "Item", "ItemTable", "ModConfig"]
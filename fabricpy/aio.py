@@ -0,0 +1,122 @@
+"""aio.py
+
+Asyncio interface to the generator, for embedding fabricpy in an async
+service::
+
+    stats = await generate_mod_project_async(
+        mod_config, blocks, items, None, sink=ZipSink(buffer)
+    )
+
+Every run executes on a bounded thread pool (shared by default, see
+:func:`default_executor`), so the event loop never blocks on file I/O and
+the number of runs in progress at once is capped. Within a run, the stages
+that do not depend on each other overlap, as with
+:func:`~fabricpy.generator.generate_mod_project`: textures are copied on the
+run's own pool, and the Gradle files, ``fabric.mod.json``, the main class and
+the extra templates are written there too, while the calling thread streams
+through the entries (lang entries, models, blockstates).
+
+Errors are raised in the awaiting task. Cancelling the task stops the run at
+its next checkpoint; the coroutine waits for the run to clean up before the
+cancellation propagates, so with ``atomic=True`` or a sink the output is
+left as it was.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fabricpy.config_loader import load_config
+from fabricpy.generator import generate_mod_project
+
+# Generation runs in progress at once on the default executor
+DEFAULT_MAX_WORKERS = max(2, min(8, os.cpu_count() or 1))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def default_executor() -> ThreadPoolExecutor:
+	"""Return the shared executor, with ``DEFAULT_MAX_WORKERS`` threads."""
+	global _executor
+	with _executor_lock:
+		if _executor is None:
+			_executor = ThreadPoolExecutor(
+				max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="fabricpy"
+			)
+		return _executor
+
+
+async def load_config_async(path: str, executor=None, use_cache: bool = True):
+	"""Load a config like :func:`~fabricpy.config_loader.load_config`.
+
+	:param executor: Executor to load on (defaults to :func:`default_executor`)
+	:return: ``(mod_config, blocks, items)`` tuple
+	"""
+	loop = asyncio.get_running_loop()
+	return await loop.run_in_executor(
+		executor or default_executor(),
+		functools.partial(load_config, path, use_cache=use_cache),
+	)
+
+
+async def generate_mod_project_async(
+	mod_config, blocks, items, output_dir, executor=None, **options
+):
+	"""Generate a project without blocking the event loop.
+
+	Takes the same arguments as
+	:func:`~fabricpy.generator.generate_mod_project`, except
+	``cancel_event``, which is managed here.
+
+	:param executor: Executor to run on (defaults to :func:`default_executor`)
+	:return: GenerationStats with the written/skipped/deleted file counts
+	:raises asyncio.CancelledError: If the awaiting task was cancelled, once
+	                                the run has stopped
+	"""
+	cancel_event = threading.Event()
+	loop = asyncio.get_running_loop()
+	future = loop.run_in_executor(
+		executor or default_executor(),
+		functools.partial(
+			generate_mod_project,
+			mod_config,
+			blocks,
+			items,
+			output_dir,
+			cancel_event=cancel_event,
+			**options,
+		),
+	)
+	try:
+		# Shielded, so a cancelled task does not abandon a run still writing
+		return await asyncio.shield(future)
+	except asyncio.CancelledError:
+		cancel_event.set()
+		try:
+			await future
+		except Exception:
+			# Stopped at a checkpoint, or failed while stopping: either way
+			# the cancellation is what the caller sees
+			pass
+		raise
+
+
+async def generate_from_config_async(
+	config_path: str, output_dir, executor=None, **options
+):
+	"""Load a config file and generate its project without blocking.
+
+	:param config_path: Path of a ``.py``, ``.toml`` or ``.json`` config
+	:param output_dir: Where to place the generated mod project
+	:param executor: Executor to run on (defaults to :func:`default_executor`)
+	:param options: Keyword arguments for
+	                :func:`~fabricpy.generator.generate_mod_project`
+	:return: GenerationStats with the written/skipped/deleted file counts
+	"""
+	mod_config, blocks, items = await load_config_async(config_path, executor)
+	return await generate_mod_project_async(
+		mod_config, blocks, items, output_dir, executor=executor, **options
+	)
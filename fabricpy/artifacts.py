@@ -0,0 +1,270 @@
+"""artifacts.py
+
+A content-addressed cache of built mod jars, checked by ``compile --build``
+before it runs Gradle.
+
+The key (:func:`artifact_key`) is the SHA-256 of a canonical JSON document
+listing every build input of the generated project: the digest of each file
+under ``src/`` and of the Gradle build files (which capture the config, the
+texture bytes and the rendered templates), the Minecraft, Fabric API, Fabric
+Loom and Gradle versions, and the fabricpy version. Files the generator wrote
+are looked up in its manifest instead of being hashed again, as long as their
+size and mtime still match the manifest; any other file (e.g. hand-written
+Java sources, or a generated file edited since) is hashed.
+
+Each entry is a directory named after its key holding the jars the build
+wrote to ``build/libs`` (see :func:`built_jars`). The cache directory can be shared by several runners (e.g. on
+a network drive or a CI cache volume) without locking:
+
+- an entry is copied into a private temporary directory and renamed into
+  place, so other runners only ever see complete entries; if two runners
+  store the same key, the second rename fails and its copy is dropped
+- a hit updates the entry's mtime, and eviction removes the least recently
+  used entries until the cache fits its size limit, renaming each one away
+  before deleting it so a runner reading it keeps its open files
+"""
+
+import json
+import os
+import shutil
+import time
+import uuid
+
+from fabricpy import __version__
+from fabricpy.gradle_setup import GRADLE_VERSION
+from fabricpy.manifest import hash_bytes, hash_file, load_manifest
+from fabricpy.utils import cache_dir
+
+# Default size limit of the cache
+DEFAULT_MAX_BYTES = 1 << 30
+
+# Bump when the key document changes meaning
+KEY_VERSION = 1
+
+# Top-level project files that take part in the build, besides src/
+BUILD_FILES = (
+	"build.gradle",
+	"settings.gradle",
+	"gradle/wrapper/gradle-wrapper.properties",
+)
+
+_TEMP_PREFIX = ".tmp-"
+
+
+def default_cache_dir() -> str:
+	"""Return ``$FABRICPY_ARTIFACT_CACHE``, or ``artifacts`` in fabricpy's cache."""
+	path = os.environ.get("FABRICPY_ARTIFACT_CACHE")
+	if path:
+		os.makedirs(path, exist_ok=True)
+		return path
+	return cache_dir("artifacts")
+
+
+def artifact_key(project_dir: str, mod_config) -> str:
+	"""Return the cache key of a generated project.
+
+	:param project_dir: Generated project directory
+	:param mod_config: ModConfig the project was generated from
+	:return: Hex SHA-256 of the project's build inputs
+	"""
+	manifest = load_manifest(project_dir)["files"]
+	files = {}
+	for relpath in _build_inputs(project_dir):
+		entry = manifest.get(relpath)
+		path = os.path.join(project_dir, *relpath.split("/"))
+		st = os.stat(path)
+		if (
+			entry is not None
+			and entry.get("size") == st.st_size
+			and entry.get("mtime_ns") == st.st_mtime_ns
+		):
+			files[relpath] = entry["sha256"]
+		else:
+			files[relpath] = hash_file(path)
+	document = {
+		"key_version": KEY_VERSION,
+		"fabricpy": __version__,
+		"mc_version": mod_config.mc_version,
+		"fabric_api": mod_config.get_fabric_api_version(),
+		"loom": mod_config.get_fabric_loom_version(),
+		"gradle": GRADLE_VERSION,
+		"files": files,
+	}
+	return hash_bytes(
+		json.dumps(document, sort_keys=True, separators=(",", ":")).encode("utf-8")
+	)
+
+
+class ArtifactCache:
+	"""Built jars stored by :func:`artifact_key`, with size-based eviction."""
+
+	def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+		"""Open (and create) a cache directory.
+
+		:param directory: Cache directory (defaults to :func:`default_cache_dir`)
+		:param max_bytes: Size the cache is trimmed to after each store
+		"""
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		self.directory = directory or default_cache_dir()
+		self.max_bytes = max_bytes
+
+	def fetch(self, key: str, dest_dir: str) -> list:
+		"""Copy the jars stored under ``key`` into ``dest_dir``.
+
+		:return: Paths of the copied jars, or None on a miss
+		"""
+		entry = os.path.join(self.directory, key)
+		try:
+			names = sorted(os.listdir(entry))
+			if not names:
+				return None
+			os.makedirs(dest_dir, exist_ok=True)
+			copied = []
+			for name in names:
+				target = os.path.join(dest_dir, name)
+				shutil.copy2(os.path.join(entry, name), target)
+				copied.append(target)
+			# Mark as recently used
+			os.utime(entry)
+		except OSError:
+			# Missing, or evicted by another runner while copying
+			return None
+		return copied
+
+	def store(self, key: str, jars: list) -> bool:
+		"""Store ``jars`` under ``key``, then evict down to ``max_bytes``.
+
+		:return: False if the entry already existed (nothing is changed)
+		"""
+		if os.path.isdir(os.path.join(self.directory, key)):
+			return False
+		temp = os.path.join(self.directory, f"{_TEMP_PREFIX}{uuid.uuid4().hex}")
+		os.mkdir(temp)
+		try:
+			for jar in jars:
+				shutil.copy2(jar, os.path.join(temp, os.path.basename(jar)))
+			try:
+				os.rename(temp, os.path.join(self.directory, key))
+			except OSError:
+				# Stored by another runner in the meantime
+				return False
+		finally:
+			if os.path.isdir(temp):
+				shutil.rmtree(temp, ignore_errors=True)
+		self.evict()
+		return True
+
+	def evict(self, max_bytes: int = None) -> list:
+		"""Remove least recently used entries until the cache fits.
+
+		Temporary directories left by killed runners are removed once they
+		are a day old.
+
+		:param max_bytes: Size limit (defaults to ``self.max_bytes``)
+		:return: Keys of the removed entries
+		"""
+		if max_bytes is None:
+			max_bytes = self.max_bytes
+		entries = []
+		total = 0
+		now = time.time()
+		for name in os.listdir(self.directory):
+			path = os.path.join(self.directory, name)
+			try:
+				mtime = os.stat(path).st_mtime
+				if name.startswith(_TEMP_PREFIX):
+					if now - mtime > 86400:
+						shutil.rmtree(path, ignore_errors=True)
+					continue
+				size = _tree_size(path)
+			except OSError:
+				continue
+			entries.append((mtime, name, size))
+			total += size
+		removed = []
+		for _, name, size in sorted(entries):
+			if total <= max_bytes:
+				break
+			path = os.path.join(self.directory, name)
+			trash = os.path.join(self.directory, f"{_TEMP_PREFIX}{uuid.uuid4().hex}")
+			try:
+				os.rename(path, trash)
+			except OSError:
+				# Already evicted by another runner
+				continue
+			shutil.rmtree(trash, ignore_errors=True)
+			total -= size
+			removed.append(name)
+		return removed
+
+	def size(self) -> int:
+		"""Return the total size of the stored jars in bytes."""
+		return sum(
+			_tree_size(os.path.join(self.directory, name))
+			for name in os.listdir(self.directory)
+			if not name.startswith(_TEMP_PREFIX)
+		)
+
+	def __repr__(self):
+		return f"ArtifactCache({self.directory!r}, max_bytes={self.max_bytes})"
+
+
+def jar_snapshot(project_dir: str) -> dict:
+	"""Return ``{path: (size, mtime_ns, inode)}`` for the jars in ``build/libs``."""
+	libs = os.path.join(project_dir, "build", "libs")
+	try:
+		names = sorted(os.listdir(libs))
+	except OSError:
+		return {}
+	snapshot = {}
+	for name in names:
+		if not name.endswith(".jar"):
+			continue
+		path = os.path.join(libs, name)
+		try:
+			st = os.stat(path)
+		except OSError:
+			continue
+		snapshot[path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+	return snapshot
+
+
+def built_jars(project_dir: str, before: dict = None) -> list:
+	"""Return the jars in ``build/libs`` that a build wrote.
+
+	:param project_dir: Project directory
+	:param before: :func:`jar_snapshot` taken before the build; jars it lists
+	               with the same size, mtime and inode are leftovers of
+	               earlier builds (e.g. of another version) and are skipped
+	:return: Paths of the new or rewritten jars
+	"""
+	before = before or {}
+	return [
+		path
+		for path, stat in jar_snapshot(project_dir).items()
+		if before.get(path) != stat
+	]
+
+
+def _build_inputs(project_dir):
+	for relpath in BUILD_FILES:
+		if os.path.isfile(os.path.join(project_dir, *relpath.split("/"))):
+			yield relpath
+	src = os.path.join(project_dir, "src")
+	for root, dirs, files in os.walk(src):
+		dirs.sort()
+		for name in sorted(files):
+			path = os.path.join(root, name)
+			yield os.path.relpath(path, project_dir).replace(os.sep, "/")
+
+
+def _tree_size(path):
+	total = 0
+	for root, _, files in os.walk(path):
+		for name in files:
+			try:
+				total += os.path.getsize(os.path.join(root, name))
+			except OSError:
+				pass
+	return total
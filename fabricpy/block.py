@@ -7,6 +7,8 @@ Defines a representation of a block in Minecraft.
 class Block:
 	"""Represents a custom block to be added to the mod."""
 
+	__slots__ = ("block_id", "name", "texture_file", "category")
+
 	def __init__(
 		self,
 		block_id: str,
@@ -5,18 +5,19 @@ Command-line interface for fabricpy.
 
 import argparse
 import os
-import subprocess
 import sys
-from textwrap import dedent
+import time
 
-from fabricpy.block import Block
-from fabricpy.generator import generate_mod_project
-from fabricpy.item import Item
+from fabricpy import artifacts, gradle_setup, mirror, profiling, server
+from fabricpy.compat import get_index
+from fabricpy.config_loader import load_config
+from fabricpy.generator import generate_mod_project, generate_mod_projects
 from fabricpy.mod_config import ModConfig
-from fabricpy.utils import run_command
-
-# If you want to compile using Gradle, you could also do:
-# from fabricpy.utils import run_command
+from fabricpy.runner import CommandError, run_gradle, run_process
+from fabricpy.textures import MissingTexturesError
+from fabricpy.toolchain import find_java
+from fabricpy.validation import validate_config
+from fabricpy.watch import watch_project
 
 
 def main():
@@ -35,19 +36,199 @@ def main():
 	compile_parser.add_argument(
 		"config_script",
 		type=str,
-		help="Path to a Python script defining mod_config, blocks, items lists.",
+		help=(
+			"Path to a Python script defining mod_config, blocks, items lists, "
+			"or to a declarative .toml/.json mod config."
+		),
 	)
+	_add_generation_arguments(compile_parser)
 	compile_parser.add_argument(
-		"-o",
-		"--output",
+		"--build",
+		action="store_true",
+		help=(
+			"Build the jar with Gradle after generation, or copy it from the "
+			"artifact cache if the project's inputs are unchanged."
+		),
+	)
+	compile_parser.add_argument(
+		"--build-report",
 		type=str,
-		default="build_mod",
-		help="Output directory for the generated mod project.",
+		default=None,
+		metavar="FILE",
+		help=(
+			"Write the Gradle tasks of --build with their outcome (UP-TO-DATE, "
+			"FROM-CACHE, ...) and duration to a JSON file."
+		),
 	)
 	compile_parser.add_argument(
-		"--build",
+		"--artifact-cache",
+		type=str,
+		default=None,
+		metavar="DIR",
+		help=(
+			"Directory of built jars reused by --build when the project's inputs "
+			"are unchanged; may be shared by several runners "
+			"(default: $FABRICPY_ARTIFACT_CACHE or fabricpy's cache)."
+		),
+	)
+	compile_parser.add_argument(
+		"--artifact-cache-size",
+		type=int,
+		default=artifacts.DEFAULT_MAX_BYTES >> 20,
+		metavar="MIB",
+		help="Size the artifact cache is trimmed to, in MiB (default: %(default)s).",
+	)
+	compile_parser.add_argument(
+		"--no-artifact-cache",
+		action="store_true",
+		help="Always run Gradle for --build, without reading or filling the cache.",
+	)
+	compile_parser.add_argument(
+		"--no-config-cache",
+		action="store_true",
+		help=(
+			"Always parse a declarative config and its table files instead of "
+			"reusing the cached result."
+		),
+	)
+	compile_parser.add_argument(
+		"--cache-config-script",
+		action="store_true",
+		help=(
+			"Also reuse the cached result of an unchanged config script. Scripts "
+			"run every time by default, because they may read other files."
+		),
+	)
+	_add_profile_argument(compile_parser)
+
+	# Subcommand: compile-many
+	many_parser = subparsers.add_parser(
+		"compile-many",
+		help="Generate one mod project per config script, in parallel.",
+	)
+	many_parser.add_argument(
+		"config_scripts",
+		nargs="+",
+		help="Config scripts or glob patterns (e.g. 'variants/**/*.py').",
+	)
+	_add_generation_arguments(many_parser)
+	many_parser.set_defaults(output="build_mods")
+	many_parser.add_argument(
+		"-w",
+		"--workers",
+		type=int,
+		default=None,
+		help="Number of worker processes (default: one per CPU).",
+	)
+
+	# Subcommand: validate
+	validate_parser = subparsers.add_parser(
+		"validate",
+		help="Check configs for invalid IDs, duplicates and missing textures.",
+	)
+	validate_parser.add_argument(
+		"config_scripts",
+		nargs="+",
+		help="Config scripts or declarative .toml/.json configs to check.",
+	)
+
+	# Subcommand: watch
+	watch_parser = subparsers.add_parser(
+		"watch",
+		help="Generate the mod project and regenerate it whenever its inputs change.",
+	)
+	watch_parser.add_argument(
+		"config_script",
+		type=str,
+		help="Path to a Python script defining mod_config, blocks, items lists.",
+	)
+	_add_generation_arguments(watch_parser)
+
+	# Subcommand: serve
+	serve_parser = subparsers.add_parser(
+		"serve",
+		help="Run a local HTTP service that generates zipped mod projects.",
+	)
+	serve_parser.add_argument(
+		"--host", type=str, default="127.0.0.1", help="Interface to listen on."
+	)
+	serve_parser.add_argument(
+		"--port", type=int, default=server.DEFAULT_PORT, help="Port to listen on."
+	)
+	serve_parser.add_argument(
+		"-w",
+		"--workers",
+		type=int,
+		default=None,
+		help="Generation runs in progress at once (default: one per CPU).",
+	)
+	serve_parser.add_argument(
+		"--queue-size",
+		type=int,
+		default=64,
+		help="Requests allowed to wait for a worker before answering 503.",
+	)
+	serve_parser.add_argument(
+		"--cache-size",
+		type=int,
+		default=256,
+		help="Size of the result cache in MiB (default: 256).",
+	)
+
+	# Subcommand: mirror
+	mirror_parser = subparsers.add_parser(
+		"mirror",
+		help="Fill a local Maven repository with the Fabric dependencies.",
+	)
+	mirror_parser.add_argument(
+		"directory",
+		type=str,
+		help="Mirror directory (a file-based Maven repository).",
+	)
+	mirror_parser.add_argument(
+		"-m",
+		"--mc-version",
+		action="append",
+		default=None,
+		help=(
+			"Minecraft version to mirror the Fabric Loom, Loader, Yarn and API "
+			"artifacts of; may be repeated (default: the latest version)."
+		),
+	)
+	mirror_parser.add_argument(
+		"--all-versions",
+		action="store_true",
+		help="Mirror every Minecraft version in the compatibility index.",
+	)
+	mirror_parser.add_argument(
+		"--gradle-cache",
+		type=str,
+		default=None,
+		metavar="DIR",
+		help=(
+			"Gradle module cache to import from "
+			"(default: $GRADLE_USER_HOME/caches/modules-2/files-2.1)."
+		),
+	)
+	mirror_parser.add_argument(
+		"--import-all",
+		action="store_true",
+		help=(
+			"Also copy every other module of the Gradle cache, e.g. the "
+			"Minecraft libraries resolved by a previous build."
+		),
+	)
+	mirror_parser.add_argument(
+		"--offline",
 		action="store_true",
-		help="If provided, will attempt to run Gradle build after generation.",
+		help="Only import from the Gradle cache; never download.",
+	)
+	mirror_parser.add_argument(
+		"-j",
+		"--jobs",
+		type=int,
+		default=mirror.DEFAULT_MAX_WORKERS,
+		help="Number of modules processed at once (default: %(default)s).",
 	)
 
 	# Subcommand: run
@@ -65,97 +246,347 @@ def main():
 		action="store_true",
 		help="If provided, will skip setting up the Gradle environment.",
 	)
+	run_parser.add_argument(
+		"--warm",
+		action="store_true",
+		help=(
+			"Keep the Loom cache (removing only broken entries), reuse a matching "
+			"Gradle wrapper, skip 'clean' and keep the Gradle daemon alive."
+		),
+	)
+	_add_profile_argument(run_parser)
 
 	args = parser.parse_args()
 
-	if args.subcommand == "compile":
-		_handle_compile(args)
-	elif args.subcommand == "run":
-		_handle_run(args)
-	else:
-		parser.print_help()
+	profiler = profiling.enable() if getattr(args, "profile", None) else None
+	try:
+		if args.subcommand == "compile":
+			with profiling.phase("compile"):
+				_handle_compile(args)
+		elif args.subcommand == "compile-many":
+			_handle_compile_many(args)
+		elif args.subcommand == "validate":
+			_handle_validate(args)
+		elif args.subcommand == "watch":
+			_handle_watch(args)
+		elif args.subcommand == "serve":
+			_handle_serve(args)
+		elif args.subcommand == "mirror":
+			_handle_mirror(args)
+		elif args.subcommand == "run":
+			with profiling.phase("run"):
+				_handle_run(args)
+		else:
+			parser.print_help()
+	finally:
+		if profiler is not None:
+			profiling.disable()
+			profiler.write_trace(args.profile)
+			print(profiler.summary(), file=sys.stderr)
+			print(f"Chrome trace written to {args.profile}", file=sys.stderr)
+
+
+def _add_profile_argument(parser):
+	"""Add the --profile option to a subcommand."""
+	parser.add_argument(
+		"--profile",
+		nargs="?",
+		const="fabricpy-trace.json",
+		default=None,
+		metavar="TRACE_FILE",
+		help=(
+			"Time every phase, print a summary table and write a Chrome trace "
+			"(default file: fabricpy-trace.json)."
+		),
+	)
+
+
+def _add_generation_arguments(parser):
+	"""Add the options shared by every subcommand that generates a project."""
+	parser.add_argument(
+		"-o",
+		"--output",
+		type=str,
+		default="build_mod",
+		help="Output directory for the generated mod project.",
+	)
+	parser.add_argument(
+		"-j",
+		"--jobs",
+		type=int,
+		default=None,
+		help="Number of threads used to copy textures (default: a few per CPU).",
+	)
+	parser.add_argument(
+		"--dedupe-textures",
+		action="store_true",
+		help="Copy byte-identical textures once and share them between models.",
+	)
+	parser.add_argument(
+		"--optimize-textures",
+		action="store_true",
+		help="Losslessly recompress PNG textures (results are cached on disk).",
+	)
+	parser.add_argument(
+		"--registration",
+		choices=["static", "data"],
+		default="static",
+		help=(
+			"How items and blocks are registered: 'static' Java fields, or 'data' "
+			"to load every entry from a registry resource at init."
+		),
+	)
+	parser.add_argument(
+		"--translations",
+		type=str,
+		default=None,
+		help=(
+			"Directory of per-locale translation tables "
+			"(e.g. de_de.csv, ja_jp.json) used to write lang files."
+		),
+	)
+	parser.add_argument(
+		"--templates",
+		type=str,
+		default=None,
+		help=(
+			"Directory of templates overriding the built-in ones (build.gradle, "
+			"Main.java, ...); other files in it are added to the project."
+		),
+	)
+	parser.add_argument(
+		"--gradle-profile",
+		choices=[*gradle_setup.GRADLE_PROFILES, "none"],
+		default=gradle_setup.DEFAULT_GRADLE_PROFILE,
+		help=(
+			"Profile of the generated gradle.properties: 'dev' (default) keeps "
+			"the daemon, 'ci' runs without one and with a larger heap, 'auto' "
+			"sizes the file for this machine and picks 'ci' when $CI is set, "
+			"'none' writes no file."
+		),
+	)
+	parser.add_argument(
+		"--maven-mirror",
+		type=str,
+		default=None,
+		metavar="DIR",
+		help=(
+			"Local Maven repository (see 'fabricpy mirror') listed before the "
+			"remote repositories in build.gradle and settings.gradle."
+		),
+	)
+	parser.add_argument(
+		"--atomic",
+		action="store_true",
+		help=(
+			"Generate into a staging directory next to the output and swap it "
+			"into place at the end, so watchers see one change."
+		),
+	)
+	parser.add_argument(
+		"--force",
+		action="store_true",
+		help="Rewrite every generated file, even those unchanged since the last run.",
+	)
+
+
+def _generation_options(args):
+	"""Keyword arguments for generate_mod_project from parsed CLI options."""
+	return {
+		"incremental": not args.force,
+		"texture_workers": args.jobs,
+		"dedupe_textures": args.dedupe_textures,
+		"optimize_textures": args.optimize_textures,
+		"registration": args.registration,
+		"translations": args.translations,
+		"templates": args.templates,
+		"atomic": args.atomic,
+		"maven_mirror": args.maven_mirror,
+		"gradle_profile": None
+		if args.gradle_profile == "none"
+		else args.gradle_profile,
+	}
 
 
 def _handle_compile(args):
-	# 1. Execute the config script in a restricted namespace
-	#    The script should define:
+	# 1. Load the config (cached by file hash). A script should define:
 	#      mod_config = ModConfig(...)
 	#      blocks = [Block(...), ...]
 	#      items = [Item(...), ...]
-	config_globals = {}
-	config_locals = {}
-	with open(args.config_script, encoding="utf-8") as f:
-		code = f.read()
+	try:
+		with profiling.phase("load config"):
+			mod_config, blocks, items = load_config(
+				args.config_script,
+				use_cache=not args.no_config_cache,
+				cache_scripts=args.cache_config_script,
+			)
+	except (OSError, ValueError) as e:
+		print(f"Error: {e}", file=sys.stderr)
+		sys.exit(1)
+
+	# 2. Generate the mod project
+	output_dir = os.path.abspath(args.output)
+	try:
+		with profiling.phase("generate"):
+			generate_mod_project(
+				mod_config, blocks, items, output_dir, **_generation_options(args)
+			)
+	except (MissingTexturesError, ValueError) as e:
+		print(f"Error: {e}", file=sys.stderr)
+		sys.exit(1)
 
-	# We'll exec the code in a dict that has references to our classes
-	scope = {"ModConfig": ModConfig, "Block": Block, "Item": Item}
-	exec(code, scope, scope)
+	# 3. Optionally build the jar, or reuse the one built from the same inputs
+	if args.build:
+		with profiling.phase("build"):
+			_build(output_dir, mod_config, args)
 
-	if "mod_config" not in scope:
-		print(
-			"Error: config_script must define 'mod_config'.",
-			file=sys.stderr,
+
+def _build(project_dir, mod_config, args):
+	cache = key = None
+	if not args.no_artifact_cache:
+		cache = artifacts.ArtifactCache(
+			args.artifact_cache, max_bytes=args.artifact_cache_size << 20
 		)
+		with profiling.phase("artifact key"):
+			key = artifacts.artifact_key(project_dir, mod_config)
+		libs = os.path.join(project_dir, "build", "libs")
+		with profiling.phase("artifact cache"):
+			jars = cache.fetch(key, libs)
+		if jars:
+			print(f"Artifact cache hit ({key[:12]}), skipping Gradle:")
+			for jar in jars:
+				print(f"  {jar}")
+			return
+		print(f"Artifact cache miss ({key[:12]}), building with Gradle...")
+
+	min_java, rec_java = mod_config.get_required_java_version()
+	env = _java_environment(min_java, rec_java)
+	# gradle.properties was written by the generator (see --gradle-profile).
+	# The Loom cache is only checked by 'run --warm': the check walks all of
+	# it, which would cost every build more than a Gradle up-to-date check
+	with profiling.phase("gradle setup (warm)"):
+		_setup_gradle_warm(project_dir, env, check_loom_cache=False)
+	before = artifacts.jar_snapshot(project_dir)
+	try:
+		result = run_gradle(project_dir, ["build"], env=env)
+	except OSError as e:
+		print(f"Failed to start Gradle: {e}", file=sys.stderr)
+		sys.exit(1)
+	print(result.summary())
+	if args.build_report:
+		result.write_report(args.build_report)
+	if not result.ok:
+		print(f"Failed to build mod: {CommandError(result)}", file=sys.stderr)
 		sys.exit(1)
 
-	mod_config = scope["mod_config"]
-	blocks = scope.get("blocks", [])  # Default to empty list if not defined
-	items = scope.get("items", [])  # Default to empty list if not defined
+	# Only the jars this build wrote, not leftovers of earlier builds
+	jars = artifacts.built_jars(project_dir, before)
+	for jar in jars:
+		print(f"Built {jar}")
+	if cache is not None and jars:
+		with profiling.phase("artifact cache"):
+			cache.store(key, jars)
 
-	# 2. Generate the mod project
-	output_dir = os.path.abspath(args.output)
-	generate_mod_project(mod_config, blocks, items, output_dir)
 
-	# 3. Optionally run Gradle build
-	if args.build:
-		gradlew_path = os.path.join(output_dir, "gradlew")
-		if not os.path.isfile(gradlew_path):
-			# Minimal approach: we assume user has Gradle installed or they add
-			# a wrapper themselves. For demonstration, just try `gradle build`.
-			# from fabricpy.utils import run_command
-			print("Attempting to build using system Gradle...")
-			# run_command("gradle build", cwd=output_dir)
-			print(
-				"Build step is placeholder here. In a real setup, you'd run Gradle or gradlew.",
-			)
+def _handle_compile_many(args):
+	start = time.perf_counter()
+	try:
+		results = generate_mod_projects(
+			args.config_scripts,
+			args.output,
+			max_workers=args.workers,
+			**_generation_options(args),
+		)
+	except (FileNotFoundError, ValueError) as e:
+		print(f"Error: {e}", file=sys.stderr)
+		sys.exit(1)
+
+	failed = [result for result in results if not result.ok]
+	for result in results:
+		name = os.path.relpath(result.config_script)
+		if result.ok:
+			print(f"{name}: {result.stats} ({result.seconds:.2f} s)")
 		else:
-			print("Found gradlew. Running './gradlew build' ...")
-			# run_command("./gradlew build", cwd=output_dir)
-			print(
-				"Build step is placeholder here. In a real setup, you'd run Gradle or gradlew.",
-			)
+			print(f"{name}: FAILED: {result.error}", file=sys.stderr)
+
+	written = sum(result.stats.written for result in results if result.ok)
+	elapsed = time.perf_counter() - start
+	print(
+		f"Generated {len(results) - len(failed)} of {len(results)} projects "
+		f"into {os.path.abspath(args.output)} in {elapsed:.2f} s "
+		f"({written} files written, {len(failed)} failed)"
+	)
+	if failed:
+		sys.exit(1)
+
+
+def _handle_validate(args):
+	failed = 0
+	for config_script in args.config_scripts:
+		try:
+			validate_config(*load_config(config_script))
+		except (OSError, ValueError) as e:
+			failed += 1
+			print(f"{config_script}: {e}", file=sys.stderr)
+		else:
+			print(f"{config_script}: OK")
+	if failed:
+		sys.exit(1)
+
+
+def _handle_watch(args):
+	output_dir = os.path.abspath(args.output)
+	try:
+		watch_project(args.config_script, output_dir, **_generation_options(args))
+	except KeyboardInterrupt:
+		print("Stopped watching.")
 
 
-def _check_java_version(java_path, required_version):
-	"""Helper to check if a given java path meets version requirements."""
+def _handle_serve(args):
 	try:
-		result = subprocess.run(
-			[java_path, "-version"],
-			stdout=subprocess.PIPE,
-			stderr=subprocess.PIPE,
-			text=True,
+		server.serve(
+			args.host,
+			args.port,
+			workers=args.workers,
+			max_queue=args.queue_size,
+			cache_bytes=args.cache_size << 20,
 		)
-		# Java -version prints to stderr
-		version_output = result.stderr
-		# Extract major version number
-		if "version" in version_output:
-			# Convert "21.0.1" or "1.8.0" to major version number
-			version_str = version_output.split('"')[1].split(".")[0]
-			if "1." in version_str:
-				major_version = int(version_str.split(".")[1])
-			else:
-				major_version = int(version_str)
-
-			if major_version >= required_version:
-				print(f"Found Java {major_version}: {version_output.splitlines()[0]}")
-				return True
-			else:
-				print(
-					f"Found Java {major_version}, but version {required_version} or newer is required"
-				)
-	except Exception as e:
-		print(f"Warning: Error checking Java at {java_path}: {e}", file=sys.stderr)
-	return False
+	except KeyboardInterrupt:
+		print("Stopped serving.")
+
+
+def _handle_mirror(args):
+	index = get_index()
+	if args.all_versions:
+		mc_versions = [info.mc_version for info in index]
+	else:
+		mc_versions = args.mc_version or [index.latest().mc_version]
+	unknown = [version for version in mc_versions if version not in index]
+	if unknown:
+		print(
+			f"Error: Unsupported Minecraft version: {', '.join(unknown)}",
+			file=sys.stderr,
+		)
+		sys.exit(1)
+
+	maven = mirror.MavenMirror(
+		args.directory,
+		gradle_cache=args.gradle_cache,
+		offline=args.offline,
+		max_workers=args.jobs,
+	)
+	print(f"Mirroring Fabric dependencies of {', '.join(mc_versions)}...")
+	report = maven.add_versions(mc_versions)
+	print(report)
+	if args.import_all:
+		print(f"Importing the Gradle cache: {maven.import_gradle_cache()}")
+	for coordinate in report.unresolved:
+		print(f"  unresolved: {coordinate}", file=sys.stderr)
+	for coordinate in report.missing:
+		print(f"  missing: {coordinate}", file=sys.stderr)
+	print(f"Generate with --maven-mirror {maven.directory} to build from it.")
+	if report.missing:
+		sys.exit(1)
 
 
 def _handle_run(args):
@@ -173,12 +604,6 @@ def _handle_run(args):
 		print(f"Error: No build.gradle found in {project_dir}", file=sys.stderr)
 		sys.exit(1)
 
-	# Set up environment with Java 17
-	env = os.environ.copy()
-
-	# Try to find Java 17 installation
-	java_home = None
-
 	# First get required Java version from mod config
 	build_gradle = os.path.join(args.project_dir, "build.gradle")
 	if not os.path.isfile(build_gradle):
@@ -196,124 +621,135 @@ def _handle_run(args):
 	mod_config = ModConfig("temp", "temp", mc_version=mc_version)
 	min_java, rec_java = mod_config.get_required_java_version()
 
-	# Try JAVA_HOME first if it's set
-	if "JAVA_HOME" in os.environ:
-		java_path = os.path.join(os.environ["JAVA_HOME"], "bin", "java")
-		if _check_java_version(java_path, min_java):
-			java_home = os.environ["JAVA_HOME"]
-
-	if not java_home:
-		# Update paths to include both Java 17 and 21 locations
-		common_paths = [
-			# Java 21 paths
-			"/Library/Java/JavaVirtualMachines/temurin-21.jdk/Contents/Home",
-			"/opt/homebrew/opt/openjdk@21",
-			# Java 17 paths
-			"/Library/Java/JavaVirtualMachines/temurin-17.jdk/Contents/Home",
-			"/opt/homebrew/opt/openjdk@17",
-			# Java 16 paths
-			"/Library/Java/JavaVirtualMachines/temurin-16.jdk/Contents/Home",
-			"/opt/homebrew/opt/openjdk@16",
-			# Java 8 paths
-			"/Library/Java/JavaVirtualMachines/temurin-8.jdk/Contents/Home",
-			"/opt/homebrew/opt/openjdk@8",
-		]
-
-		for path in common_paths:
-			if os.path.exists(path):
-				java_path = os.path.join(path, "bin", "java")
-				if _check_java_version(java_path, min_java):
-					java_home = path
-					break
-
-	# Set JAVA_HOME and PATH to ensure we use Java 17
-	if java_home:
+	env = _java_environment(min_java, rec_java)
+	# The generator's gradle.properties is kept as it is; a project without
+	# one gets the file compile would have written
+	properties = gradle_setup.project_gradle_properties(
+		min_java, mod_config.get_fabric_loom_version()
+	)
+	# Keep the daemon alive between warm runs; the flag overrides the file
+	daemon = "--daemon" if args.warm else "--no-daemon"
+
+	# Update Gradle setup
+	if args.no_setup:
+		pass
+	elif args.warm:
+		with profiling.phase("gradle setup (warm)"):
+			_setup_gradle_warm(project_dir, env, properties)
+	else:
+		with profiling.phase("gradle setup (cold)"):
+			_setup_gradle_cold(project_dir, env, properties, daemon)
+
+	# Run Minecraft with more verbose output
+	print(f"Running Minecraft with mod in {project_dir}...")
+	try:
+		run_gradle(
+			project_dir,
+			["runClient"],
+			env=env,
+			args=[daemon, "--warning-mode", "all", "--stacktrace"],
+		).check()
+	except (OSError, CommandError) as e:
+		print(f"Failed to run mod: {e}", file=sys.stderr)
+		sys.exit(1)
+
+
+def _java_environment(min_java, rec_java):
+	"""Environment for Gradle with JAVA_HOME and PATH set to a suitable JDK."""
+	env = os.environ.copy()
+	# Pick the best installed JDK (JAVA_HOME first); probes are cached on disk
+	with profiling.phase("find java"):
+		java = find_java(min_java, rec_java)
+
+	# Set JAVA_HOME and PATH to ensure we use that Java
+	if java:
+		java_home = java.home
 		env["JAVA_HOME"] = java_home
 		if sys.platform == "win32":
 			env["PATH"] = f"{os.path.join(java_home, 'bin')};{env.get('PATH', '')}"
 		else:
 			env["PATH"] = f"{os.path.join(java_home, 'bin')}:{env.get('PATH', '')}"
 		print(f"Using Java from: {java_home}")
-
-		# Verify Java is accessible
-		try:
-			result = subprocess.run(
-				["java", "-version"],
-				env=env,
-				stdout=subprocess.PIPE,
-				stderr=subprocess.PIPE,
-				text=True,
-			)
-			version_output = result.stderr
-			print(f"Detected Java version: {version_output.splitlines()[0]}")
-		except Exception as e:
-			print(f"Warning: Error verifying Java: {e}", file=sys.stderr)
+		print(f"Detected Java version: {java.description}")
 	else:
 		print(
-			"Warning: Could not find Java 17. Please install it and set JAVA_HOME",
+			f"Warning: Could not find Java {min_java} or newer. "
+			"Please install it and set JAVA_HOME",
 			file=sys.stderr,
 		)
 		sys.exit(1)
 
-	# Update Gradle setup
-	if not args.no_setup:
-		print("Setting up Gradle environment...")
-		try:
-			# Clean Fabric Loom cache if it exists
-			loom_cache = os.path.expanduser("~/.gradle/caches/fabric-loom")
-			if os.path.exists(loom_cache):
-				print("Cleaning Fabric Loom cache...")
-				import shutil
-
-				shutil.rmtree(loom_cache)
-
-			# Create gradle.properties with explicit configurations
-			properties_content = dedent(f"""
-			org.gradle.jvmargs=-Xmx3G -XX:MaxMetaspaceSize=1G
-			org.gradle.daemon=false
-			org.gradle.parallel=true
-			org.gradle.caching=true
-			
-			# Java configuration
-			java.toolchain.languageVersion={min_java}
-			java.toolchain.vendor=ADOPTIUM
-			""").strip()
-
-			with open(os.path.join(project_dir, "gradle.properties"), "w") as f:
-				f.write(properties_content)
-
-			# Initialize/update Gradle wrapper
-			gradle_cmd = (
-				"gradle wrapper --gradle-version 8.10 --distribution-type=bin "
-				"--warning-mode all"
-			)
-			run_command(gradle_cmd, cwd=project_dir, env=env)
+	return env
 
-			# Clean and build
-			if os.path.isfile(os.path.join(project_dir, "gradlew")):
-				run_command("./gradlew clean", cwd=project_dir, env=env)
-			else:
-				run_command("gradle clean", cwd=project_dir, env=env)
 
-		except Exception as e:
-			print(f"Failed to setup Gradle environment: {e}", file=sys.stderr)
-			sys.exit(1)
+def _gradle_wrapper(project_dir, env):
+	run_process(
+		[
+			"gradle",
+			"wrapper",
+			"--gradle-version",
+			gradle_setup.GRADLE_VERSION,
+			"--distribution-type=bin",
+			"--warning-mode",
+			"all",
+		],
+		cwd=project_dir,
+		env=env,
+	).check()
 
-	# Run Minecraft with more verbose output
-	print(f"Running Minecraft with mod in {project_dir}...")
+
+def _setup_gradle_cold(project_dir, env, properties, daemon="--no-daemon"):
+	print("Setting up Gradle environment...")
+	start = time.perf_counter()
 	try:
-		if os.path.isfile(os.path.join(project_dir, "gradlew")):
-			run_command(
-				"./gradlew runClient --warning-mode all --stacktrace",
-				cwd=project_dir,
-				env=env,
-			)
+		# Clean Fabric Loom cache if it exists
+		if os.path.exists(gradle_setup.LOOM_CACHE_DIR):
+			print("Cleaning Fabric Loom cache...")
+			gradle_setup.wipe_loom_cache()
+
+		# Create gradle.properties if the generator did not
+		gradle_setup.write_gradle_properties(project_dir, properties, replace=False)
+
+		# Initialize/update Gradle wrapper
+		_gradle_wrapper(project_dir, env)
+
+		# Clean with the wrapper (or gradle, if it was not created)
+		run_gradle(project_dir, ["clean"], env=env, args=[daemon]).check()
+
+	except Exception as e:
+		print(f"Failed to setup Gradle environment: {e}", file=sys.stderr)
+		sys.exit(1)
+	gradle_setup.record_cold_setup_seconds(project_dir, time.perf_counter() - start)
+
+
+def _setup_gradle_warm(project_dir, env, properties=None, check_loom_cache=True):
+	print("Checking Gradle environment (warm)...")
+	start = time.perf_counter()
+	try:
+		if check_loom_cache:
+			# Only drop cache entries that are actually broken
+			removed = gradle_setup.check_loom_cache()
+			if removed:
+				print(f"Removed {len(removed)} broken Fabric Loom cache entries")
+
+		if properties is not None:
+			gradle_setup.write_gradle_properties(project_dir, properties, replace=False)
+
+		if gradle_setup.wrapper_is_current(project_dir):
+			print(f"Reusing Gradle {gradle_setup.GRADLE_VERSION} wrapper")
 		else:
-			run_command(
-				"gradle runClient --warning-mode all --stacktrace",
-				cwd=project_dir,
-				env=env,
-			)
+			_gradle_wrapper(project_dir, env)
 	except Exception as e:
-		print(f"Failed to run mod: {e}", file=sys.stderr)
+		print(f"Failed to setup Gradle environment: {e}", file=sys.stderr)
 		sys.exit(1)
+
+	elapsed = time.perf_counter() - start
+	cold = gradle_setup.last_cold_setup_seconds(project_dir)
+	if cold is None:
+		print(f"Warm setup took {elapsed:.1f}s (no cold setup recorded to compare)")
+	else:
+		print(
+			f"Warm setup took {elapsed:.1f}s, saving {max(cold - elapsed, 0):.1f}s "
+			f"compared with the last cold setup ({cold:.1f}s), not counting "
+			"the Minecraft download and remap a wiped Loom cache forces"
+		)
@@ -0,0 +1,245 @@
+"""compat.py
+
+Minecraft version compatibility index.
+
+For every supported Minecraft version, the index knows the matching Fabric
+API and Fabric Loom versions and the Java versions needed to build it. The
+data comes from ``fabricpy/data/compat.json`` and is loaded once, on first
+use. Version strings are parsed into tuples when loading, so lookups are
+dict accesses and range queries are binary searches::
+
+    index = get_index()
+    index["1.21.4"].fabric_api         # "0.112.2+1.21.4"
+    index.versions_requiring_java(17)  # ["1.18", ..., "1.21.3"]
+    index.versions_between("1.20", "1.20.6")
+
+New versions can be added without a fabricpy release by putting them in a
+local override file with the same format (``$FABRICPY_COMPAT_FILE``, or
+``$XDG_CONFIG_HOME/fabricpy/compat.json``, i.e. ``~/.config/fabricpy/compat.json``
+by default). An override entry replaces the fields it sets for an existing
+version and adds the version if it is new::
+
+    {"versions": [
+        {"mc_version": "1.21.5", "fabric_api": "0.119.2+1.21.5",
+         "loom": "1.10.1", "min_java": 21, "recommended_java": 21}
+    ]}
+"""
+
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), "data", "compat.json")
+
+_FIELDS = ("fabric_api", "loom", "min_java", "recommended_java")
+
+_index = None
+_lock = threading.Lock()
+
+
+def parse_version(version: str) -> tuple:
+	"""Parse a Minecraft version like ``"1.20.4"`` into a comparable tuple.
+
+	Trailing zeros are dropped, so ``"1.20"`` and ``"1.20.0"`` compare equal.
+
+	:raises ValueError: If ``version`` is not a dotted number
+	"""
+	try:
+		parts = [int(part) for part in version.split(".")]
+	except (AttributeError, ValueError):
+		raise ValueError(f"Invalid Minecraft version: {version!r}") from None
+	while len(parts) > 1 and parts[-1] == 0:
+		parts.pop()
+	return tuple(parts)
+
+
+class VersionInfo:
+	"""Compatibility data of one Minecraft version."""
+
+	__slots__ = (
+		"mc_version",
+		"key",
+		"fabric_api",
+		"loom",
+		"min_java",
+		"recommended_java",
+	)
+
+	def __init__(self, mc_version, fabric_api, loom, min_java, recommended_java):
+		self.mc_version = mc_version
+		self.key = parse_version(mc_version)
+		self.fabric_api = fabric_api
+		self.loom = loom
+		self.min_java = min_java
+		self.recommended_java = recommended_java
+
+	def __repr__(self):
+		return (
+			f"VersionInfo(mc_version={self.mc_version}, fabric_api={self.fabric_api}, "
+			f"loom={self.loom}, min_java={self.min_java}, "
+			f"recommended_java={self.recommended_java})"
+		)
+
+
+class CompatIndex:
+	"""Lookup structure over the compatibility data of all known versions."""
+
+	def __init__(self, entries):
+		"""Build the index.
+
+		:param entries: VersionInfo objects, in any order
+		"""
+		self._infos = sorted(entries, key=lambda info: info.key)
+		self._keys = [info.key for info in self._infos]
+		self._by_version = {info.mc_version: info for info in self._infos}
+		self._by_java = {}
+		for info in self._infos:
+			self._by_java.setdefault(info.min_java, []).append(info.mc_version)
+
+		# The tables ModConfig has always exposed
+		self.mc_versions = [info.mc_version for info in self._infos]
+		self.fabric_api_versions = {
+			info.mc_version: info.fabric_api for info in self._infos
+		}
+		self.loom_versions = {info.mc_version: info.loom for info in self._infos}
+		self.java_requirements = self._java_thresholds()
+
+	def __contains__(self, mc_version):
+		return mc_version in self._by_version
+
+	def __getitem__(self, mc_version) -> VersionInfo:
+		"""Return the VersionInfo of ``mc_version``.
+
+		:raises KeyError: If the version is not in the index
+		"""
+		return self._by_version[mc_version]
+
+	def __iter__(self):
+		"""Iterate the VersionInfo objects, oldest version first."""
+		return iter(self._infos)
+
+	def __len__(self):
+		return len(self._infos)
+
+	def get(self, mc_version, default=None):
+		"""Return the VersionInfo of ``mc_version``, or ``default``."""
+		return self._by_version.get(mc_version, default)
+
+	def latest(self) -> VersionInfo:
+		"""Return the newest version in the index."""
+		return self._infos[-1]
+
+	def required_java(self, mc_version: str) -> tuple:
+		"""Return ``(min_java, recommended_java)`` for ``mc_version``.
+
+		A version missing from the index gets the requirement of the newest
+		known version before it (Java 8 if there is none).
+		"""
+		info = self._by_version.get(mc_version)
+		if info is None:
+			position = bisect_right(self._keys, parse_version(mc_version))
+			if not position:
+				return 8, 8
+			info = self._infos[position - 1]
+		return info.min_java, info.recommended_java
+
+	def versions_requiring_java(self, java: int) -> list:
+		"""Return the versions whose minimum Java version is exactly ``java``."""
+		return list(self._by_java.get(java, ()))
+
+	def versions_supported_by_java(self, java: int) -> list:
+		"""Return the versions that can be built with Java ``java``."""
+		return [info.mc_version for info in self._infos if info.min_java <= java]
+
+	def versions_between(self, oldest: str, newest: str) -> list:
+		"""Return the known versions from ``oldest`` to ``newest``, inclusive."""
+		start = bisect_left(self._keys, parse_version(oldest))
+		end = bisect_right(self._keys, parse_version(newest))
+		return [info.mc_version for info in self._infos[start:end]]
+
+	def _java_thresholds(self):
+		# (mc_version, min_java, recommended_java) for every version where the
+		# requirement changes, newest first
+		thresholds = []
+		previous = None
+		for info in self._infos:
+			requirement = (info.min_java, info.recommended_java)
+			if requirement != previous:
+				thresholds.append((info.mc_version, *requirement))
+				previous = requirement
+		thresholds.reverse()
+		return thresholds
+
+
+def override_file() -> str:
+	"""Return the path of the local override file (which may not exist)."""
+	path = os.environ.get("FABRICPY_COMPAT_FILE")
+	if path:
+		return path
+	xdg = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+	return os.path.join(xdg, "fabricpy", "compat.json")
+
+
+def load_index(path: str = DATA_FILE, override: str = None) -> CompatIndex:
+	"""Read a compatibility index from ``path``, merged with ``override``.
+
+	:param path: Compatibility data file
+	:param override: Optional override file; ignored if it does not exist
+	:raises ValueError: If a file is malformed or a new version is incomplete
+	"""
+	entries = {}
+	for source in (path, override):
+		if source is None or (source is override and not os.path.exists(source)):
+			continue
+		for entry in _read_entries(source):
+			merged = dict(entries.get(entry["mc_version"], {}))
+			merged.update(entry)
+			entries[entry["mc_version"]] = merged
+
+	infos = []
+	for mc_version, entry in entries.items():
+		missing = [field for field in _FIELDS if field not in entry]
+		if missing:
+			raise ValueError(
+				f"Compatibility data for {mc_version} lacks {', '.join(missing)}"
+			)
+		infos.append(VersionInfo(mc_version, *(entry[field] for field in _FIELDS)))
+	return CompatIndex(infos)
+
+
+def get_index(reload: bool = False) -> CompatIndex:
+	"""Return the process-wide index, loading it on first use.
+
+	:param reload: Read the data and override files again
+	"""
+	global _index
+	index = _index
+	if index is None or reload:
+		with _lock:
+			if _index is None or reload:
+				_index = load_index(DATA_FILE, override_file())
+			index = _index
+	return index
+
+
+def _read_entries(path):
+	try:
+		with open(path, encoding="utf-8") as f:
+			document = json.load(f)
+	except ValueError as e:
+		raise ValueError(f"Invalid JSON in {path}: {e}") from None
+	versions = document.get("versions") if isinstance(document, dict) else None
+	if not isinstance(versions, list):
+		raise ValueError(f"{path} must contain a 'versions' list")
+	for entry in versions:
+		if not isinstance(entry, dict) or "mc_version" not in entry:
+			raise ValueError(f"Every version in {path} needs an 'mc_version'")
+		unknown = set(entry) - {"mc_version", *_FIELDS}
+		if unknown:
+			raise ValueError(
+				f"Unknown key(s) for {entry['mc_version']} in {path}: "
+				f"{', '.join(sorted(unknown))}"
+			)
+		parse_version(entry["mc_version"])
+		yield entry
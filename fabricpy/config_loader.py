@@ -0,0 +1,382 @@
+"""config_loader.py
+
+Loads a mod configuration (``mod_config``, ``blocks`` and ``items``) from a
+Python config script or from a declarative TOML/JSON file.
+
+A declarative config looks like this (TOML; JSON uses the same structure)::
+
+    [mod]
+    mod_name = "Example Mod"
+    mod_id = "examplemod"
+    mc_version = "1.21.4"
+
+    [[items]]
+    id = "my_item"
+    name = "My Item"
+    texture_file = "textures/my_item.png"
+    category = "tools"
+
+    [[blocks]]
+    id = "my_block"
+    name = "My Block"
+    texture_file = "textures/my_block.png"
+
+``items`` and ``blocks`` may also name a CSV or JSON table file instead (see
+:mod:`fabricpy.tables`). Relative paths in a declarative config are relative
+to the config file.
+
+:func:`load_config` caches a loaded declarative configuration on disk,
+keyed by the SHA-256 of the config file and of every table file it names, so
+an unchanged config is not parsed again. Config scripts are only cached on
+request (``cache_scripts=True``): a script may read any other file, and its
+cached result would not notice those changing.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+
+import fabricpy
+from fabricpy.block import Block
+from fabricpy.item import Item
+from fabricpy.manifest import hash_file
+from fabricpy.mod_config import ModConfig
+from fabricpy.tables import BlockTable, ItemTable
+from fabricpy.utils import cache_dir
+
+DECLARATIVE_EXTENSIONS = (".toml", ".json")
+
+# Bump when the cached payload or the way configs are interpreted changes
+CACHE_VERSION = 2
+
+_MOD_KEYS = {
+	"mod_name",
+	"mod_id",
+	"version",
+	"description",
+	"mc_version",
+	"authors",
+	"group",
+	"contact",
+}
+_ENTRY_KEYS = {"id", "name", "texture_file", "category"}
+
+# Type of each [mod] value other than a string, and how errors name types
+_MOD_KEY_TYPES = {"authors": list, "contact": dict}
+_TYPE_NAMES = {str: "string", list: "list", dict: "table/object"}
+
+
+def load_config(path: str, use_cache: bool = True, cache_scripts: bool = False):
+	"""Load a mod definition from a config script or a TOML/JSON config.
+
+	:param path: Path of a ``.py``, ``.toml`` or ``.json`` config
+	:param use_cache: If False, always parse/execute the config (the cache
+	                  is still updated)
+	:param cache_scripts: If True, also cache config scripts, keyed by the
+	                      script file only; only correct for scripts that do
+	                      not read other files
+	:return: ``(mod_config, blocks, items)`` tuple
+	:raises ValueError: If the config is invalid
+	"""
+	with open(path, "rb") as f:
+		data = f.read()
+	declarative = path.lower().endswith(DECLARATIVE_EXTENSIONS)
+	if not declarative and not cache_scripts:
+		return _exec_script(path, data.decode("utf-8"))
+
+	digest = hashlib.sha256(data)
+	# Relative paths resolve against the config's directory (declarative) or
+	# the working directory (scripts), so they are part of the key
+	digest.update(os.path.abspath(path).encode("utf-8"))
+	if not declarative:
+		digest.update(os.getcwd().encode("utf-8"))
+	digest.update(f"{fabricpy.__version__}/{CACHE_VERSION}".encode())
+	key = digest.hexdigest()
+
+	cache_path = _cache_path(path)
+	if use_cache:
+		cached = _read_cache(cache_path, key)
+		if cached is not None:
+			return cached
+
+	if declarative:
+		document = _parse_document(path, data)
+		base_dir = os.path.dirname(os.path.abspath(path))
+		config = config_from_document(document, base_dir, path)
+		tables = _table_files(document, base_dir)
+	else:
+		config = _exec_script(path, data.decode("utf-8"))
+		tables = []
+	# Hashed after loading, so a table changed meanwhile is not trusted
+	_write_cache(cache_path, key, {table: hash_file(table) for table in tables}, config)
+	return config
+
+
+def config_table_files(path: str) -> list:
+	"""Return the CSV/JSON table files a declarative config names.
+
+	:param path: Path of a ``.py``, ``.toml`` or ``.json`` config
+	:return: Absolute paths; empty for a config script
+	:raises ValueError: If the config cannot be parsed
+	"""
+	if not path.lower().endswith(DECLARATIVE_EXTENSIONS):
+		return []
+	with open(path, "rb") as f:
+		data = f.read()
+	document = _parse_document(path, data)
+	if not isinstance(document, dict):
+		return []
+	return _table_files(document, os.path.dirname(os.path.abspath(path)))
+
+
+def load_config_script(path: str):
+	"""Execute a config script and return its mod definition.
+
+	The script runs in a namespace that already provides ``ModConfig``,
+	``Block``, ``Item``, ``BlockTable`` and ``ItemTable``, and should define::
+
+	    mod_config = ModConfig(...)
+	    blocks = [Block(...), ...]  # optional, or a BlockTable
+	    items = [Item(...), ...]  # optional, or an ItemTable
+
+	:param path: Path of the config script
+	:return: ``(mod_config, blocks, items)`` tuple
+	:raises ValueError: If the script does not define ``mod_config``
+	"""
+	with open(path, encoding="utf-8") as f:
+		code = f.read()
+	return _exec_script(path, code)
+
+
+def load_declarative_config(path: str):
+	"""Parse a TOML or JSON mod config without caching.
+
+	:return: ``(mod_config, blocks, items)`` tuple, with the entries in a
+	         BlockTable and an ItemTable
+	:raises ValueError: If the config is invalid
+	"""
+	with open(path, "rb") as f:
+		return _load_declarative(path, f.read())
+
+
+def _exec_script(path, code):
+	# We'll exec the code in a dict that has references to our classes
+	scope = {
+		"ModConfig": ModConfig,
+		"Block": Block,
+		"Item": Item,
+		"BlockTable": BlockTable,
+		"ItemTable": ItemTable,
+	}
+	exec(compile(code, path, "exec"), scope, scope)
+
+	if "mod_config" not in scope:
+		raise ValueError("config_script must define 'mod_config'.")
+
+	blocks = scope.get("blocks", [])  # Default to empty list if not defined
+	items = scope.get("items", [])  # Default to empty list if not defined
+	return scope["mod_config"], blocks, items
+
+
+def _load_declarative(path, data):
+	return config_from_document(
+		_parse_document(path, data), os.path.dirname(os.path.abspath(path)), path
+	)
+
+
+def _parse_document(path, data):
+	if path.lower().endswith(".toml"):
+		return parse_toml(path, data)
+	try:
+		return json.loads(data.decode("utf-8"))
+	except ValueError as e:
+		raise ValueError(f"Invalid JSON in {path}: {e}") from None
+
+
+def _table_files(document, base_dir):
+	"""Paths of the CSV/JSON table files a declarative config names."""
+	return [
+		os.path.join(base_dir, document[name])
+		for name in ("items", "blocks")
+		if isinstance(document.get(name), str)
+	]
+
+
+def config_from_document(document, base_dir: str, source: str = "<config>"):
+	"""Build a mod definition from a parsed declarative config.
+
+	:param document: Dict with ``mod``, ``items`` and ``blocks`` sections, as
+	                 read from a TOML or JSON config
+	:param base_dir: Directory relative texture and table paths resolve to
+	:param source: Name of the config used in error messages
+	:return: ``(mod_config, blocks, items)`` tuple
+	:raises ValueError: If the config is invalid
+	"""
+	check_document(document, source)
+	mod_config = ModConfig(**document["mod"])
+	blocks = _entry_table(BlockTable, document.get("blocks"), base_dir)
+	items = _entry_table(ItemTable, document.get("items"), base_dir)
+	return mod_config, blocks, items
+
+
+def check_document(document, source: str = "<config>"):
+	"""Check the sections, keys and value types of a declarative config.
+
+	:func:`config_from_document` runs this first; call it directly to check a
+	document from an untrusted source before reading any of its values.
+
+	:param document: Parsed TOML or JSON config
+	:param source: Name of the config used in error messages
+	:raises ValueError: Describing the first problem found
+	"""
+	if not isinstance(document, dict):
+		raise ValueError(f"{source} must contain a table/object at the top level")
+
+	unknown = set(document) - {"mod", "items", "blocks"}
+	if unknown:
+		raise ValueError(
+			f"Unknown section(s) in {source}: {', '.join(sorted(unknown))}"
+		)
+	mod = document.get("mod")
+	if not isinstance(mod, dict):
+		raise ValueError(f"{source} must have a [mod] section")
+	unknown = set(mod) - _MOD_KEYS
+	if unknown:
+		raise ValueError(
+			f"Unknown key(s) in the [mod] section of {source}: "
+			f"{', '.join(sorted(unknown))}"
+		)
+	missing = {"mod_name", "mod_id"} - set(mod)
+	if missing:
+		raise ValueError(
+			f"The [mod] section of {source} needs {', '.join(sorted(missing))}"
+		)
+	for key, value in mod.items():
+		expected = _MOD_KEY_TYPES.get(key, str)
+		values = value.values() if isinstance(value, dict) else value
+		if not isinstance(value, expected) or (
+			expected is not str and not all(isinstance(v, str) for v in values)
+		):
+			of = "" if expected is str else " of strings"
+			raise ValueError(
+				f"'{key}' in the [mod] section of {source} must be a "
+				f"{_TYPE_NAMES[expected]}{of}"
+			)
+
+	for name in ("items", "blocks"):
+		section = document.get(name)
+		if section is None or isinstance(section, str):
+			continue
+		if not isinstance(section, list):
+			raise ValueError(
+				f"'{name}' in {source} must be a list or a table file name"
+			)
+		for index, entry in enumerate(section):
+			if not isinstance(entry, dict):
+				raise ValueError(f"{name}[{index}] in {source} must be a table/object")
+			unknown = set(entry) - _ENTRY_KEYS
+			if unknown:
+				raise ValueError(
+					f"Unknown key(s) in {name}[{index}] of {source}: "
+					f"{', '.join(sorted(unknown))}"
+				)
+			if not entry.get("id") or not entry.get("name"):
+				raise ValueError(f"{name}[{index}] in {source} needs an id and a name")
+			for key, value in entry.items():
+				if not isinstance(value, str):
+					raise ValueError(
+						f"'{key}' in {name}[{index}] of {source} must be a string"
+					)
+
+
+def parse_toml(path: str, data: bytes) -> dict:
+	"""Parse TOML ``data`` with ``tomllib`` (or ``tomli`` before Python 3.11).
+
+	:param path: Name of the config used in error messages
+	:param data: The TOML document as UTF-8 bytes
+	:return: The parsed document
+	:raises ValueError: If the TOML is invalid or no TOML parser is available
+	"""
+	try:
+		import tomllib
+	except ImportError:
+		try:
+			import tomli as tomllib
+		except ImportError:
+			raise ValueError(
+				f"Reading {path} needs Python 3.11+ or the 'tomli' package "
+				"(pip install tomli)"
+			) from None
+	try:
+		return tomllib.loads(data.decode("utf-8"))
+	except tomllib.TOMLDecodeError as e:
+		raise ValueError(f"Invalid TOML in {path}: {e}") from None
+
+
+def _entry_table(table_class, section, base_dir):
+	if section is None:
+		return table_class()
+	if isinstance(section, str):
+		# A separate CSV/JSON table file
+		table_path = os.path.join(base_dir, section)
+		if table_path.lower().endswith(".json"):
+			table = table_class.from_json(table_path)
+		else:
+			table = table_class.from_csv(table_path)
+		return _resolve_textures(table_class, table.rows(), base_dir)
+
+	# Entries were checked by check_document()
+	rows = []
+	for entry in section:
+		rows.append(
+			(
+				entry["id"],
+				entry["name"],
+				entry.get("texture_file") or table_class.default_texture,
+				entry.get("category", "misc"),
+			)
+		)
+	return _resolve_textures(table_class, rows, base_dir)
+
+
+def _resolve_textures(table_class, rows, base_dir):
+	return table_class(
+		(entry_id, entry_name, os.path.join(base_dir, texture), category)
+		for entry_id, entry_name, texture, category in rows
+	)
+
+
+def _cache_path(path):
+	name = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()
+	return os.path.join(cache_dir("configs"), f"{name}.pickle")
+
+
+def _read_cache(cache_path, key):
+	try:
+		with open(cache_path, "rb") as f:
+			cached_key, tables, config = pickle.load(f)
+	except Exception:
+		# Missing, truncated or written by an incompatible version
+		return None
+	if cached_key != key:
+		return None
+	for table, digest in tables.items():
+		try:
+			if hash_file(table) != digest:
+				return None
+		except OSError:
+			return None
+	return config
+
+
+def _write_cache(cache_path, key, tables, config):
+	try:
+		payload = pickle.dumps((key, tables, config), protocol=pickle.HIGHEST_PROTOCOL)
+	except (pickle.PicklingError, TypeError, AttributeError):
+		# e.g. a script defining its own classes or generators
+		return
+	tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+	with open(tmp_path, "wb") as f:
+		f.write(payload)
+	os.replace(tmp_path, cache_path)
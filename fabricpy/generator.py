@@ -3,132 +3,550 @@
 Responsible for generating the Java code and a Gradle build script for a Fabric mod.
 """
 
+import glob
+import io
 import os
-import shutil
-import sys  # For error handling
-from textwrap import dedent
-
-
-def generate_mod_project(mod_config, blocks, items, output_dir):
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, redirect_stdout
+from itertools import islice
+
+from fabricpy import gradle_setup
+from fabricpy.block import Block
+from fabricpy.config_loader import load_config
+from fabricpy.gradle_setup import GRADLE_VERSION
+from fabricpy.item import Item
+from fabricpy.lang import LangWriter, write_lang_files
+from fabricpy.manifest import ProjectWriter
+from fabricpy.profiling import phase
+from fabricpy.staging import StagedOutput
+from fabricpy.tables import iter_block_rows, iter_item_rows
+from fabricpy.templating import TemplateRegistry, get_registry
+from fabricpy.textures import (
+	TextureCopier,
+	TexturePlanner,
+	copy_textures,
+	default_workers,
+	plan_textures,
+	texture_entries,
+)
+from fabricpy.validation import ConfigValidator, validate_config
+
+REGISTRATION_MODES = ("static", "data")
+
+# Entries read from the config per step of the streaming pass
+ENTRY_BUFFER = 1024
+
+
+class GenerationCancelled(Exception):
+	"""Raised when a generation run is stopped through its ``cancel_event``."""
+
+
+def generate_mod_project(
+	mod_config,
+	blocks,
+	items,
+	output_dir,
+	incremental=True,
+	texture_workers=None,
+	dedupe_textures=False,
+	optimize_textures=False,
+	registration="static",
+	translations=None,
+	templates=None,
+	atomic=False,
+	sink=None,
+	cancel_event=None,
+	maven_mirror=None,
+	gradle_profile=gradle_setup.DEFAULT_GRADLE_PROFILE,
+):
 	"""Generates the entire mod project (Java code, resources, build files)
 	in the specified output directory.
 
+	Outputs are written through a content-hash manifest stored in
+	``output_dir``: files whose bytes did not change since the previous run
+	are left untouched and outputs that are no longer produced are deleted.
+
+	Items and blocks are read in a single pass, ``ENTRY_BUFFER`` at a time,
+	so they can come from any iterable, including one-shot generators such
+	as rows streamed from a database cursor or a CSV reader. Meanwhile a
+	thread pool copies the textures and writes the files that do not depend
+	on the entries (Gradle files, ``fabric.mod.json``, the main class).
+
 	:param mod_config: ModConfig instance with mod metadata
-	:param blocks: List of Block instances
-	:param items: List of Item instances
-	:param output_dir: Where to place the generated mod project
+	:param blocks: Iterable of Block instances, or a BlockTable
+	:param items: Iterable of Item instances, or an ItemTable
+	:param output_dir: Where to place the generated mod project (unused if
+	                   ``sink`` is given)
+	:param incremental: If False, rewrite every file even if it is unchanged
+	:param texture_workers: Size of the thread pool copying textures and
+	                        writing the entry-independent files (defaults to
+	                        a few threads per CPU)
+	:param dedupe_textures: If True, byte-identical textures are copied once
+	                        and every model points at the shared asset
+	:param optimize_textures: If True, textures are losslessly recompressed;
+	                          results are cached on disk by input hash
+	:param registration: "static" writes the example item as a Java field;
+	                     "data" writes every item and block to a registry
+	                     resource that a fixed-size Java loop registers at
+	                     init, so the class stays small however many
+	                     entries the config declares
+	:param translations: Locale -> translation table (CSV/TSV/JSON/JSONL)
+	                     path, or a directory of ``<locale>.<ext>`` tables;
+	                     see :mod:`fabricpy.lang`
+	:param templates: Directory of templates overriding the built-in ones
+	                  (or a TemplateRegistry); see :mod:`fabricpy.templating`
+	:param atomic: If True, generate into a hardlinked copy of
+	               ``output_dir`` next to it and swap it into place in one
+	               step at the end, so watchers see a single change and a
+	               failed run leaves ``output_dir`` untouched; see
+	               :mod:`fabricpy.staging`
+	:param sink: Output sink to write the project to instead of
+	             ``output_dir``, e.g. a MemorySink or a ZipSink; see
+	             :mod:`fabricpy.sinks`
+	:param cancel_event: ``threading.Event``; once it is set, the run stops
+	                     at its next checkpoint (between stages and every
+	                     ``ENTRY_BUFFER`` entries), skips the texture copies
+	                     not started yet and raises GenerationCancelled. With
+	                     ``atomic`` or a sink, the output is left as it was
+	:param maven_mirror: Directory of a local Maven repository (see
+	                     :mod:`fabricpy.mirror`) listed before the remote
+	                     repositories in build.gradle and settings.gradle
+	:param gradle_profile: "dev" or "ci" to write a fixed gradle.properties,
+	                       "auto" to size it for this machine (see
+	                       :mod:`fabricpy.gradle_setup`), or None to write none
+	:return: GenerationStats with the written/skipped/deleted file counts
+	:raises GenerationCancelled: If ``cancel_event`` was set
+	:raises ValidationError: If the config has invalid or duplicate IDs or
+	                         missing textures (see :mod:`fabricpy.validation`).
+	                         For lists and tables this is raised before
+	                         anything is written; for one-shot iterators,
+	                         entry problems are raised after the pass over them
+	"""
+	if registration not in REGISTRATION_MODES:
+		raise ValueError(
+			f"Unknown registration mode: {registration}. "
+			f"Supported modes: {REGISTRATION_MODES}"
+		)
+	if gradle_profile is not None:
+		gradle_setup.resolve_profile(gradle_profile)
+	if sink is not None and atomic:
+		raise ValueError("atomic output only applies to a directory, not a sink")
+
+	try:
+		with phase("validate"):
+			if _is_reiterable(items) and _is_reiterable(blocks):
+				validate_config(mod_config, blocks, items)
+				validator = None
+			else:
+				# Entries can only be read once: check them during the pass
+				validator = ConfigValidator(mod_config)
+				validator.check()
+		_check_cancelled(cancel_event)
+	except BaseException:
+		# A sink is always finished or aborted, e.g. to close its zip file
+		if sink is not None:
+			sink.abort()
+		raise
+
+	if not isinstance(templates, TemplateRegistry):
+		templates = get_registry(templates)
+	context = _template_context(mod_config, maven_mirror)
+	stage = StagedOutput(output_dir) if atomic else None
+	if sink is not None:
+		writer = sink
+	else:
+		with phase("load manifest"):
+			writer = ProjectWriter(
+				stage.path if stage else output_dir,
+				incremental=incremental,
+				linked=atomic,
+			)
+
+	try:
+		with ThreadPoolExecutor(
+			max_workers=texture_workers or default_workers()
+		) as pool:
+			planner = TexturePlanner(
+				mod_config, pool, dedupe=dedupe_textures, digest=writer.source_digest
+			)
+			copier = TextureCopier(
+				writer, pool, optimize=optimize_textures, cancel_event=cancel_event
+			)
+
+			if _is_reiterable(items) and _is_reiterable(blocks):
+				# Entries are in memory: plan all textures before any I/O
+				with phase("plan textures"):
+					jobs = planner.add(texture_entries(blocks, items))
+					planner.check()
+				copier.submit(jobs)
+
+			_check_cancelled(cancel_event)
+			# 1. Files that only depend on the mod metadata and the templates
+			#    (Gradle files, fabric.mod.json, main class, extra templates)
+			#    are written in the background of the entry pass
+			project_files = pool.submit(
+				_write_project_files,
+				writer,
+				mod_config,
+				templates,
+				context,
+				registration,
+				gradle_profile,
+			)
+
+			# 2. One pass over the entries: textures, lang entries and, in
+			#    data mode, the registry resource plus models and blockstates
+			with phase("entries"):
+				lang, first_item_texture = _write_entries(
+					writer,
+					mod_config,
+					blocks,
+					items,
+					registration,
+					translations,
+					planner,
+					copier,
+					validator,
+					cancel_event,
+				)
+			_check_cancelled(cancel_event)
+			with phase("lang files"):
+				_report_missing_translations(lang.finish())
+
+			# 3. Item model JSON with correct texture path
+			if registration != "data" and first_item_texture is not None:
+				with phase("models"):
+					_write_item_models(
+						writer, mod_config, first_item_texture, planner.plan
+					)
+
+			with phase("wait for project files"):
+				project_files.result()
+			_check_cancelled(cancel_event)
+
+			# 4. Textures, named after their source files to match the models,
+			#    have been copying in the background since the entry pass
+			with phase("copy textures", count=len(planner.plan.jobs)):
+				copied = copier.wait()
+			_check_cancelled(cancel_event)
+	except BaseException:
+		if stage is not None:
+			stage.discard()
+		else:
+			# Keep the manifest in line with whatever was already written
+			writer.abort()
+		raise
+
+	textures = planner.plan
+	if textures.jobs:
+		print(f"Copied {copied} of {len(textures.jobs)} textures")
+	if textures.duplicates:
+		print(f"Collapsed {textures.duplicates} duplicate textures")
+
+	with phase("finish manifest"):
+		stats = writer.finish()
+	if stage is not None:
+		stage.commit()
+	target = output_dir if sink is None else sink
+	print(f"Mod project generated in: {target} ({stats})")
+	return stats
+
+
+def update_textures(
+	mod_config,
+	blocks,
+	items,
+	output_dir,
+	sources,
+	texture_workers=None,
+	optimize_textures=False,
+):
+	"""Re-copy only the textures whose source file is in ``sources``.
+
+	Used to refresh a previously generated project after some textures
+	changed, without touching any other output.
+
+	:param sources: Paths of the texture files that changed
+	:return: GenerationStats for the refreshed files
+	"""
+	sources = {os.path.abspath(source) for source in sources}
+
+	def affected(rows, entry_class):
+		return [entry_class(*row) for row in rows if os.path.abspath(row[2]) in sources]
+
+	writer = ProjectWriter(output_dir, partial=True)
+	textures = plan_textures(
+		mod_config,
+		affected(iter_block_rows(blocks), Block),
+		affected(iter_item_rows(items), Item),
+		texture_workers,
+	)
+	copy_textures(writer, textures.jobs, texture_workers, optimize=optimize_textures)
+	return writer.finish()
+
+
+def update_lang_files(
+	mod_config,
+	blocks,
+	items,
+	output_dir,
+	translations=None,
+	registration="static",
+):
+	"""Rewrite only the lang files of a previously generated project.
+
+	:return: GenerationStats for the refreshed files
 	"""
-	# 1. Create directory structure
-	src_main_java = os.path.join(output_dir, "src", "main", "java", mod_config.mod_id)
-	src_main_resources = os.path.join(output_dir, "src", "main", "resources")
-	os.makedirs(src_main_java, exist_ok=True)
-	os.makedirs(src_main_resources, exist_ok=True)
-
-	# Create gradle wrapper directory
-	gradle_wrapper_dir = os.path.join(output_dir, "gradle", "wrapper")
-	os.makedirs(gradle_wrapper_dir, exist_ok=True)
-
-	# Generate gradle-wrapper.properties
-	wrapper_properties = dedent("""
-    distributionBase=GRADLE_USER_HOME
-    distributionPath=wrapper/dists
-    distributionUrl=https\\://services.gradle.org/distributions/gradle-8.10-bin.zip
-    networkTimeout=10000
-    zipStoreBase=GRADLE_USER_HOME
-    zipStorePath=wrapper/dists
-    """).strip()
-
-	with open(
-		os.path.join(gradle_wrapper_dir, "gradle-wrapper.properties"),
-		"w",
-		encoding="utf-8",
-	) as f:
-		f.write(wrapper_properties)
-
-	# Generate settings.gradle
-	settings_gradle_content = dedent(f"""
-    pluginManagement {{
-        repositories {{
-            maven {{
-                url = uri('https://maven.fabricmc.net/')
-                name = 'Fabric'
-            }}
-            gradlePluginPortal()
-            mavenCentral()
-        }}
-    }}
-    rootProject.name = '{mod_config.mod_id}'
-    """).strip()
-
-	# 2. Generate a basic build.gradle
+	writer = ProjectWriter(output_dir, partial=True)
+	_write_lang(writer, mod_config, blocks, items, translations, registration)
+	return writer.finish()
+
+
+class BatchResult:
+	"""Outcome of generating one project in :func:`generate_mod_projects`."""
+
+	def __init__(
+		self, config_script, output_dir, stats=None, error=None, seconds=0.0, log=""
+	):
+		"""Initialize a batch result.
+
+		:param config_script: Path of the config script
+		:param output_dir: Directory the project was generated in
+		:param stats: GenerationStats, or None if generation failed
+		:param error: Error message, or None if generation succeeded
+		:param seconds: Time spent loading the script and generating
+		:param log: Output printed while generating
+		"""
+		self.config_script = config_script
+		self.output_dir = output_dir
+		self.stats = stats
+		self.error = error
+		self.seconds = seconds
+		self.log = log
+
+	@property
+	def ok(self) -> bool:
+		return self.error is None
+
+	def __repr__(self):
+		return (
+			f"BatchResult(config_script={self.config_script}, "
+			f"ok={self.ok}, seconds={self.seconds:.3f})"
+		)
+
+
+def expand_config_scripts(patterns) -> list:
+	"""Expand paths and glob patterns (``**`` included) into config scripts.
+
+	Paths are returned once each, in the order they are first matched.
+
+	:raises FileNotFoundError: If a plain path does not exist
+	"""
+	if isinstance(patterns, str):
+		patterns = [patterns]
+	scripts = []
+	seen = set()
+	for pattern in patterns:
+		if any(char in pattern for char in "*?["):
+			matches = sorted(glob.glob(pattern, recursive=True))
+		elif os.path.isfile(pattern):
+			matches = [pattern]
+		else:
+			raise FileNotFoundError(f"Config script not found: {pattern}")
+		for match in matches:
+			path = os.path.abspath(match)
+			if path not in seen:
+				seen.add(path)
+				scripts.append(path)
+	return scripts
+
+
+def generate_mod_projects(config_scripts, output_root, max_workers=None, **options):
+	"""Generate one mod project per config script on a process pool.
+
+	Each script is executed and its project generated in a worker process,
+	into ``output_root/<script name without .py>``. A failing script (an
+	exception in the script, a missing texture, ...) only fails its own
+	project; the others are still generated.
+
+	:param config_scripts: Paths and/or glob patterns of config scripts
+	:param output_root: Directory that receives one project per script
+	:param max_workers: Number of worker processes (defaults to the CPU count)
+	:param options: Keyword arguments for :func:`generate_mod_project`
+	:return: List of BatchResult, in the order of ``config_scripts``
+	:raises ValueError: If two scripts would share an output directory
+	"""
+	scripts = expand_config_scripts(config_scripts)
+	output_dirs = {}
+	for script in scripts:
+		name = os.path.splitext(os.path.basename(script))[0]
+		if name in output_dirs:
+			raise ValueError(
+				f"Config scripts {output_dirs[name]} and {script} would both be "
+				f"generated into {os.path.join(output_root, name)}"
+			)
+		output_dirs[name] = script
+	jobs = [
+		(script, os.path.join(os.path.abspath(output_root), name))
+		for name, script in output_dirs.items()
+	]
+	if not jobs:
+		return []
+
+	workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+	if workers == 1:
+		return [_generate_from_script(script, out, options) for script, out in jobs]
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		futures = [
+			pool.submit(_generate_from_script, script, out, options)
+			for script, out in jobs
+		]
+		results = []
+		for (script, out), future in zip(jobs, futures):
+			try:
+				results.append(future.result())
+			except Exception as e:
+				# The worker itself died (e.g. the script called os._exit)
+				results.append(BatchResult(script, out, error=f"Worker failed: {e}"))
+		return results
+
+
+def _generate_from_script(config_script, output_dir, options):
+	"""Load and generate one project, capturing its output and any error."""
+	start = time.perf_counter()
+	log = io.StringIO()
+	stats = error = None
+	try:
+		with redirect_stdout(log):
+			mod_config, blocks, items = load_config(config_script)
+			stats = generate_mod_project(
+				mod_config, blocks, items, output_dir, **options
+			)
+	except (Exception, SystemExit) as e:
+		error = str(e) or type(e).__name__
+	return BatchResult(
+		config_script,
+		output_dir,
+		stats,
+		error,
+		time.perf_counter() - start,
+		log.getvalue(),
+	)
+
+
+def _resources_path(*parts):
+	return "/".join(("src", "main", "resources", *parts))
+
+
+def _assets_path(mod_config, *parts):
+	return _resources_path("assets", mod_config.mod_id, *parts)
+
+
+def _main_class_path(mod_config):
+	return f"src/main/java/{mod_config.mod_id}/{mod_config.mod_id.capitalize()}.java"
+
+
+def _registry_resource(mod_config):
+	return f"fabricpy/{mod_config.mod_id}/registry.tsv"
+
+
+def _template_context(mod_config, maven_mirror=None):
+	"""Values available to every template as ``{{ name }}`` placeholders."""
+	min_java, rec_java = mod_config.get_required_java_version()
+	if maven_mirror:
+		mirror = _repository_block(maven_mirror, "    ")
+		plugin_mirror = _repository_block(maven_mirror, "        ")
+	else:
+		mirror = plugin_mirror = ""
+	return {
+		"mod_id": mod_config.mod_id,
+		"mod_name": mod_config.mod_name,
+		"class_name": mod_config.mod_id.capitalize(),
+		"group": mod_config.group,
+		"version": mod_config.version,
+		"description": mod_config.description,
+		"mc_version": mod_config.mc_version,
+		"loom_version": mod_config.get_fabric_loom_version(),
+		"fabric_api_version": mod_config.get_fabric_api_version(),
+		"loader_version": mod_config.FABRIC_LOADER_VERSION,
+		"yarn_version": mod_config.get_yarn_version(),
+		"min_java": min_java,
+		"recommended_java": rec_java,
+		"gradle_version": GRADLE_VERSION,
+		"registry_resource": _registry_resource(mod_config),
+		# Whole lines (or nothing) placed before the other repositories
+		"maven_mirror": mirror,
+		"plugin_maven_mirror": plugin_mirror,
+	}
+
+
+def _repository_block(maven_mirror, indent):
+	"""Gradle ``maven { }`` block listing a local mirror, at ``indent``."""
+	url = pathlib.Path(os.path.abspath(maven_mirror)).as_uri()
+	return (
+		f"{indent}maven {{\n"
+		f'{indent}    url = uri("{url}")\n'
+		f"{indent}    name = 'fabricpyMirror'\n"
+		f"{indent}}}\n"
+	)
+
+
+def _write_project_files(
+	writer, mod_config, templates, context, registration, gradle_profile
+):
+	# Every output that does not depend on the entries
+	with phase("gradle files"):
+		# Gradle wrapper, settings.gradle and build.gradle
+		_write_gradle_files(writer, templates, context)
+		if gradle_profile is not None:
+			_write_gradle_properties(writer, mod_config, gradle_profile)
+
+	with phase("fabric.mod.json"):
+		_write_fabric_mod_json(writer, mod_config)
+
+	with phase("main class"):
+		if registration == "data":
+			# Registers everything from the registry resource
+			_write_registry_main_class(writer, mod_config, templates, context)
+		else:
+			_write_main_class(writer, mod_config, templates, context)
+
+	# Extra files from the user's template directory
+	with phase("extra templates"):
+		_write_extra_templates(writer, templates, context)
+
+
+def _write_gradle_files(writer, templates, context):
+	# Gradle wrapper properties, settings.gradle and a basic build.gradle
+	writer.write_text(
+		"gradle/wrapper/gradle-wrapper.properties",
+		templates.render("gradle-wrapper.properties", context),
+	)
+	writer.write_text("settings.gradle", templates.render("settings.gradle", context))
+	writer.write_text("build.gradle", templates.render("build.gradle", context))
+
+
+def _write_gradle_properties(writer, mod_config, gradle_profile):
+	# Daemon, heap and caches of the chosen profile
+	min_java, _ = mod_config.get_required_java_version()
+	writer.write_text(
+		"gradle.properties",
+		gradle_setup.project_gradle_properties(
+			min_java, mod_config.get_fabric_loom_version(), gradle_profile
+		),
+	)
+
+
+def _write_extra_templates(writer, templates, context):
+	# Files added by a user template directory, at their relative paths
+	for relpath in templates.extra_templates():
+		writer.write_text(relpath, templates.render(relpath, context))
+
+
+def _write_fabric_mod_json(writer, mod_config):
 	min_java, rec_java = mod_config.get_required_java_version()
-	loom_version = mod_config.get_fabric_loom_version()
-
-	build_gradle_content = dedent(f"""
-    plugins {{
-        id 'fabric-loom' version '{loom_version}'
-        id 'java'
-        id 'java-library'
-    }}
-
-    group = '{mod_config.group}'
-    version = '{mod_config.version}'
-
-    repositories {{
-        mavenCentral()
-        maven {{
-            url = uri("https://maven.fabricmc.net/")
-        }}
-        maven {{
-            url = uri("https://api.modrinth.com/maven")  // Additional repository
-        }}
-    }}
-
-    dependencies {{
-        minecraft "com.mojang:minecraft:{mod_config.mc_version}"
-        mappings "net.fabricmc:yarn:{mod_config.mc_version}+build.1:v2"
-        modImplementation "net.fabricmc:fabric-loader:0.16.9"  // Ensure this matches your Fabric Loader version
-        modImplementation "net.fabricmc.fabric-api:fabric-api:{mod_config.get_fabric_api_version()}"
-    }}
-
-    java {{
-        toolchain {{
-            languageVersion = JavaLanguageVersion.of({min_java})
-        }}
-        sourceCompatibility = JavaVersion.VERSION_{min_java}
-        targetCompatibility = JavaVersion.VERSION_{min_java}
-    }}
-
-    tasks.withType(JavaCompile).configureEach {{
-        it.options.encoding = "UTF-8"
-        it.options.release = {min_java}
-    }}
-
-    tasks.withType(Test).configureEach {{
-        useJUnitPlatform()
-        javaLauncher = javaToolchains.launcherFor {{
-            languageVersion = JavaLanguageVersion.of({min_java})
-        }}
-    }}
-
-    tasks.withType(JavaExec).configureEach {{
-        javaLauncher = javaToolchains.launcherFor {{
-            languageVersion = JavaLanguageVersion.of({min_java})
-        }}
-    }}
-    """).strip()
-
-	# Write settings.gradle
-	with open(os.path.join(output_dir, "settings.gradle"), "w", encoding="utf-8") as f:
-		f.write(settings_gradle_content)
-
-	# Write build.gradle
-	with open(os.path.join(output_dir, "build.gradle"), "w", encoding="utf-8") as f:
-		f.write(build_gradle_content)
-
-	# 3. Create fabric.mod.json instead of mods.toml
-	meta_inf_dir = os.path.join(src_main_resources, "META-INF")
-	os.makedirs(meta_inf_dir, exist_ok=True)
 
 	fabric_mod_json = {
 		"schemaVersion": 1,
@@ -150,158 +568,174 @@ def generate_mod_project(mod_config, blocks, items, output_dir):
 		},
 	}
 
-	with open(
-		os.path.join(src_main_resources, "fabric.mod.json"),
-		"w",
-		encoding="utf-8",
-	) as f:
-		import json
+	writer.write_json(_resources_path("fabric.mod.json"), fabric_mod_json, indent=2)
 
-		json.dump(fabric_mod_json, f, indent=2)
 
-	# 4. Create localization file: lang/en_us.json
-	lang_dir = os.path.join(src_main_resources, "assets", mod_config.mod_id, "lang")
-	os.makedirs(lang_dir, exist_ok=True)
+def _write_lang(writer, mod_config, blocks, items, translations, registration):
+	missing = write_lang_files(
+		writer,
+		mod_config,
+		blocks,
+		items,
+		translations,
+		extra_entries=_static_lang_entries(mod_config)
+		if registration == "static"
+		else (),
+	)
+	_report_missing_translations(missing)
 
-	en_us_json_content = {f"item.{mod_config.mod_id}.example_item": "Example Item"}
 
-	with open(
-		os.path.join(lang_dir, "en_us.json"),
-		"w",
-		encoding="utf-8",
-	) as f:
-		import json
+def _report_missing_translations(missing):
+	for locale, keys in sorted(missing.items()):
+		print(
+			f"Warning: {locale} is missing {len(keys)} translation(s), "
+			f"e.g. {keys[0]}; using the readable names instead"
+		)
 
-		json.dump(en_us_json_content, f, indent=4)
 
-	# 5. Create item model JSON with correct texture path
-	models_item_dir = os.path.join(
-		src_main_resources, "assets", mod_config.mod_id, "models", "item"
-	)
-	os.makedirs(models_item_dir, exist_ok=True)
+def _static_lang_entries(mod_config):
+	# The static main class registers a single example item
+	return [(f"item.{mod_config.mod_id}.example_item", "Example Item")]
 
+
+def _write_item_models(writer, mod_config, texture_file, textures):
 	# Create the model JSON with a texture path matching the actual filename
 	example_item_json_content = {
 		"parent": "item/generated",
 		"textures": {
-			# Strip .png extension if present and use the basename
-			"layer0": f"{mod_config.mod_id}:item/{os.path.splitext(os.path.basename(items[0].texture_file))[0]}"
+			# Points at the (possibly shared) texture asset for this item
+			"layer0": textures.reference("item", texture_file)
 		},
 	}
+	writer.write_json(
+		_assets_path(mod_config, "models", "item", "example_item.json"),
+		example_item_json_content,
+		indent=4,
+	)
+
 
-	with open(
-		os.path.join(models_item_dir, "example_item.json"),
-		"w",
-		encoding="utf-8",
-	) as f:
-		json.dump(example_item_json_content, f, indent=4)
-
-	# 6. Generate a main mod class with proper Item initialization
-	java_main_class = dedent(f"""
-    package {mod_config.mod_id};
-
-    import net.fabricmc.api.ModInitializer;
-    import net.minecraft.item.Item;
-    import net.minecraft.item.ItemGroups;
-    import net.minecraft.registry.Registries;
-    import net.minecraft.registry.Registry;
-    import net.minecraft.util.Identifier;
-    import net.fabricmc.fabric.api.itemgroup.v1.ItemGroupEvents;
-
-    public class {mod_config.mod_id.capitalize()} implements ModInitializer {{
-        public static final String MOD_ID = "{mod_config.mod_id}";
-        
-        private static Identifier makeId(String path) {{
-            System.out.println("[" + MOD_ID + "] Creating Identifier: " + MOD_ID + ":" + path);
-            return new Identifier(MOD_ID, path);  // Use constructor directly
-        }}
-
-        // Register item with proper translation key and settings
-        public static final Item EXAMPLE_ITEM = Registry.register(
-            Registries.ITEM,
-            makeId("example_item"),
-            new Item(new Item.Settings().translationKey(MOD_ID + ".example_item"))
-        );
-
-        @Override
-        public void onInitialize() {{
-            System.out.println("[" + MOD_ID + "] Initializing mod...");
-            System.out.println("[" + MOD_ID + "] Item registered as: " + EXAMPLE_ITEM.getTranslationKey());
-            System.out.println("[" + MOD_ID + "] Item identifier: " + Registry.ITEM.getId(EXAMPLE_ITEM));
-            
-            ItemGroupEvents.modifyEntriesEvent(ItemGroups.INGREDIENTS).register(entries -> {{
-                entries.add(EXAMPLE_ITEM);
-                System.out.println("[" + MOD_ID + "] Added " + EXAMPLE_ITEM.toString() + " to ingredients group");
-            }});
-            
-            System.out.println("[" + MOD_ID + "] Initialization complete for {mod_config.mod_name}");
-        }}
-    }}
-    """).strip()
-
-	with open(
-		os.path.join(src_main_java, f"{mod_config.mod_id.capitalize()}.java"),
-		"w",
-		encoding="utf-8",
-	) as f:
-		f.write(java_main_class)
-
-	# 7. Copy textures with correct naming
-	assets_textures_item_dir = os.path.join(
-		src_main_resources,
-		"assets",
-		mod_config.mod_id,
-		"textures",
-		"item",
+def _write_main_class(writer, mod_config, templates, context):
+	writer.write_text(
+		_main_class_path(mod_config), templates.render("Main.java", context)
 	)
-	os.makedirs(assets_textures_item_dir, exist_ok=True)
 
-	for item in items:
-		source_texture = os.path.abspath(item.texture_file)
-		# Use example_item.png as the destination name to match the model reference
-		destination_texture = os.path.join(assets_textures_item_dir, "example_item.png")
-		if os.path.exists(source_texture):
-			try:
-				shutil.copyfile(source_texture, destination_texture)
-				print(f"Copied item texture: {item.texture_file} -> example_item.png")
-			except Exception as e:
-				print(f"Error copying item texture: {e}", file=sys.stderr)
-				sys.exit(1)
-		else:
-			print(f"Error: Texture file not found: {source_texture}", file=sys.stderr)
-			sys.exit(1)
-
-	# Handle block textures similarly if blocks are provided
-	if blocks:
-		assets_textures_block_dir = os.path.join(
-			src_main_resources,
-			"assets",
-			mod_config.mod_id,
-			"textures",
-			"block",
-		)
-		os.makedirs(assets_textures_block_dir, exist_ok=True)
 
-		for block in blocks:
-			source_texture = os.path.abspath(block.texture_file)
-			destination_texture = os.path.join(
-				assets_textures_block_dir, os.path.basename(block.texture_file)
+def _write_entries(
+	writer,
+	mod_config,
+	blocks,
+	items,
+	registration,
+	translations,
+	planner,
+	copier,
+	validator=None,
+	cancel_event=None,
+):
+	"""Stream over the entries once, ``ENTRY_BUFFER`` at a time.
+
+	Plans each buffer's textures and starts copying them, adds the lang
+	entries and, in data mode, writes the registry lines, models and
+	blockstates. ``blocks`` and ``items`` may be one-shot iterators.
+
+	:param validator: ConfigValidator to feed the entries to, if they have
+	                  not been validated up front
+	:param cancel_event: Checked before every buffer of entries
+	:return: ``(lang_writer, first_item_texture)``; the lang writer's
+	         translated locales still have to be written with ``finish()``
+	:raises ValidationError: After the pass, if the validator found problems
+	:raises MissingTexturesError: After the pass, if any texture is missing
+	"""
+	mod_id = mod_config.mod_id
+	data = registration == "data"
+	extra_entries = () if data else _static_lang_entries(mod_config)
+	first_item_texture = None
+	with ExitStack() as stack:
+		lang = stack.enter_context(
+			LangWriter(writer, mod_config, translations, extra_entries)
+		)
+		if data:
+			# One line per entry: kind, id and category, tab-separated
+			registry = stack.enter_context(
+				writer.open_text(_resources_path(_registry_resource(mod_config)))
 			)
-			if os.path.exists(source_texture):
-				try:
-					shutil.copyfile(source_texture, destination_texture)
-					print(f"Copied block texture: {block.texture_file}")
-				except Exception as e:
-					print(
-						f"Error copying block texture '{block.texture_file}': {e}",
-						file=sys.stderr,
-					)
-					sys.exit(1)
-			else:
-				print(
-					f"Error: Block texture file '{source_texture}' does not exist.",
-					file=sys.stderr,
-				)
-				sys.exit(1)
 
-	print(f"Mod project generated in: {output_dir}")
+		for kind, rows in (
+			("item", iter_item_rows(items)),
+			("block", iter_block_rows(blocks)),
+		):
+			for chunk in _chunks(rows, ENTRY_BUFFER):
+				_check_cancelled(cancel_event)
+				if validator is not None:
+					validator.add(kind, chunk)
+				copier.submit(planner.add((kind, row[0], row[2]) for row in chunk))
+				for entry_id, name, texture_file, category in chunk:
+					lang.add(f"{kind}.{mod_id}.{entry_id}", entry_id, name)
+					if kind == "item" and first_item_texture is None:
+						first_item_texture = texture_file
+					if not data:
+						continue
+					registry.write(f"{kind}\t{entry_id}\t{category}\n")
+					if planner.is_missing(texture_file):
+						continue
+					reference = planner.plan.reference(kind, texture_file)
+					if kind == "item":
+						_write_item_model(writer, mod_config, entry_id, reference)
+					else:
+						_write_block_models(writer, mod_config, entry_id, reference)
+		if validator is not None:
+			validator.check()
+		planner.check()
+	return lang, first_item_texture
+
+
+def _write_item_model(writer, mod_config, item_id, reference):
+	writer.write_json(
+		_assets_path(mod_config, "models", "item", f"{item_id}.json"),
+		{"parent": "item/generated", "textures": {"layer0": reference}},
+		indent=4,
+	)
+
+
+def _write_block_models(writer, mod_config, block_id, reference):
+	mod_id = mod_config.mod_id
+	writer.write_json(
+		_assets_path(mod_config, "blockstates", f"{block_id}.json"),
+		{"variants": {"": {"model": f"{mod_id}:block/{block_id}"}}},
+		indent=4,
+	)
+	writer.write_json(
+		_assets_path(mod_config, "models", "block", f"{block_id}.json"),
+		{"parent": "block/cube_all", "textures": {"all": reference}},
+		indent=4,
+	)
+	writer.write_json(
+		_assets_path(mod_config, "models", "item", f"{block_id}.json"),
+		{"parent": f"{mod_id}:block/{block_id}"},
+		indent=4,
+	)
+
+
+def _check_cancelled(cancel_event):
+	if cancel_event is not None and cancel_event.is_set():
+		raise GenerationCancelled("Generation was cancelled")
+
+
+def _is_reiterable(entries):
+	# A list or table can be iterated again; a generator or cursor cannot
+	return entries is None or iter(entries) is not entries
+
+
+def _chunks(iterable, size):
+	iterator = iter(iterable)
+	while True:
+		chunk = list(islice(iterator, size))
+		if not chunk:
+			return
+		yield chunk
+
+
+def _write_registry_main_class(writer, mod_config, templates, context):
+	writer.write_text(
+		_main_class_path(mod_config), templates.render("RegistryMain.java", context)
+	)
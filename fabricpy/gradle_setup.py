@@ -0,0 +1,317 @@
+"""gradle_setup.py
+
+Helpers for preparing the Gradle environment of a generated mod project
+before running it: the Fabric Loom cache, the Gradle wrapper and
+``gradle.properties``.
+
+``gradle.properties`` (:func:`project_gradle_properties`, written by the
+generator and, for a project without one, by ``fabricpy run``) enables
+parallel execution, the local build cache and (with a Loom version that
+supports it) the configuration cache. There are two fixed profiles, so the
+same config always gives the same file:
+
+- ``dev`` (the default): keeps the daemon alive between builds, with a
+  3 GiB heap
+- ``ci``: no daemon (a CI job runs one build), with a 4 GiB heap
+
+Both leave the worker count to Gradle, which uses every core of the machine
+running the build. ``auto`` opts into sizing the file for the machine that
+generates it instead: it picks ``ci`` when the ``CI`` environment variable is
+set (as on GitHub Actions, GitLab CI and most other CI services) and sizes
+the heap and workers from the cores and memory, including the cgroup limits
+of a container.
+
+A cold setup wipes the Loom cache and regenerates everything, which makes the
+next build re-download and remap Minecraft. A warm setup only removes cache
+entries that are actually broken, reuses a wrapper whose version already
+matches, and keeps the Gradle daemon alive between runs.
+"""
+
+import json
+import os
+import shutil
+import zipfile
+
+from fabricpy.compat import parse_version
+from fabricpy.utils import cache_dir
+
+GRADLE_VERSION = "8.10"
+
+LOOM_CACHE_DIR = os.path.expanduser("~/.gradle/caches/fabric-loom")
+
+GRADLE_PROFILES = ("dev", "ci", "auto")
+
+DEFAULT_GRADLE_PROFILE = "dev"
+
+# Oldest Fabric Loom release the configuration cache is enabled for
+CONFIGURATION_CACHE_MIN_LOOM = "1.4"
+
+# Heap used when the host's memory cannot be determined
+DEFAULT_HEAP_MB = 3072
+
+_GIB = 1 << 30
+
+# Per profile: fixed heap (MiB), daemon, and for sizing to a machine: share
+# of the memory, heap bounds (MiB) and spare cores
+_PROFILE_SETTINGS = {
+	"dev": (DEFAULT_HEAP_MB, True, 0.25, 2048, 6144, 1),
+	"ci": (4096, False, 0.5, 2048, 8192, 0),
+}
+
+_ARCHIVE_EXTENSIONS = (".jar", ".zip")
+
+
+def check_loom_cache(loom_cache: str = LOOM_CACHE_DIR) -> list:
+	"""Remove broken entries from the Fabric Loom cache and keep the rest.
+
+	An entry is considered broken if it is empty, if it is a jar/zip without
+	a valid central directory (typically an interrupted download), or if it
+	is a JSON file that does not parse. Leftover ``.lock`` files are kept.
+
+	:param loom_cache: Path of the Loom cache directory
+	:return: Paths of the removed files
+	"""
+	removed = []
+	for root, _, files in os.walk(loom_cache):
+		for filename in files:
+			path = os.path.join(root, filename)
+			if filename.endswith(".lock") or not _is_broken(path):
+				continue
+			try:
+				os.remove(path)
+			except OSError:
+				continue
+			removed.append(path)
+	return removed
+
+
+def wipe_loom_cache(loom_cache: str = LOOM_CACHE_DIR) -> bool:
+	"""Delete the whole Fabric Loom cache. Returns True if it existed."""
+	if not os.path.exists(loom_cache):
+		return False
+	shutil.rmtree(loom_cache)
+	return True
+
+
+def wrapper_version(project_dir: str):
+	"""Return the Gradle version of the project's wrapper, or None if unknown."""
+	properties = os.path.join(
+		project_dir, "gradle", "wrapper", "gradle-wrapper.properties"
+	)
+	try:
+		with open(properties, encoding="utf-8") as f:
+			for line in f:
+				key, _, value = line.partition("=")
+				if key.strip() != "distributionUrl":
+					continue
+				# e.g. https\://services.gradle.org/distributions/gradle-8.10-bin.zip
+				name = value.strip().rsplit("/", 1)[-1]
+				if name.startswith("gradle-"):
+					return name[len("gradle-") :].rsplit("-", 1)[0]
+	except OSError:
+		pass
+	return None
+
+
+def wrapper_is_current(project_dir: str, version: str = GRADLE_VERSION) -> bool:
+	"""Return True if the project has a usable wrapper for ``version``."""
+	return (
+		os.path.isfile(os.path.join(project_dir, "gradlew"))
+		and os.path.isfile(
+			os.path.join(project_dir, "gradle", "wrapper", "gradle-wrapper.jar")
+		)
+		and wrapper_version(project_dir) == version
+	)
+
+
+def resolve_profile(profile: str = "auto") -> str:
+	"""Return ``profile``, with ``auto`` replaced by ``ci`` or ``dev``."""
+	if profile == "auto":
+		return (
+			"ci"
+			if os.environ.get("CI", "").lower() not in ("", "0", "false")
+			else "dev"
+		)
+	if profile not in _PROFILE_SETTINGS:
+		raise ValueError(
+			f"Unknown Gradle profile: {profile}. Supported profiles: {GRADLE_PROFILES}"
+		)
+	return profile
+
+
+def supports_configuration_cache(loom_version: str) -> bool:
+	"""True if the Fabric Loom version works with Gradle's configuration cache."""
+	return parse_version(loom_version) >= parse_version(CONFIGURATION_CACHE_MIN_LOOM)
+
+
+def project_gradle_properties(
+	min_java: int, loom_version: str, profile: str = DEFAULT_GRADLE_PROFILE
+) -> str:
+	"""Return the ``gradle.properties`` content of a generated project.
+
+	The one place both ``compile`` and ``run`` get the file from.
+
+	:param min_java: Java version the project is built with
+	:param loom_version: Fabric Loom version of the project
+	:param profile: "dev", "ci" or "auto" (see :func:`gradle_properties`)
+	"""
+	return gradle_properties(
+		min_java,
+		profile=profile,
+		configuration_cache=supports_configuration_cache(loom_version),
+	)
+
+
+def gradle_properties(
+	min_java: int,
+	daemon: bool = None,
+	profile: str = DEFAULT_GRADLE_PROFILE,
+	configuration_cache: bool = True,
+	cpus: int = None,
+	memory: int = None,
+) -> str:
+	"""Return the ``gradle.properties`` content for a project.
+
+	:param min_java: Java version the project is built with
+	:param daemon: Keep the Gradle daemon alive; defaults to the profile's
+	:param profile: "dev" or "ci" for a fixed file, or "auto" to size it for
+	                this machine (see :func:`resolve_profile`)
+	:param configuration_cache: Enable Gradle's configuration cache
+	:param cpus: Number of cores to size the workers for; with "auto" this
+	             defaults to :func:`host_cpus`, otherwise Gradle decides
+	:param memory: Bytes of memory to size the heap for; with "auto" this
+	               defaults to :func:`host_memory`, otherwise the profile's
+	               fixed heap is used
+	"""
+	if profile == "auto":
+		cpus = cpus or host_cpus()
+		memory = memory if memory is not None else host_memory()
+	fixed_heap, profile_daemon, share, min_heap, max_heap, spare_cores = (
+		_PROFILE_SETTINGS[resolve_profile(profile)]
+	)
+	if daemon is None:
+		daemon = profile_daemon
+	if memory:
+		heap = min(max(int(memory * share) >> 20, min_heap), max_heap)
+		# Never more than three quarters of a small machine; 256 MiB steps
+		heap = max(min(heap, (memory * 3 // 4) >> 20) // 256 * 256, 512)
+	else:
+		heap = fixed_heap
+	lines = [
+		f"org.gradle.jvmargs=-Xmx{heap}m -XX:MaxMetaspaceSize=1g "
+		"-XX:+UseParallelGC -Dfile.encoding=UTF-8",
+		f"org.gradle.daemon={'true' if daemon else 'false'}",
+		"org.gradle.parallel=true",
+	]
+	if cpus:
+		lines.append(f"org.gradle.workers.max={max(cpus - spare_cores, 1)}")
+	lines.append("org.gradle.caching=true")
+	if configuration_cache:
+		lines.append("org.gradle.configuration-cache=true")
+	lines += [
+		"",
+		"# Java configuration",
+		f"java.toolchain.languageVersion={min_java}",
+		"java.toolchain.vendor=ADOPTIUM",
+	]
+	return "\n".join(lines)
+
+
+def host_cpus() -> int:
+	"""Return the cores this process may use, within a cgroup CPU quota."""
+	try:
+		cpus = len(os.sched_getaffinity(0))
+	except (AttributeError, OSError):
+		cpus = os.cpu_count() or 1
+	quota = _read_first_line("/sys/fs/cgroup/cpu.max")
+	if quota:
+		limit, _, period = quota.partition(" ")
+		if limit.isdigit() and period.isdigit() and int(period):
+			cpus = min(cpus, max(-(-int(limit) // int(period)), 1))
+	return cpus
+
+
+def host_memory():
+	"""Return the bytes of memory available, within a cgroup limit, or None."""
+	try:
+		memory = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+	except (AttributeError, ValueError, OSError):
+		memory = None
+	for path in (
+		"/sys/fs/cgroup/memory.max",
+		"/sys/fs/cgroup/memory/memory.limit_in_bytes",
+	):
+		limit = _read_first_line(path)
+		if limit and limit.isdigit():
+			# cgroup v1 reports "no limit" as a huge number
+			memory = min(memory or int(limit), int(limit))
+	return memory
+
+
+def write_gradle_properties(
+	project_dir: str, content: str, replace: bool = True
+) -> bool:
+	"""Write ``gradle.properties`` unless it already has ``content``.
+
+	Leaving an identical file untouched keeps Gradle from treating the build
+	configuration as changed. Returns True if the file was written.
+
+	:param replace: If False, an existing file is kept whatever it contains
+	                (e.g. the one the generator wrote)
+	"""
+	path = os.path.join(project_dir, "gradle.properties")
+	try:
+		with open(path, encoding="utf-8") as f:
+			if not replace or f.read() == content:
+				return False
+	except OSError:
+		pass
+	with open(path, "w", encoding="utf-8") as f:
+		f.write(content)
+	return True
+
+
+def last_cold_setup_seconds(project_dir: str):
+	"""Return how long the last cold setup of ``project_dir`` took, if known."""
+	return _load_setup_times().get(os.path.abspath(project_dir))
+
+
+def record_cold_setup_seconds(project_dir: str, seconds: float):
+	"""Remember how long a cold setup of ``project_dir`` took."""
+	times = _load_setup_times()
+	times[os.path.abspath(project_dir)] = seconds
+	path = os.path.join(cache_dir(), "setup-times.json")
+	tmp_path = f"{path}.{os.getpid()}.tmp"
+	with open(tmp_path, "w", encoding="utf-8") as f:
+		json.dump(times, f, indent=1, sort_keys=True)
+	os.replace(tmp_path, path)
+
+
+def _load_setup_times():
+	try:
+		with open(os.path.join(cache_dir(), "setup-times.json"), encoding="utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def _read_first_line(path):
+	try:
+		with open(path, encoding="ascii") as f:
+			return f.readline().strip()
+	except (OSError, ValueError):
+		return None
+
+
+def _is_broken(path):
+	try:
+		if os.path.getsize(path) == 0:
+			return True
+		if path.endswith(_ARCHIVE_EXTENSIONS):
+			return not zipfile.is_zipfile(path)
+		if path.endswith(".json"):
+			with open(path, encoding="utf-8") as f:
+				json.load(f)
+	except (OSError, ValueError):
+		return True
+	return False
@@ -7,6 +7,8 @@ Defines a representation of an item in Minecraft.
 class Item:
 	"""Represents a custom item to be added to the mod."""
 
+	__slots__ = ("item_id", "name", "texture_file", "category")
+
 	def __init__(
 		self,
 		item_id: str,
@@ -0,0 +1,355 @@
+"""lang.py
+
+Generates the ``assets/<mod_id>/lang/<locale>.json`` files of a mod.
+
+Every item and block gets a translation key (``item.<mod_id>.<id>`` or
+``block.<mod_id>.<id>``). ``en_us`` uses the entries' readable names; other
+locales come from per-locale translation tables. Tables are streamed row by
+row straight into the output file, so memory use depends on the number of
+entries in the config, not on the size of the tables: the translated locales
+share one index of the config's keys, and each one also tracks the keys it
+has written. Independent locales are written in parallel.
+
+Supported table formats, picked by file extension:
+
+- ``.csv`` / ``.tsv``: rows of ``key,value`` (an optional ``key,value``
+  header row is skipped)
+- ``.jsonl``: one ``{"key": ..., "value": ...}`` object or ``[key, value]``
+  pair per line
+- ``.json``: a single flat ``{"key": "value", ...}`` object
+
+A key may be a full translation key or just an item/block ID.
+"""
+
+import csv
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from fabricpy.tables import iter_block_rows, iter_item_rows
+
+DEFAULT_LOCALE = "en_us"
+
+TABLE_EXTENSIONS = (".csv", ".tsv", ".jsonl", ".json")
+
+
+def translation_keys(mod_config, blocks, items):
+	"""Yield ``(translation_key, entry_id, readable_name)`` for every entry."""
+	for item_id, name, _, _ in iter_item_rows(items):
+		yield f"item.{mod_config.mod_id}.{item_id}", item_id, name
+	for block_id, name, _, _ in iter_block_rows(blocks):
+		yield f"block.{mod_config.mod_id}.{block_id}", block_id, name
+
+
+def find_translation_tables(directory: str) -> dict:
+	"""Map each locale to its translation table found in ``directory``.
+
+	Files are matched by name, e.g. ``de_de.csv`` or ``ja_jp.json``.
+	"""
+	tables = {}
+	for filename in sorted(os.listdir(directory)):
+		locale, ext = os.path.splitext(filename)
+		if ext.lower() in TABLE_EXTENSIONS:
+			tables[locale.lower()] = os.path.join(directory, filename)
+	return tables
+
+
+def write_lang_files(
+	writer,
+	mod_config,
+	blocks,
+	items,
+	translations=None,
+	max_workers: int = None,
+	extra_entries=(),
+) -> dict:
+	"""Write one lang file per locale.
+
+	:param writer: ProjectWriter for the output directory
+	:param mod_config: ModConfig instance with mod metadata
+	:param blocks: List of Block instances
+	:param items: List of Item instances
+	:param translations: Locale -> translation table path, or a directory
+	                     containing ``<locale>.<ext>`` tables
+	:param max_workers: Number of locales written concurrently
+	:param extra_entries: Additional ``(key, readable_name)`` pairs written to
+	                      every locale
+	:return: Locale -> list of translation keys missing from its table
+	         (those keys fall back to the entry's readable name)
+	"""
+	with LangWriter(writer, mod_config, translations, extra_entries) as lang:
+		for key, entry_id, name in translation_keys(mod_config, blocks, items):
+			lang.add(key, entry_id, name)
+	return lang.finish(max_workers)
+
+
+class LangWriter:
+	"""Writes the lang files from entries added one at a time.
+
+	``en_us`` is streamed to its file as entries are added (unless it has a
+	translation table of its own). If tables are configured, the entries are
+	also spooled to a temporary file, so adding them takes constant memory.
+	:meth:`finish` reads the spool back once into an index of the keys, which
+	the translated locales, written in parallel, share; that index (and the
+	set of keys each locale has written) does grow with the number of
+	entries.
+
+	Use it as a context manager; :meth:`finish` must be called after the
+	``with`` block to write the other locales.
+	"""
+
+	def __init__(self, writer, mod_config, translations=None, extra_entries=()):
+		"""Initialize the lang writer.
+
+		:param writer: ProjectWriter for the output directory
+		:param mod_config: ModConfig instance with mod metadata
+		:param translations: Locale -> translation table path, or a directory
+		                     containing ``<locale>.<ext>`` tables
+		:param extra_entries: Additional ``(key, readable_name)`` pairs
+		                      written first to every locale
+		"""
+		if isinstance(translations, str):
+			translations = find_translation_tables(translations)
+		self._writer = writer
+		self._mod_id = mod_config.mod_id
+		self._tables = dict(translations or {})
+		self._extra_entries = list(extra_entries)
+		self._stack = None
+		self._default = None
+		self._spool = None
+		self._spool_path = None
+
+	def __enter__(self):
+		self._stack = ExitStack()
+		if DEFAULT_LOCALE not in self._tables:
+			out = self._stack.enter_context(
+				self._writer.open_text(self._relpath(DEFAULT_LOCALE))
+			)
+			self._default = JsonObjectWriter(out)
+		if self._tables:
+			fd, self._spool_path = tempfile.mkstemp(
+				prefix="fabricpy-lang-", suffix=".jsonl"
+			)
+			self._spool = self._stack.enter_context(open(fd, "w", encoding="utf-8"))
+		for key, name in self._extra_entries:
+			self.add(key, None, name)
+		return self
+
+	def add(self, key: str, entry_id, name: str):
+		"""Add a translation key with its entry ID (or None) and readable name."""
+		if self._default is not None:
+			self._default.add(key, name)
+		if self._spool is not None:
+			self._spool.write(json.dumps([key, entry_id, name]))
+			self._spool.write("\n")
+
+	def __exit__(self, exc_type, exc, tb):
+		if exc_type is None and self._default is not None:
+			self._default.close()
+		try:
+			return self._stack.__exit__(exc_type, exc, tb)
+		finally:
+			if exc_type is not None:
+				self._remove_spool()
+
+	def finish(self, max_workers: int = None) -> dict:
+		"""Write the translated locales.
+
+		:param max_workers: Number of locales written concurrently
+		:return: Locale -> list of translation keys missing from its table
+		"""
+		if not self._tables:
+			return {}
+
+		def write_locale(locale):
+			with self._writer.open_text(self._relpath(locale)) as out:
+				return _write_translated(out, wanted, by_id, self._tables[locale])
+
+		locales = sorted(self._tables)
+		workers = max_workers or min(len(locales), os.cpu_count() or 1)
+		try:
+			# One index for all locales; the workers only read it
+			wanted, by_id = _index_entries(self._spooled())
+			with ThreadPoolExecutor(max_workers=workers) as pool:
+				missing = dict(zip(locales, pool.map(write_locale, locales)))
+		finally:
+			self._remove_spool()
+		return {locale: keys for locale, keys in missing.items() if keys}
+
+	def _spooled(self):
+		with open(self._spool_path, encoding="utf-8") as f:
+			for line in f:
+				yield tuple(json.loads(line))
+
+	def _remove_spool(self):
+		if self._spool_path is not None:
+			try:
+				os.remove(self._spool_path)
+			except OSError:
+				pass
+			self._spool_path = None
+
+	def _relpath(self, locale):
+		return "/".join(
+			(
+				"src",
+				"main",
+				"resources",
+				"assets",
+				self._mod_id,
+				"lang",
+				f"{locale}.json",
+			)
+		)
+
+
+def iter_translation_table(path: str):
+	"""Stream ``(key, value)`` pairs from a translation table file."""
+	ext = os.path.splitext(path)[1].lower()
+	if ext in (".csv", ".tsv"):
+		with open(path, encoding="utf-8", newline="") as f:
+			reader = csv.reader(f, delimiter="\t" if ext == ".tsv" else ",")
+			for index, row in enumerate(reader):
+				if len(row) < 2:
+					continue
+				if index == 0 and [c.strip().lower() for c in row[:2]] == [
+					"key",
+					"value",
+				]:
+					continue
+				yield row[0], row[1]
+	elif ext == ".jsonl":
+		with open(path, encoding="utf-8") as f:
+			for line in f:
+				line = line.strip()
+				if not line:
+					continue
+				row = json.loads(line)
+				if isinstance(row, dict):
+					yield row["key"], row["value"]
+				else:
+					yield row[0], row[1]
+	elif ext == ".json":
+		yield from _iter_json_object(path)
+	else:
+		raise ValueError(f"Unsupported translation table format: {path}")
+
+
+def _index_entries(entries):
+	"""Return ``(key -> readable name, entry ID -> key)`` for ``entries``."""
+	wanted = {}
+	by_id = {}
+	for key, entry_id, name in entries:
+		wanted[key] = name
+		if entry_id is not None:
+			by_id[entry_id] = key
+	return wanted, by_id
+
+
+def _write_translated(out, wanted, by_id, table):
+	# Only the config's own keys are held in memory, never the table
+	written = set()
+
+	def rows():
+		for key, value in iter_translation_table(table):
+			key = key if key in wanted else by_id.get(key)
+			if key is not None and key not in written:
+				written.add(key)
+				yield key, str(value)
+		for key, name in wanted.items():
+			if key not in written:
+				yield key, name
+
+	_write_json_object(out, rows())
+	# Extra entries have no ID to translate by, so they are not reported
+	translatable = set(by_id.values())
+	return [key for key in wanted if key not in written and key in translatable]
+
+
+def _write_json_object(out, pairs):
+	"""Stream ``pairs`` as a flat JSON object formatted like ``json.dump(indent=4)``."""
+	json_object = JsonObjectWriter(out)
+	for key, value in pairs:
+		json_object.add(key, value)
+	json_object.close()
+
+
+class JsonObjectWriter:
+	"""Writes a flat JSON object member by member, like ``json.dump(indent=4)``."""
+
+	def __init__(self, out):
+		""":param out: Object with a ``write(str)`` method"""
+		self._out = out
+		self._separator = "{\n    "
+
+	def add(self, key: str, value: str):
+		"""Write one ``"key": "value"`` member."""
+		self._out.write(f"{self._separator}{json.dumps(key)}: {json.dumps(value)}")
+		self._separator = ",\n    "
+
+	def close(self):
+		"""Write the closing brace (``{}`` if no member was added)."""
+		self._out.write("{}" if self._separator.startswith("{") else "\n}")
+
+
+def _iter_json_object(path, chunk_size=1 << 16):
+	"""Stream the members of a flat JSON object without loading the whole file."""
+	decoder = json.JSONDecoder()
+	with open(path, encoding="utf-8") as f:
+		buf = ""
+		pos = 0
+
+		def fill():
+			nonlocal buf, pos
+			chunk = f.read(chunk_size)
+			if not chunk:
+				return False
+			buf = buf[pos:] + chunk
+			pos = 0
+			return True
+
+		def peek():
+			nonlocal pos
+			while True:
+				while pos < len(buf) and buf[pos] in " \t\r\n":
+					pos += 1
+				if pos < len(buf) or not fill():
+					return buf[pos : pos + 1]
+
+		def expect(char):
+			nonlocal pos
+			if peek() != char:
+				raise ValueError(f"Expected '{char}' in {path}")
+			pos += 1
+
+		def decode():
+			nonlocal pos
+			peek()
+			while True:
+				try:
+					value, end = decoder.raw_decode(buf, pos)
+				except ValueError:
+					if fill():
+						continue
+					raise
+				# A number cut at the end of the buffer may continue in the
+				# next chunk, so keep some lookahead before accepting it
+				if len(buf) - end < 64 and fill():
+					continue
+				pos = end
+				return value
+
+		expect("{")
+		if peek() == "}":
+			return
+		while True:
+			key = decode()
+			expect(":")
+			yield key, decode()
+			if peek() == ",":
+				pos += 1
+				continue
+			expect("}")
+			return
@@ -0,0 +1,360 @@
+"""manifest.py
+
+Keeps track of the files a generation run places in the output directory, so
+that regenerating a project only touches outputs whose bytes actually changed.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
+from fabricpy.profiling import phase
+
+MANIFEST_NAME = ".fabricpy-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data: bytes) -> str:
+	"""Return the hex SHA-256 digest of ``data``."""
+	return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+	"""Return the hex SHA-256 digest of the file at ``path``."""
+	digest = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(chunk_size), b""):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+def check_relpath(relpath: str) -> str:
+	"""Return ``relpath`` if it names a file inside the project root.
+
+	:raises ValueError: If it is absolute, has empty, ``.`` or ``..``
+	                    segments, or contains a backslash or a drive colon
+	"""
+	if (
+		not relpath
+		or "\\" in relpath
+		or ":" in relpath
+		or any(part in ("", ".", "..") for part in relpath.split("/"))
+	):
+		raise ValueError(f"Output path escapes the project root: {relpath!r}")
+	return relpath
+
+
+def load_manifest(output_dir: str) -> dict:
+	"""Load the manifest stored in ``output_dir``.
+
+	The result has a ``files`` section (output path -> entry) and a
+	``sources`` section (source path -> ``[size, mtime_ns, sha256]``). Both
+	are empty if there is no manifest or it cannot be read.
+	"""
+	try:
+		with open(os.path.join(output_dir, MANIFEST_NAME), encoding="utf-8") as f:
+			data = json.load(f)
+	except (OSError, ValueError):
+		data = {}
+	if data.get("version") != MANIFEST_VERSION:
+		data = {}
+	return {"files": data.get("files", {}), "sources": data.get("sources", {})}
+
+
+def save_manifest(output_dir: str, files: dict, sources: dict = None):
+	"""Atomically write the manifest sections to ``output_dir``."""
+	path = os.path.join(output_dir, MANIFEST_NAME)
+	tmp_path = f"{path}.tmp"
+	with open(tmp_path, "w", encoding="utf-8") as f:
+		json.dump(
+			{"version": MANIFEST_VERSION, "files": files, "sources": sources or {}},
+			f,
+			indent=1,
+			sort_keys=True,
+		)
+	os.replace(tmp_path, path)
+
+
+class GenerationStats:
+	"""Counts of what a generation run did to the output directory."""
+
+	def __init__(self, written: int = 0, skipped: int = 0, deleted: int = 0):
+		self.written = written
+		self.skipped = skipped
+		self.deleted = deleted
+
+	def __repr__(self):
+		return (
+			f"GenerationStats(written={self.written}, skipped={self.skipped}, "
+			f"deleted={self.deleted})"
+		)
+
+	def __str__(self):
+		return (
+			f"{self.written} written, {self.skipped} unchanged, {self.deleted} deleted"
+		)
+
+
+class ProjectWriter:
+	"""Writes generated files below ``output_dir`` through a content-hash manifest.
+
+	Every output is recorded in the manifest with its SHA-256, size and mtime.
+	A file whose content matches the previous run is left alone, so its mtime
+	(and Gradle's up-to-date checks) are preserved; one that was edited by
+	hand since (its size or mtime differs and its bytes no longer match) is
+	rewritten. Outputs recorded by the
+	previous run but not produced by this one are deleted by :meth:`finish`.
+
+	The writer is safe to use from several threads at once.
+	"""
+
+	def __init__(
+		self,
+		output_dir: str,
+		incremental: bool = True,
+		partial: bool = False,
+		linked: bool = False,
+	):
+		"""Create a writer for ``output_dir``.
+
+		:param output_dir: Root directory of the generated project
+		:param incremental: If False, rewrite every output even if it is
+		                    unchanged (stale outputs are still deleted)
+		:param partial: If True, only some outputs are being refreshed: the
+		                ones written are merged into the existing manifest and
+		                nothing is deleted
+		:param linked: If True, existing outputs may be hardlinks shared with
+		               another directory (see :mod:`fabricpy.staging`), so
+		               they are unlinked before being rewritten instead of
+		               being overwritten in place
+		"""
+		self.output_dir = output_dir
+		self.incremental = incremental
+		self.partial = partial
+		self.linked = linked
+		self.stats = GenerationStats()
+		manifest = load_manifest(output_dir)
+		self._previous = manifest["files"]
+		self._previous_sources = manifest["sources"]
+		self._current = {}
+		self._sources = {}
+		self._created_dirs = set()
+		self._lock = threading.Lock()
+
+	def path(self, relpath: str) -> str:
+		"""Return the absolute path of the output ``relpath`` (``/``-separated).
+
+		:raises ValueError: If ``relpath`` would resolve outside the output
+		                    directory (see :func:`check_relpath`)
+		"""
+		return os.path.join(self.output_dir, *check_relpath(relpath).split("/"))
+
+	def write_bytes(self, relpath: str, data: bytes) -> bool:
+		"""Write ``data`` to ``relpath`` unless it is already up to date.
+
+		:return: True if the file was written
+		"""
+		entry = {"sha256": hash_bytes(data), "size": len(data)}
+		if self._is_current(relpath, entry):
+			self._record(relpath, entry, written=False)
+			return False
+		target = self.path(relpath)
+		self._ensure_parent(target)
+		self._unlink_shared(target)
+		with open(target, "wb") as f:
+			f.write(data)
+		self._record(relpath, entry, written=True)
+		return True
+
+	def write_text(self, relpath: str, text: str) -> bool:
+		"""Write ``text`` encoded as UTF-8 to ``relpath`` if it changed."""
+		return self.write_bytes(relpath, text.encode("utf-8"))
+
+	def write_json(self, relpath: str, obj, indent: int = 2) -> bool:
+		"""Serialize ``obj`` as JSON to ``relpath`` if it changed."""
+		return self.write_text(relpath, json.dumps(obj, indent=indent))
+
+	@contextmanager
+	def open_text(self, relpath: str):
+		"""Stream text into ``relpath`` without holding the whole file in memory.
+
+		The content goes to a temporary file next to the target while being
+		hashed; on exit it replaces the target only if the hash changed.
+		Yields an object with a ``write(str)`` method.
+		"""
+		target = self.path(relpath)
+		self._ensure_parent(target)
+		tmp_target = f"{target}.fabricpy-tmp"
+		stream = _HashingTextFile(open(tmp_target, "wb"))
+		try:
+			yield stream
+		except BaseException:
+			stream.close()
+			os.remove(tmp_target)
+			raise
+		stream.close()
+
+		entry = {"sha256": stream.digest.hexdigest(), "size": stream.size}
+		if self._is_current(relpath, entry):
+			os.remove(tmp_target)
+			self._record(relpath, entry, written=False)
+		else:
+			os.replace(tmp_target, target)
+			self._record(relpath, entry, written=True)
+
+	def copy_file(self, source: str, relpath: str, copier=shutil.copyfile) -> bool:
+		"""Copy the file ``source`` to ``relpath`` unless it is already up to date.
+
+		The source's size and mtime are remembered, so an untouched source is
+		skipped without being read again.
+
+		:param source: Path of the file to copy
+		:param relpath: Destination path relative to the output directory
+		:param copier: Callable ``(source, target)`` doing the actual copy
+		:return: True if the file was copied
+		"""
+		entry = {"sha256": self.source_digest(source), "size": os.stat(source).st_size}
+		if self._is_current(relpath, entry):
+			self._record(relpath, entry, written=False)
+			return False
+		target = self.path(relpath)
+		self._ensure_parent(target)
+		self._unlink_shared(target)
+		copier(source, target)
+		self._record(relpath, entry, written=True)
+		return True
+
+	def source_digest(self, source: str) -> str:
+		"""Return the SHA-256 of the input file ``source``.
+
+		Digests are remembered in the manifest by path, size and mtime, so a
+		source that has not been touched since the previous run is not read.
+		"""
+		source = os.path.abspath(source)
+		st = os.stat(source)
+		cached = self._sources.get(source) or self._previous_sources.get(source)
+		if cached is not None and cached[:2] == [st.st_size, st.st_mtime_ns]:
+			digest = cached[2]
+		else:
+			digest = hash_file(source)
+		with self._lock:
+			self._sources[source] = [st.st_size, st.st_mtime_ns, digest]
+		return digest
+
+	def finish(self) -> GenerationStats:
+		"""Delete stale outputs, save the manifest and return the run's stats."""
+		if self.partial:
+			self._current = {**self._previous, **self._current}
+			self._sources = {**self._previous_sources, **self._sources}
+		for relpath in sorted(set(self._previous) - set(self._current)):
+			try:
+				target = self.path(relpath)
+				os.remove(target)
+			except (FileNotFoundError, ValueError):
+				# Gone already, or an entry no run of ours could have written
+				continue
+			self.stats.deleted += 1
+			self._prune_empty_dirs(os.path.dirname(target))
+
+		if (
+			self._current != self._previous
+			or self._sources != self._previous_sources
+			or not self.incremental
+		):
+			save_manifest(self.output_dir, self._current, self._sources)
+		return self.stats
+
+	def abort(self) -> GenerationStats:
+		"""Save what was written so far after a failed run, deleting nothing.
+
+		Keeps the manifest in line with the files on disk, so the next run
+		does not mistake a file rewritten before the failure for unchanged.
+		"""
+		self.partial = True
+		return self.finish()
+
+	def _is_current(self, relpath, entry):
+		previous = self._previous.get(relpath)
+		if not self.incremental or previous is None:
+			return False
+		if previous.get("sha256") != entry["sha256"]:
+			return False
+		mtime_ns = self._target_mtime(relpath, previous)
+		if mtime_ns is None:
+			return False
+		entry["mtime_ns"] = mtime_ns
+		return True
+
+	def _target_mtime(self, relpath, previous):
+		# The file on disk still holds the previous output: return its mtime
+		target = self.path(relpath)
+		try:
+			st = os.stat(target)
+			if st.st_size != previous["size"]:
+				return None
+			if st.st_mtime_ns == previous.get("mtime_ns"):
+				return st.st_mtime_ns
+			# Touched (or recorded before mtimes were): compare the bytes
+			if hash_file(target) == previous["sha256"]:
+				return st.st_mtime_ns
+		except OSError:
+			pass
+		return None
+
+	def _record(self, relpath, entry, written):
+		if written:
+			entry["mtime_ns"] = os.stat(self.path(relpath)).st_mtime_ns
+		with self._lock:
+			self._current[relpath] = entry
+			if written:
+				self.stats.written += 1
+			else:
+				self.stats.skipped += 1
+
+	def _ensure_parent(self, target):
+		parent = os.path.dirname(target)
+		if parent in self._created_dirs:
+			return
+		with phase("mkdir"):
+			os.makedirs(parent, exist_ok=True)
+		with self._lock:
+			self._created_dirs.add(parent)
+
+	def _unlink_shared(self, target):
+		if self.linked:
+			try:
+				os.unlink(target)
+			except FileNotFoundError:
+				pass
+
+	def _prune_empty_dirs(self, directory):
+		root = os.path.abspath(self.output_dir)
+		directory = os.path.abspath(directory)
+		while directory != root and directory.startswith(root):
+			try:
+				os.rmdir(directory)
+			except OSError:
+				break
+			self._created_dirs.discard(directory)
+			directory = os.path.dirname(directory)
+
+
+class _HashingTextFile:
+	"""Binary file wrapper that encodes text as UTF-8 and hashes what it writes."""
+
+	def __init__(self, f):
+		self._f = f
+		self.digest = hashlib.sha256()
+		self.size = 0
+
+	def write(self, text: str):
+		data = text.encode("utf-8")
+		self.digest.update(data)
+		self.size += len(data)
+		self._f.write(data)
+
+	def close(self):
+		self._f.close()
@@ -0,0 +1,533 @@
+"""mirror.py
+
+A local, file-based Maven repository with the Fabric dependencies of
+generated projects, so their builds do not resolve them over the network.
+
+:meth:`MavenMirror.add_versions` fills the mirror for the selected Minecraft
+versions: the Fabric Loom plugin (and its plugin marker), Fabric Loader, Yarn
+and Fabric API entries of the compatibility index, plus everything they
+depend on. Each module is taken from the Gradle cache if it is there
+(hardlinked when possible) and downloaded from the Fabric, Maven Central or
+Gradle plugin repositories otherwise. Dependencies are read from a module's
+Gradle metadata (``.module``) or, without one, from its POM, including
+parent POMs, properties and ``dependencyManagement``. Modules are processed
+on a thread pool as they are discovered.
+
+:meth:`MavenMirror.import_gradle_cache` copies every module of the Gradle
+cache instead, e.g. after a build, to also capture the Minecraft libraries
+Loom resolves. Together with a populated Loom cache (which holds Minecraft
+itself) and ``gradle --offline``, this allows builds with no network at all.
+
+Generate a project with ``maven_mirror=directory`` (``--maven-mirror``) to
+list the mirror first in the repositories of ``build.gradle`` and
+``settings.gradle``.
+
+Files are written under a temporary name and renamed into place, so a build
+reading the mirror while it is being filled never sees a partial file.
+"""
+
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from fabricpy.compat import get_index
+from fabricpy.mod_config import ModConfig
+from fabricpy.textures import link_or_copy
+
+FABRIC_MAVEN = "https://maven.fabricmc.net/"
+MAVEN_CENTRAL = "https://repo.maven.apache.org/maven2/"
+GRADLE_PLUGIN_PORTAL = "https://plugins.gradle.org/m2/"
+
+# Searched in this order for modules missing from the Gradle cache
+REMOTE_REPOSITORIES = (FABRIC_MAVEN, MAVEN_CENTRAL, GRADLE_PLUGIN_PORTAL)
+
+DEFAULT_MAX_WORKERS = 8
+
+DOWNLOAD_TIMEOUT = 60
+
+# Dependency scopes a build needs
+_SCOPES = ("", "compile", "runtime")
+
+_POM_NS = "{http://maven.apache.org/POM/4.0.0}"
+
+
+def gradle_cache_dir() -> str:
+	"""Return the module cache of ``$GRADLE_USER_HOME`` (``~/.gradle``)."""
+	home = os.environ.get("GRADLE_USER_HOME") or os.path.expanduser("~/.gradle")
+	return os.path.join(home, "caches", "modules-2", "files-2.1")
+
+
+def fabric_coordinates(mc_version: str) -> list:
+	"""Return the ``group:artifact:version[:classifier]`` roots of a version.
+
+	:param mc_version: Minecraft version from the compatibility index
+	"""
+	info = get_index()[mc_version]
+	yarn = f"{mc_version}+build.{ModConfig.YARN_BUILD}"
+	return [
+		f"fabric-loom:fabric-loom.gradle.plugin:{info.loom}",
+		f"net.fabricmc:fabric-loom:{info.loom}",
+		f"net.fabricmc:fabric-loader:{ModConfig.FABRIC_LOADER_VERSION}",
+		f"net.fabricmc:yarn:{yarn}:v2",
+		f"net.fabricmc.fabric-api:fabric-api:{info.fabric_api}",
+	]
+
+
+class MirrorReport:
+	"""What filling a mirror did."""
+
+	def __init__(self):
+		self.modules = 0
+		self.linked = 0
+		self.downloaded = 0
+		self.present = 0
+		# Modules found nowhere, and dependencies without a usable version
+		self.missing = []
+		self.unresolved = []
+
+	def __repr__(self):
+		return (
+			f"{self.modules} modules: {self.linked} files from the Gradle cache, "
+			f"{self.downloaded} downloaded, {self.present} already present, "
+			f"{len(self.missing)} modules missing, "
+			f"{len(self.unresolved)} dependencies unresolved"
+		)
+
+
+class MavenMirror:
+	"""A Maven repository directory filled from the Gradle cache or remotely."""
+
+	def __init__(
+		self,
+		directory: str,
+		gradle_cache: str = None,
+		repositories=REMOTE_REPOSITORIES,
+		offline: bool = False,
+		max_workers: int = DEFAULT_MAX_WORKERS,
+	):
+		"""Open (and create) a mirror directory.
+
+		:param directory: Root of the Maven repository
+		:param gradle_cache: Gradle module cache to import from (defaults to
+		                     :func:`gradle_cache_dir`)
+		:param repositories: Remote repository URLs, searched in order
+		:param offline: If True, never download; modules not in the Gradle
+		                cache are reported as missing
+		:param max_workers: Number of modules processed at once
+		"""
+		self.directory = os.path.abspath(directory)
+		self.gradle_cache = gradle_cache or gradle_cache_dir()
+		self.repositories = tuple(repositories)
+		self.offline = offline
+		self.max_workers = max_workers
+		self._poms = {}
+		self._lock = threading.Lock()
+		os.makedirs(self.directory, exist_ok=True)
+
+	def add_versions(self, mc_versions) -> MirrorReport:
+		"""Mirror the Fabric dependencies of some Minecraft versions."""
+		coordinates = []
+		for mc_version in mc_versions:
+			coordinates.extend(fabric_coordinates(mc_version))
+		return self.add(coordinates)
+
+	def add(self, coordinates) -> MirrorReport:
+		"""Mirror modules and, transitively, their dependencies.
+
+		:param coordinates: ``group:artifact:version[:classifier]`` strings
+		:return: MirrorReport
+		"""
+		report = MirrorReport()
+		classifiers = {}
+		for coordinate in coordinates:
+			group, artifact, version, *classifier = coordinate.split(":")
+			classifiers.setdefault((group, artifact, version), set()).update(classifier)
+		seen = set(classifiers)
+		with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+			pending = {
+				pool.submit(self._add_module, module, classifiers[module], report)
+				for module in classifiers
+			}
+			while pending:
+				done, pending = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					for module in future.result():
+						if module not in seen:
+							seen.add(module)
+							pending.add(
+								pool.submit(self._add_module, module, (), report)
+							)
+		report.missing.sort()
+		report.unresolved.sort()
+		return report
+
+	def import_gradle_cache(self, groups=None) -> MirrorReport:
+		"""Copy every module of the Gradle cache into the mirror.
+
+		:param groups: Only import these groups and their subgroups
+		               (e.g. ``["net.fabricmc"]``); all if None
+		"""
+		report = MirrorReport()
+		for group in _listdir(self.gradle_cache):
+			if groups and not any(
+				group == prefix or group.startswith(f"{prefix}.") for prefix in groups
+			):
+				continue
+			for artifact in _listdir(os.path.join(self.gradle_cache, group)):
+				path = os.path.join(self.gradle_cache, group, artifact)
+				for version in _listdir(path):
+					report.modules += 1
+					files = self._cached_files(group, artifact, version)
+					for name, source in files.items():
+						self._place(group, artifact, version, name, source, report)
+		return report
+
+	def module_dir(self, group: str, artifact: str, version: str) -> str:
+		"""Return the directory of a module in the mirror."""
+		return os.path.join(self.directory, *group.split("."), artifact, version)
+
+	def _add_module(self, module, classifiers, report):
+		"""Mirror one module and return the modules it depends on."""
+		group, artifact, version = module
+		with self._lock:
+			report.modules += 1
+		cached = self._cached_files(group, artifact, version)
+		if cached:
+			for name, source in cached.items():
+				self._place(group, artifact, version, name, source, report)
+		metadata = self._metadata(module, remote=not cached and not self.offline)
+		if metadata is None:
+			with self._lock:
+				report.missing.append(":".join(module))
+			return []
+		if not cached and not self.offline:
+			# Gradle reads the POM first, also for modules with .module metadata
+			names = {f"{artifact}-{version}.pom", *metadata["files"]}
+			names.update(f"{artifact}-{version}-{c}.jar" for c in classifiers)
+			for name in sorted(names):
+				self._download(module, name, metadata["repository"], report)
+		with self._lock:
+			report.unresolved.extend(metadata["unresolved"])
+		return metadata["dependencies"]
+
+	def _metadata(self, module, remote):
+		"""Parse the dependencies of a module, fetching its metadata if needed.
+
+		:param remote: If True, metadata not in the mirror is downloaded
+		:return: dict with ``dependencies``, ``unresolved``, ``files`` (names
+		         of the artifact files to download) and ``repository``, or
+		         None if the module has no metadata anywhere
+		"""
+		group, artifact, version = module
+		base = f"{artifact}-{version}"
+		repository = None
+		text = self._read(module, f"{base}.module")
+		if text is None and remote:
+			repository = self._find_repository(module, f"{base}.module")
+			if repository is not None:
+				text = self._read(module, f"{base}.module")
+		if text is not None:
+			try:
+				return dict(_parse_module(text), repository=repository)
+			except ValueError:
+				pass
+		pom = self._effective_pom(module, remote)
+		if pom is None:
+			return None
+		files = []
+		if pom["packaging"] != "pom":
+			files.append(f"{base}.jar")
+		return {
+			"dependencies": pom["dependencies"],
+			"unresolved": pom["unresolved"],
+			"files": files,
+			"repository": pom["repository"],
+		}
+
+	def _effective_pom(self, module, remote, depth=0):
+		"""Parse a POM with its parents; cached per module."""
+		if module in self._poms:
+			return self._poms[module]
+		group, artifact, version = module
+		name = f"{artifact}-{version}.pom"
+		repository = None
+		text = self._read(module, name)
+		if text is None and remote:
+			repository = self._find_repository(module, name)
+			if repository is not None:
+				text = self._read(module, name)
+		if text is None or depth > 20:
+			return None
+		try:
+			pom = _parse_pom(text)
+		except ET.ParseError:
+			return None
+		properties = {}
+		managed = {}
+		if pom["parent"] is not None:
+			parent = self._effective_pom(pom["parent"], remote, depth + 1)
+			if parent is not None:
+				properties.update(parent["properties"])
+				managed.update(parent["managed"])
+		properties.update(pom["properties"])
+		properties.update(
+			{
+				"project.groupId": group,
+				"project.artifactId": artifact,
+				"project.version": version,
+				"pom.groupId": group,
+				"pom.version": version,
+				"groupId": group,
+				"version": version,
+			}
+		)
+		if pom["parent"] is not None:
+			properties["project.parent.groupId"] = pom["parent"][0]
+			properties["project.parent.version"] = pom["parent"][2]
+		for key, raw in pom["managed"].items():
+			managed[_substitute(key, properties)] = raw
+		dependencies = []
+		if pom["parent"] is not None:
+			dependencies.append(pom["parent"])
+		for key, raw in pom["imports"]:
+			bom = (*_substitute(key, properties), _substitute(raw, properties))
+			if not _is_fixed(bom[2]):
+				continue
+			dependencies.append(bom)
+			imported = self._effective_pom(bom, remote, depth + 1)
+			if imported is not None:
+				for managed_key, managed_version in imported["managed"].items():
+					managed.setdefault(managed_key, managed_version)
+		unresolved = []
+		for (dep_group, dep_artifact), raw in pom["dependencies"]:
+			dep_group = _substitute(dep_group, properties)
+			dep_artifact = _substitute(dep_artifact, properties)
+			if raw is None:
+				raw = managed.get((dep_group, dep_artifact))
+			dep_version = _substitute(raw, properties) if raw else None
+			if not _is_fixed(dep_version):
+				unresolved.append(f"{dep_group}:{dep_artifact}:{dep_version or '?'}")
+				continue
+			dependencies.append((dep_group, dep_artifact, dep_version))
+		result = {
+			"packaging": _substitute(pom["packaging"], properties),
+			"properties": properties,
+			"managed": {
+				key: _substitute(raw, properties) for key, raw in managed.items()
+			},
+			"dependencies": dependencies,
+			"unresolved": unresolved,
+			"repository": repository,
+		}
+		with self._lock:
+			self._poms[module] = result
+		return result
+
+	def _read(self, module, name):
+		"""Return the text of a metadata file from the mirror or Gradle cache."""
+		path = os.path.join(self.module_dir(*module), name)
+		if not os.path.isfile(path):
+			path = self._cached_files(*module).get(name)
+		if path is None:
+			return None
+		try:
+			with open(path, encoding="utf-8") as f:
+				return f.read()
+		except (OSError, UnicodeDecodeError):
+			return None
+
+	def _find_repository(self, module, name):
+		"""Download ``name`` from the first repository that has it."""
+		for repository in self.repositories:
+			if self._download(module, name, repository, None):
+				return repository
+		return None
+
+	def _download(self, module, name, repository, report) -> bool:
+		"""Download one file of a module into the mirror. False if not found."""
+		target = os.path.join(self.module_dir(*module), name)
+		if os.path.isfile(target):
+			self._count(report, "present")
+			return True
+		if repository is None:
+			repositories = self.repositories
+		else:
+			repositories = (repository,)
+		group, artifact, version = module
+		relpath = "/".join([*group.split("."), artifact, version, name])
+		for base in repositories:
+			try:
+				with urllib.request.urlopen(
+					base + relpath, timeout=DOWNLOAD_TIMEOUT
+				) as response:
+					data = response.read()
+			except (urllib.error.URLError, OSError):
+				# Not in this repository, or unreachable: try the next one
+				continue
+			_write_atomic(target, data)
+			self._count(report, "downloaded")
+			return True
+		return False
+
+	def _cached_files(self, group, artifact, version):
+		"""Return file name -> path of a module's files in the Gradle cache."""
+		path = os.path.join(self.gradle_cache, group, artifact, version)
+		files = {}
+		for digest in _listdir(path):
+			for name in _listdir(os.path.join(path, digest)):
+				files.setdefault(name, os.path.join(path, digest, name))
+		return files
+
+	def _place(self, group, artifact, version, name, source, report):
+		"""Link or copy a file from the Gradle cache into the mirror."""
+		target_dir = self.module_dir(group, artifact, version)
+		target = os.path.join(target_dir, name)
+		if os.path.isfile(target):
+			self._count(report, "present")
+			return
+		os.makedirs(target_dir, exist_ok=True)
+		tmp = f"{target}.{threading.get_ident()}.tmp"
+		link_or_copy(source, tmp)
+		os.replace(tmp, target)
+		self._count(report, "linked")
+
+	def _count(self, report, field):
+		# Metadata fetched while looking for a repository is not counted
+		if report is not None:
+			with self._lock:
+				setattr(report, field, getattr(report, field) + 1)
+
+	def __repr__(self):
+		return f"MavenMirror({self.directory!r})"
+
+
+def _parse_module(text):
+	"""Read dependencies and files from Gradle module metadata."""
+	data = json.loads(text)
+	if not isinstance(data, dict) or "variants" not in data:
+		raise ValueError("not Gradle module metadata")
+	dependencies = []
+	unresolved = []
+	files = []
+	for variant in data["variants"]:
+		available = variant.get("available-at")
+		if available:
+			dependencies.append(
+				(available["group"], available["module"], available["version"])
+			)
+		for dependency in variant.get("dependencies", ()):
+			version = dependency.get("version", {})
+			version = (
+				version.get("strictly")
+				or version.get("requires")
+				or version.get("prefers")
+			)
+			coordinate = (dependency["group"], dependency["module"], version)
+			if _is_fixed(version):
+				dependencies.append(coordinate)
+			else:
+				unresolved.append(":".join(str(part) for part in coordinate))
+		for file in variant.get("files", ()):
+			if file["url"] not in files:
+				files.append(file["url"])
+	return {
+		"dependencies": list(dict.fromkeys(dependencies)),
+		"unresolved": unresolved,
+		"files": files,
+	}
+
+
+def _parse_pom(text):
+	"""Read the raw (unsubstituted) fields of a POM that matter here."""
+	root = ET.fromstring(text)
+	ns = _POM_NS if root.tag.startswith(_POM_NS) else ""
+
+	def child(element, name):
+		found = element.find(f"{ns}{name}")
+		return found.text.strip() if found is not None and found.text else None
+
+	parent = root.find(f"{ns}parent")
+	if parent is not None:
+		parent = (
+			child(parent, "groupId"),
+			child(parent, "artifactId"),
+			child(parent, "version"),
+		)
+		if not all(parent):
+			parent = None
+	properties = {}
+	element = root.find(f"{ns}properties")
+	if element is not None:
+		for prop in element:
+			properties[prop.tag[len(ns) :]] = (prop.text or "").strip()
+	managed = {}
+	imports = []
+	element = root.find(f"{ns}dependencyManagement/{ns}dependencies")
+	for dependency in element if element is not None else ():
+		key = (child(dependency, "groupId"), child(dependency, "artifactId"))
+		if child(dependency, "scope") == "import":
+			imports.append((key, child(dependency, "version")))
+		else:
+			managed[key] = child(dependency, "version")
+	dependencies = []
+	element = root.find(f"{ns}dependencies")
+	for dependency in element if element is not None else ():
+		if (child(dependency, "scope") or "") not in _SCOPES:
+			continue
+		if child(dependency, "optional") == "true":
+			continue
+		key = (child(dependency, "groupId"), child(dependency, "artifactId"))
+		if all(key):
+			dependencies.append((key, child(dependency, "version")))
+	return {
+		"parent": parent,
+		"packaging": child(root, "packaging") or "jar",
+		"properties": properties,
+		"managed": managed,
+		"imports": imports,
+		"dependencies": dependencies,
+	}
+
+
+def _substitute(value, properties):
+	"""Replace ``${name}`` references (recursively) in a string or tuple."""
+	if isinstance(value, tuple):
+		return tuple(_substitute(part, properties) for part in value)
+	for _ in range(10):
+		if not value or "${" not in value:
+			break
+		start = value.index("${")
+		end = value.find("}", start)
+		if end < 0:
+			break
+		name = value[start + 2 : end]
+		if name not in properties:
+			break
+		value = value[:start] + properties[name] + value[end + 1 :]
+	return value
+
+
+def _is_fixed(version):
+	"""True for a plain version (no range, property or LATEST/RELEASE)."""
+	return bool(version) and not (
+		version[0] in "[(" or "${" in version or version in ("LATEST", "RELEASE")
+	)
+
+
+def _listdir(path):
+	try:
+		return sorted(os.listdir(path))
+	except OSError:
+		return []
+
+
+def _write_atomic(path, data):
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	tmp = f"{path}.{threading.get_ident()}.tmp"
+	with open(tmp, "wb") as f:
+		f.write(data)
+	os.replace(tmp, path)
@@ -0,0 +1,225 @@
+"""pngopt.py
+
+A small, dependency-free lossless PNG optimizer.
+
+The optimizer never changes pixels: it drops textual and timestamp metadata,
+tries a few scanline filter strategies and recompresses the image data at the
+highest zlib level, keeping the smallest result. Optimized files are cached on
+disk by the SHA-256 of their input, so each distinct texture is only optimized
+once per machine.
+"""
+
+import os
+import struct
+import threading
+import zlib
+
+from fabricpy.utils import cache_dir
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Ancillary chunks that carry no rendering information
+_STRIPPED_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"tIME"}
+
+# Samples per pixel for each PNG color type
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def optimize_png(data: bytes) -> bytes:
+	"""Losslessly shrink a PNG image.
+
+	:param data: Bytes of a PNG file
+	:return: The optimized PNG, or ``data`` itself if it could not be made
+	         smaller (or is not a PNG this optimizer understands)
+	"""
+	try:
+		chunks = _read_chunks(data)
+	except ValueError:
+		return data
+
+	ihdr = next((body for kind, body in chunks if kind == b"IHDR"), None)
+	if ihdr is None:
+		return data
+	idat = b"".join(body for kind, body in chunks if kind == b"IDAT")
+	try:
+		raw = zlib.decompress(idat)
+	except zlib.error:
+		return data
+
+	try:
+		candidates = [raw, *_refilter_candidates(ihdr, raw)]
+	except ValueError:
+		return data
+	compressed = min((_deflate(candidate) for candidate in candidates), key=len)
+
+	out = [PNG_SIGNATURE]
+	wrote_idat = False
+	for kind, body in chunks:
+		if kind in _STRIPPED_CHUNKS:
+			continue
+		if kind == b"IDAT":
+			if not wrote_idat:
+				out.append(_chunk(b"IDAT", compressed))
+				wrote_idat = True
+			continue
+		out.append(_chunk(kind, body))
+	result = b"".join(out)
+	return result if len(result) < len(data) else data
+
+
+def optimized_texture(source: str, digest: str) -> str:
+	"""Return the path of an optimized copy of the PNG ``source``.
+
+	The result is cached under ``png/`` in fabricpy's cache directory, keyed
+	by ``digest`` (the SHA-256 of ``source``). If optimizing does not make
+	the file smaller, ``source`` itself is returned.
+	"""
+	directory = cache_dir("png", digest[:2])
+	optimized = os.path.join(directory, f"{digest}.png")
+	unchanged_marker = os.path.join(directory, f"{digest}.keep")
+	if os.path.exists(optimized):
+		return optimized
+	if os.path.exists(unchanged_marker):
+		return source
+
+	with open(source, "rb") as f:
+		data = f.read()
+	result = optimize_png(data)
+	if result is data:
+		target, result = unchanged_marker, b""
+	else:
+		target = optimized
+	# Unique per thread: two sources with the same bytes can be optimized at once
+	tmp_target = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+	with open(tmp_target, "wb") as f:
+		f.write(result)
+	os.replace(tmp_target, target)
+	return optimized if target == optimized else source
+
+
+def _read_chunks(data):
+	if not data.startswith(PNG_SIGNATURE):
+		raise ValueError("Not a PNG file")
+	chunks = []
+	offset = len(PNG_SIGNATURE)
+	while offset < len(data):
+		if offset + 8 > len(data):
+			raise ValueError("Truncated PNG chunk header")
+		length, kind = struct.unpack(">I4s", data[offset : offset + 8])
+		body = data[offset + 8 : offset + 8 + length]
+		if len(body) != length:
+			raise ValueError("Truncated PNG chunk")
+		chunks.append((kind, body))
+		offset += 12 + length
+		if kind == b"IEND":
+			break
+	return chunks
+
+
+def _chunk(kind, body):
+	crc = zlib.crc32(kind + body) & 0xFFFFFFFF
+	return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", crc)
+
+
+def _deflate(raw):
+	best = None
+	for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED):
+		compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+		result = compressor.compress(raw) + compressor.flush()
+		if best is None or len(result) < len(best):
+			best = result
+	return best
+
+
+def _refilter_candidates(ihdr, raw):
+	"""Return the image data re-filtered with "none" and adaptive filtering.
+
+	Only non-interlaced images with 8 or 16 bits per sample are handled;
+	for anything else an empty list is returned.
+	"""
+	width, height, bit_depth, color_type, _, _, interlace = struct.unpack(
+		">IIBBBBB", ihdr
+	)
+	if interlace or bit_depth not in (8, 16) or color_type not in _CHANNELS:
+		return []
+	bpp = _CHANNELS[color_type] * bit_depth // 8
+	stride = width * bpp
+	if len(raw) != height * (stride + 1):
+		return []
+
+	rows = _unfilter(raw, height, stride, bpp)
+	unfiltered = bytearray()
+	adaptive = bytearray()
+	previous = bytes(stride)
+	for row in rows:
+		unfiltered.append(0)
+		unfiltered += row
+		best_type, best_row, best_score = 0, row, None
+		for filter_type in range(5):
+			filtered = _filter_row(filter_type, row, previous, bpp)
+			score = sum(b if b < 128 else 256 - b for b in filtered)
+			if best_score is None or score < best_score:
+				best_type, best_row, best_score = filter_type, filtered, score
+		adaptive.append(best_type)
+		adaptive += best_row
+		previous = row
+	return [bytes(unfiltered), bytes(adaptive)]
+
+
+def _unfilter(raw, height, stride, bpp):
+	rows = []
+	previous = bytearray(stride)
+	offset = 0
+	for _ in range(height):
+		filter_type = raw[offset]
+		row = bytearray(raw[offset + 1 : offset + 1 + stride])
+		offset += stride + 1
+		if filter_type == 1:
+			for i in range(bpp, stride):
+				row[i] = (row[i] + row[i - bpp]) & 0xFF
+		elif filter_type == 2:
+			for i in range(stride):
+				row[i] = (row[i] + previous[i]) & 0xFF
+		elif filter_type == 3:
+			for i in range(stride):
+				left = row[i - bpp] if i >= bpp else 0
+				row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+		elif filter_type == 4:
+			for i in range(stride):
+				left = row[i - bpp] if i >= bpp else 0
+				up_left = previous[i - bpp] if i >= bpp else 0
+				row[i] = (row[i] + _paeth(left, previous[i], up_left)) & 0xFF
+		elif filter_type != 0:
+			raise ValueError(f"Invalid PNG filter type {filter_type}")
+		rows.append(bytes(row))
+		previous = row
+	return rows
+
+
+def _filter_row(filter_type, row, previous, bpp):
+	if filter_type == 0:
+		return row
+	out = bytearray(len(row))
+	for i, value in enumerate(row):
+		left = row[i - bpp] if i >= bpp else 0
+		up = previous[i]
+		if filter_type == 1:
+			predictor = left
+		elif filter_type == 2:
+			predictor = up
+		elif filter_type == 3:
+			predictor = (left + up) >> 1
+		else:
+			predictor = _paeth(left, up, previous[i - bpp] if i >= bpp else 0)
+		out[i] = (value - predictor) & 0xFF
+	return bytes(out)
+
+
+def _paeth(a, b, c):
+	p = a + b - c
+	pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+	if pa <= pb and pa <= pc:
+		return a
+	if pb <= pc:
+		return b
+	return c
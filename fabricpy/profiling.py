@@ -0,0 +1,189 @@
+"""profiling.py
+
+Optional per-phase timing of a compile or run.
+
+Code marks its phases with :func:`phase`::
+
+    with phase("copy textures"):
+        ...
+
+When no profiler is active, :func:`phase` returns a shared no-op context
+manager, so the hooks cost one global lookup. While a :class:`Profiler` is
+active, every phase is recorded with its start time, duration and thread,
+and can be saved as a Chrome trace-event file (open it in ``chrome://tracing``
+or https://ui.perfetto.dev) or printed as a summary table::
+
+    with profile("trace.json") as profiler:
+        generate_mod_project(mod_config, blocks, items, "build_mod")
+    print(profiler.summary())
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_active = None
+
+
+class _NullPhase:
+	"""Context manager used for phases while profiling is off."""
+
+	__slots__ = ()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+	"""Context manager timing one phase for a profiler."""
+
+	__slots__ = ("_profiler", "_name", "_args", "_start")
+
+	def __init__(self, profiler, name, args):
+		self._profiler = profiler
+		self._name = name
+		self._args = args
+
+	def __enter__(self):
+		self._start = time.perf_counter_ns()
+		return self
+
+	def __exit__(self, *exc_info):
+		end = time.perf_counter_ns()
+		self._profiler.record(self._name, self._start, end - self._start, self._args)
+		return False
+
+
+class Profiler:
+	"""Collects the timed phases of a run."""
+
+	def __init__(self):
+		self.events = []
+		self.start_ns = time.perf_counter_ns()
+		self.end_ns = None
+		self._lock = threading.Lock()
+
+	def record(self, name: str, start_ns: int, duration_ns: int, args: dict = None):
+		"""Record a phase that started at ``start_ns`` (``perf_counter_ns``)."""
+		event = (name, start_ns, duration_ns, threading.get_ident(), args)
+		with self._lock:
+			self.events.append(event)
+
+	def stop(self):
+		"""Mark the end of the profiled run."""
+		if self.end_ns is None:
+			self.end_ns = time.perf_counter_ns()
+
+	@property
+	def wall_ns(self) -> int:
+		"""Nanoseconds from the profiler's start to its end (or now)."""
+		return (self.end_ns or time.perf_counter_ns()) - self.start_ns
+
+	def chrome_trace(self) -> dict:
+		"""Return the recorded phases in Chrome's trace-event format."""
+		pid = os.getpid()
+		events = []
+		for name, start_ns, duration_ns, tid, args in self.events:
+			event = {
+				"name": name,
+				"ph": "X",
+				"ts": (start_ns - self.start_ns) / 1000,
+				"dur": duration_ns / 1000,
+				"pid": pid,
+				"tid": tid,
+			}
+			if args:
+				event["args"] = args
+			events.append(event)
+		events.sort(key=lambda event: event["ts"])
+		return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+	def write_trace(self, path: str):
+		"""Write the Chrome trace-event JSON file ``path``."""
+		with open(path, "w", encoding="utf-8") as f:
+			json.dump(self.chrome_trace(), f)
+
+	def summary(self) -> str:
+		"""Return a table of the phases, slowest total first.
+
+		Times are inclusive: a phase's time includes the phases nested in it.
+		"""
+		totals = {}
+		for name, _, duration_ns, _, _ in self.events:
+			count, total, longest = totals.get(name, (0, 0, 0))
+			totals[name] = (count + 1, total + duration_ns, max(longest, duration_ns))
+
+		wall = self.wall_ns or 1
+		width = max([len(name) for name in totals] + [5])
+		lines = [
+			f"{'phase':<{width}}  {'calls':>6}  {'total ms':>10}  "
+			f"{'mean ms':>9}  {'max ms':>9}  {'% wall':>6}"
+		]
+		for name, (count, total, longest) in sorted(
+			totals.items(), key=lambda item: item[1][1], reverse=True
+		):
+			lines.append(
+				f"{name:<{width}}  {count:>6}  {total / 1e6:>10.2f}  "
+				f"{total / count / 1e6:>9.2f}  {longest / 1e6:>9.2f}  "
+				f"{total / wall * 100:>6.1f}"
+			)
+		lines.append(f"{'wall':<{width}}  {'':>6}  {wall / 1e6:>10.2f}")
+		return "\n".join(lines)
+
+
+def phase(name: str, **args):
+	"""Time the enclosed block as the phase ``name`` if profiling is on.
+
+	:param name: Phase name shown in the trace and the summary
+	:param args: Extra values attached to the phase in the trace
+	"""
+	profiler = _active
+	if profiler is None:
+		return _NULL_PHASE
+	return _Phase(profiler, name, args)
+
+
+def enable(profiler: Profiler = None) -> Profiler:
+	"""Start recording phases into ``profiler`` (a new one by default)."""
+	global _active
+	_active = profiler or Profiler()
+	return _active
+
+
+def disable():
+	"""Stop recording phases. Returns the profiler that was active, if any."""
+	global _active
+	profiler, _active = _active, None
+	if profiler is not None:
+		profiler.stop()
+	return profiler
+
+
+def active():
+	"""Return the active Profiler, or None if profiling is off."""
+	return _active
+
+
+@contextmanager
+def profile(trace_path: str = None):
+	"""Profile the enclosed block.
+
+	:param trace_path: If given, the Chrome trace is written there on exit
+	                   (also when the block raises)
+	:return: Context manager yielding the Profiler
+	"""
+	profiler = enable()
+	try:
+		yield profiler
+	finally:
+		disable()
+		if trace_path:
+			profiler.write_trace(trace_path)
@@ -0,0 +1,313 @@
+"""runner.py
+
+Runs Gradle (and other commands) without a shell and reports what it did.
+
+:func:`run_process` starts a command from an argument list, echoes its
+stdout and stderr line by line as they arrive (each stream on its own
+thread, so neither can block the other), and returns a
+:class:`CommandResult` with the exit code, wall time and the last lines of
+output.
+
+:func:`run_gradle` runs Gradle with ``--console=plain`` and parses its
+output into a :class:`GradleResult`:
+
+- one :class:`GradleTask` per ``> Task :path [OUTCOME]`` line, with the
+  outcome (``EXECUTED``, ``UP-TO-DATE``, ``FROM-CACHE``, ``NO-SOURCE``,
+  ``SKIPPED`` or ``FAILED``) and its duration. Gradle prints a task's line
+  when the task finishes, so the duration is the time since the previous
+  task line (for the first task, since Gradle started, so it includes
+  startup and configuration): exact for a sequential build, approximate
+  with ``--parallel``
+- the task that failed, from ``Execution failed for task ':path'``
+
+While a profiler is active (see :mod:`fabricpy.profiling`), every task is
+also recorded as a ``gradle :path`` phase in the trace.
+
+::
+
+    result = run_gradle(project_dir, ["build"], env=env)
+    print(result.summary())
+    result.check()  # raises CommandError with the failing task
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from fabricpy import profiling
+
+# Lines of output kept in a CommandResult, for error messages
+TAIL_LINES = 200
+
+TASK_LINE = re.compile(r"^> Task (:\S*)(?: ([A-Z][A-Z-]*))?\s*$")
+FAILED_TASK_LINE = re.compile(r"Execution failed for task '(:[^']*)'")
+
+EXECUTED = "EXECUTED"
+
+
+class CommandError(RuntimeError):
+	"""Raised when a command exits with a non-zero status or times out.
+
+	``result`` holds the :class:`CommandResult` of the run.
+	"""
+
+	def __init__(self, result):
+		"""Initialize the error from a finished run.
+
+		:param result: CommandResult (or GradleResult) of the failed command
+		"""
+		self.result = result
+		if result.timed_out:
+			reason = f"timed out after {result.seconds:.1f}s"
+		else:
+			reason = f"exited with status {result.returncode}"
+		message = f"Command failed: {' '.join(result.args)} ({reason})"
+		failed_task = getattr(result, "failed_task", None)
+		if failed_task:
+			message += f"\nFailed task: {failed_task}"
+		tail = list(result.output)[-20:]
+		if tail:
+			message += "\n" + "\n".join(tail)
+		super().__init__(message)
+
+
+class CommandResult:
+	"""Outcome of :func:`run_process`."""
+
+	def __init__(self, args):
+		self.args = list(args)
+		self.returncode = None
+		self.seconds = 0.0
+		self.timed_out = False
+		# Last TAIL_LINES lines of stdout and stderr, interleaved
+		self.output = deque(maxlen=TAIL_LINES)
+
+	@property
+	def ok(self) -> bool:
+		"""True if the command exited with status 0."""
+		return self.returncode == 0 and not self.timed_out
+
+	def check(self):
+		"""Raise :class:`CommandError` unless the command succeeded."""
+		if not self.ok:
+			raise CommandError(self)
+		return self
+
+	def on_line(self, stream: str, line: str, now: float):
+		"""Called for every line of output (``stream`` is "stdout"/"stderr")."""
+		self.output.append(line)
+
+	def __repr__(self):
+		return (
+			f"{type(self).__name__}({' '.join(self.args)!r}, "
+			f"returncode={self.returncode}, seconds={self.seconds:.2f})"
+		)
+
+
+class GradleTask:
+	"""One task of a Gradle build."""
+
+	__slots__ = ("path", "outcome", "seconds")
+
+	def __init__(self, path: str, outcome: str, seconds: float):
+		self.path = path
+		self.outcome = outcome
+		self.seconds = seconds
+
+	def __repr__(self):
+		return f"GradleTask({self.path!r}, {self.outcome}, {self.seconds:.2f}s)"
+
+
+class GradleResult(CommandResult):
+	"""Outcome of :func:`run_gradle`, with the tasks parsed from its output."""
+
+	def __init__(self, args):
+		super().__init__(args)
+		self.tasks = []
+		self.failed_task = None
+		self._start = time.perf_counter()
+		self._last = self._start
+
+	def counts(self) -> Counter:
+		"""Return the number of tasks per outcome."""
+		return Counter(task.outcome for task in self.tasks)
+
+	def slowest(self, count: int = 5) -> list:
+		"""Return the ``count`` tasks that took longest, slowest first."""
+		return sorted(self.tasks, key=lambda task: task.seconds, reverse=True)[:count]
+
+	def summary(self) -> str:
+		"""Return a short report: outcome counts and the slowest tasks."""
+		counts = self.counts()
+		parts = ", ".join(
+			f"{counts[outcome]} {outcome.lower()}" for outcome in sorted(counts)
+		)
+		lines = [
+			f"Gradle finished in {self.seconds:.1f}s: {len(self.tasks)} tasks"
+			+ (f" ({parts})" if parts else "")
+		]
+		for task in self.slowest():
+			lines.append(f"  {task.seconds:8.2f}s  {task.path} {task.outcome}")
+		if self.failed_task:
+			lines.append(f"Failed task: {self.failed_task}")
+		return "\n".join(lines)
+
+	def to_dict(self) -> dict:
+		"""Return the result as JSON-serializable data."""
+		return {
+			"args": self.args,
+			"returncode": self.returncode,
+			"seconds": round(self.seconds, 3),
+			"timed_out": self.timed_out,
+			"failed_task": self.failed_task,
+			"counts": dict(self.counts()),
+			"tasks": [
+				{
+					"path": task.path,
+					"outcome": task.outcome,
+					"seconds": round(task.seconds, 3),
+				}
+				for task in self.tasks
+			],
+		}
+
+	def write_report(self, path: str):
+		"""Write :meth:`to_dict` as JSON to ``path``."""
+		with open(path, "w", encoding="utf-8") as f:
+			json.dump(self.to_dict(), f, indent=2)
+
+	def on_line(self, stream: str, line: str, now: float):
+		"""Record task lines and the failing task."""
+		super().on_line(stream, line, now)
+		match = TASK_LINE.match(line)
+		if match:
+			path, outcome = match.groups()
+			task = GradleTask(path, outcome or EXECUTED, now - self._last)
+			self.tasks.append(task)
+			profiler = profiling.active()
+			if profiler is not None:
+				duration_ns = int(task.seconds * 1e9)
+				profiler.record(
+					f"gradle {path}",
+					time.perf_counter_ns() - duration_ns,
+					duration_ns,
+					{"outcome": task.outcome},
+				)
+			self._last = now
+			return
+		match = FAILED_TASK_LINE.search(line)
+		if match and self.failed_task is None:
+			self.failed_task = match.group(1)
+
+
+def run_process(
+	args, cwd: str = None, env: dict = None, timeout: float = None, result=None
+) -> CommandResult:
+	"""Run a command without a shell, echoing its output line by line.
+
+	:param args: Program and arguments, e.g. ``["./gradlew", "build"]``
+	:param cwd: Working directory
+	:param env: Environment (defaults to the current one)
+	:param timeout: Seconds after which the command is killed
+	:param result: CommandResult to fill in (e.g. a GradleResult)
+	:return: The result; check ``ok``, or call ``check()`` to raise
+	:raises OSError: If the program cannot be started
+	"""
+	args = [os.fspath(arg) for arg in args]
+	if result is None:
+		result = CommandResult(args)
+	print(f"Running command: {' '.join(args)}")
+	lock = threading.Lock()
+	start = time.perf_counter()
+	# e.g. "$ gradlew build"
+	label = " ".join([os.path.basename(args[0]), *args[1:2]])
+	with profiling.phase(f"$ {label}", command=" ".join(args)):
+		process = subprocess.Popen(
+			args,
+			cwd=cwd,
+			env=env,
+			stdin=subprocess.DEVNULL,
+			stdout=subprocess.PIPE,
+			stderr=subprocess.PIPE,
+			text=True,
+			encoding="utf-8",
+			errors="replace",
+		)
+		readers = [
+			threading.Thread(
+				target=_pump,
+				args=(process.stdout, "stdout", sys.stdout, result, lock),
+				daemon=True,
+			),
+			threading.Thread(
+				target=_pump,
+				args=(process.stderr, "stderr", sys.stderr, result, lock),
+				daemon=True,
+			),
+		]
+		for reader in readers:
+			reader.start()
+		try:
+			result.returncode = process.wait(timeout=timeout)
+		except subprocess.TimeoutExpired:
+			result.timed_out = True
+			process.kill()
+			result.returncode = process.wait()
+		except BaseException:
+			process.kill()
+			process.wait()
+			raise
+		finally:
+			for reader in readers:
+				reader.join()
+	result.seconds = time.perf_counter() - start
+	return result
+
+
+def gradle_command(project_dir: str) -> list:
+	"""Return the command starting Gradle: the project's wrapper, or ``gradle``."""
+	if sys.platform == "win32":
+		wrapper = os.path.join(project_dir, "gradlew.bat")
+	else:
+		wrapper = os.path.join(project_dir, "gradlew")
+	if os.path.isfile(wrapper):
+		return [wrapper]
+	return ["gradle"]
+
+
+def run_gradle(
+	project_dir: str, tasks, env: dict = None, args=(), timeout: float = None
+) -> GradleResult:
+	"""Run Gradle tasks in a project and parse the task outcomes.
+
+	:param project_dir: Project directory
+	:param tasks: Task names, e.g. ``["build"]``
+	:param env: Environment (e.g. with ``JAVA_HOME`` set)
+	:param args: Extra Gradle arguments
+	:param timeout: Seconds after which Gradle is killed
+	:return: GradleResult; call ``check()`` to raise on failure
+	"""
+	command = gradle_command(project_dir) + [*tasks, "--console=plain", *args]
+	return run_process(
+		command,
+		cwd=project_dir,
+		env=env,
+		timeout=timeout,
+		result=GradleResult(command),
+	)
+
+
+def _pump(pipe, name, echo, result, lock):
+	for line in pipe:
+		now = time.perf_counter()
+		line = line.rstrip("\r\n")
+		with lock:
+			echo.write(line + "\n")
+			echo.flush()
+			result.on_line(name, line, now)
+	pipe.close()
@@ -0,0 +1,509 @@
+"""server.py
+
+A local HTTP service that generates mod projects and returns them zipped.
+
+Start it with ``fabricpy serve`` and POST a request to ``/generate``::
+
+    {
+        "config": {"mod": {...}, "items": [...], "blocks": [...]},
+        "textures": {"textures/my_item.png": "<base64 PNG>", ...},
+        "options": {"registration": "data", "dedupe_textures": true}
+    }
+
+``config`` is a declarative mod config (see :mod:`fabricpy.config_loader`),
+as a JSON object or as a TOML string; its ``texture_file`` paths refer to
+the uploaded ``textures``. ``options`` may set ``registration``,
+``dedupe_textures`` and ``optimize_textures``. The response is the project
+as a zip file.
+
+Requests run on a bounded worker pool; when ``max_queue`` requests are
+already waiting, new ones get ``503 Service Unavailable``. Results are kept
+in an LRU cache bounded by total size and keyed by a hash of the canonical
+request (config, texture digests, options and fabricpy version), so
+repeated requests are answered without generating again, and identical
+requests arriving together share one run.
+
+``GET /metrics`` reports queue depth, cache and latency metrics in the
+Prometheus text format; ``GET /health`` answers ``ok``.
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import json
+import os
+import posixpath
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fabricpy
+from fabricpy.config_loader import check_document, config_from_document, parse_toml
+from fabricpy.generator import generate_mod_project
+from fabricpy.sinks import ZipSink
+from fabricpy.tables import iter_block_rows, iter_item_rows
+from fabricpy.validation import ValidationError
+
+DEFAULT_PORT = 8765
+
+# Generation options a request may set
+REQUEST_OPTIONS = {
+	"registration": str,
+	"dedupe_textures": bool,
+	"optimize_textures": bool,
+}
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class RequestError(ValueError):
+	"""A request the service cannot handle; carries the HTTP status to send."""
+
+	def __init__(self, message: str, status: int = 400, errors=None):
+		super().__init__(message)
+		self.status = status
+		self.errors = errors
+
+
+class ResultCache:
+	"""Thread-safe LRU cache of generated zips, bounded by their total size."""
+
+	def __init__(self, max_bytes: int):
+		""":param max_bytes: Total size of the cached results"""
+		self.max_bytes = max_bytes
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key: str):
+		"""Return the result stored under ``key``, or None."""
+		with self._lock:
+			data = self._entries.get(key)
+			if data is None:
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return data
+
+	def put(self, key: str, data: bytes):
+		"""Store ``data``, evicting the least recently used results."""
+		if len(data) > self.max_bytes:
+			return
+		with self._lock:
+			previous = self._entries.pop(key, None)
+			if previous is not None:
+				self.size -= len(previous)
+			self._entries[key] = data
+			self.size += len(data)
+			while self.size > self.max_bytes:
+				_, evicted = self._entries.popitem(last=False)
+				self.size -= len(evicted)
+
+	def __len__(self):
+		return len(self._entries)
+
+
+class Histogram:
+	"""Cumulative latency histogram in the Prometheus style."""
+
+	def __init__(self, buckets=LATENCY_BUCKETS):
+		self.buckets = buckets
+		self.counts = [0] * len(buckets)
+		self.count = 0
+		self.sum = 0.0
+		self._lock = threading.Lock()
+
+	def observe(self, seconds: float):
+		"""Record one duration."""
+		with self._lock:
+			self.count += 1
+			self.sum += seconds
+			for index, bound in enumerate(self.buckets):
+				if seconds <= bound:
+					self.counts[index] += 1
+
+	def lines(self, name: str) -> list:
+		"""Return the histogram in the Prometheus text format."""
+		with self._lock:
+			lines = [f"# TYPE {name} histogram"]
+			for bound, count in zip(self.buckets, self.counts):
+				lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+			lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+			lines.append(f"{name}_sum {self.sum:.6f}")
+			lines.append(f"{name}_count {self.count}")
+		return lines
+
+
+class GenerationService:
+	"""Generates zipped projects on a worker pool, with a result cache."""
+
+	def __init__(self, workers: int = None, max_queue: int = 64, cache_bytes=256 << 20):
+		"""Initialize the service.
+
+		:param workers: Generation runs in progress at once (default: CPUs)
+		:param max_queue: Requests allowed to wait for a worker
+		:param cache_bytes: Size bound of the result cache
+		"""
+		self.workers = workers or os.cpu_count() or 1
+		self.max_queue = max_queue
+		self.cache = ResultCache(cache_bytes)
+		self.request_latency = Histogram()
+		self.generation_latency = Histogram()
+		self.queue_wait = Histogram()
+		self.responses = {}
+		self.queued = 0
+		self.running = 0
+		self._pool = ThreadPoolExecutor(
+			max_workers=self.workers, thread_name_prefix="fabricpy-serve"
+		)
+		self._pending = {}
+		self._lock = threading.Lock()
+
+	def generate(self, request: dict):
+		"""Return ``(zip_bytes, mod_id, cache_status)`` for a parsed request.
+
+		``cache_status`` is "hit", "shared" (joined an identical run in
+		progress) or "miss".
+
+		:raises RequestError: If the request is invalid or the queue is full
+		"""
+		document, textures, options = _parse_request(request)
+		key = request_key(document, textures, options)
+		# _parse_request() checked that the mod section and its mod_id exist
+		mod_id = document["mod"]["mod_id"]
+
+		data = self.cache.get(key)
+		if data is not None:
+			return data, mod_id, "hit"
+
+		with self._lock:
+			future = self._pending.get(key)
+			status = "shared"
+			if future is None:
+				if self.queued >= self.max_queue:
+					raise RequestError("Too many requests queued", status=503)
+				status = "miss"
+				self.queued += 1
+				future = self._pool.submit(
+					self._run, key, document, textures, options, time.perf_counter()
+				)
+				self._pending[key] = future
+		return future.result(), mod_id, status
+
+	def count_response(self, status: int):
+		"""Count a response by HTTP status, for the metrics."""
+		with self._lock:
+			self.responses[status] = self.responses.get(status, 0) + 1
+
+	def metrics(self) -> str:
+		"""Return the service metrics in the Prometheus text format."""
+		with self._lock:
+			lines = [
+				"# TYPE fabricpy_queue_depth gauge",
+				f"fabricpy_queue_depth {self.queued}",
+				"# TYPE fabricpy_generations_in_progress gauge",
+				f"fabricpy_generations_in_progress {self.running}",
+				"# TYPE fabricpy_workers gauge",
+				f"fabricpy_workers {self.workers}",
+				"# TYPE fabricpy_responses_total counter",
+			]
+			lines.extend(
+				f'fabricpy_responses_total{{code="{status}"}} {count}'
+				for status, count in sorted(self.responses.items())
+			)
+		lines.extend(
+			[
+				"# TYPE fabricpy_cache_hits_total counter",
+				f"fabricpy_cache_hits_total {self.cache.hits}",
+				"# TYPE fabricpy_cache_misses_total counter",
+				f"fabricpy_cache_misses_total {self.cache.misses}",
+				"# TYPE fabricpy_cache_entries gauge",
+				f"fabricpy_cache_entries {len(self.cache)}",
+				"# TYPE fabricpy_cache_bytes gauge",
+				f"fabricpy_cache_bytes {self.cache.size}",
+			]
+		)
+		lines.extend(self.request_latency.lines("fabricpy_request_seconds"))
+		lines.extend(self.queue_wait.lines("fabricpy_queue_wait_seconds"))
+		lines.extend(self.generation_latency.lines("fabricpy_generation_seconds"))
+		return "\n".join(lines) + "\n"
+
+	def shutdown(self):
+		"""Stop the worker pool after the runs in progress."""
+		self._pool.shutdown(wait=True)
+
+	def _run(self, key, document, textures, options, submitted):
+		with self._lock:
+			self.queued -= 1
+			self.running += 1
+		start = time.perf_counter()
+		self.queue_wait.observe(start - submitted)
+		try:
+			data = _generate_zip(document, textures, options)
+			self.cache.put(key, data)
+			return data
+		finally:
+			self.generation_latency.observe(time.perf_counter() - start)
+			with self._lock:
+				self.running -= 1
+				self._pending.pop(key, None)
+
+
+def request_key(document: dict, textures: dict, options: dict) -> str:
+	"""Return the cache key of a request: a hash of its canonical form.
+
+	Key order and formatting of the config do not matter, and textures are
+	represented by their SHA-256.
+	"""
+	canonical = json.dumps(
+		{
+			"config": document,
+			"textures": {
+				name: hashlib.sha256(data).hexdigest()
+				for name, data in textures.items()
+			},
+			"options": options,
+			"fabricpy": fabricpy.__version__,
+		},
+		sort_keys=True,
+		separators=(",", ":"),
+		ensure_ascii=False,
+	)
+	return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _parse_request(request):
+	if not isinstance(request, dict):
+		raise RequestError("The request must be a JSON object")
+	unknown = set(request) - {"config", "textures", "options"}
+	if unknown:
+		raise RequestError(f"Unknown request field(s): {', '.join(sorted(unknown))}")
+
+	document = request.get("config")
+	if isinstance(document, str):
+		try:
+			document = parse_toml("the request config", document.encode("utf-8"))
+		except ValueError as e:
+			raise RequestError(str(e)) from None
+	if not isinstance(document, dict):
+		raise RequestError("'config' must be a JSON object or a TOML string")
+	for section in ("items", "blocks"):
+		if isinstance(document.get(section), str):
+			raise RequestError(f"'{section}' must be listed in the request config")
+	try:
+		# Before any value is used: a wrong type would otherwise give a 500
+		check_document(document, "the request config")
+	except ValueError as e:
+		raise RequestError(str(e)) from None
+
+	textures = {}
+	uploads = request.get("textures") or {}
+	if not isinstance(uploads, dict):
+		raise RequestError("'textures' must map file names to base64 data")
+	for name, encoded in uploads.items():
+		if not _is_safe_relpath(name):
+			raise RequestError(f"Invalid texture file name: {name!r}")
+		try:
+			textures[posixpath.normpath(name)] = base64.b64decode(
+				encoded, validate=True
+			)
+		except (TypeError, binascii.Error):
+			raise RequestError(f"Texture {name!r} is not valid base64") from None
+
+	options = request.get("options") or {}
+	if not isinstance(options, dict):
+		raise RequestError("'options' must be an object")
+	for name, value in options.items():
+		expected = REQUEST_OPTIONS.get(name)
+		if expected is None:
+			raise RequestError(f"Unsupported option: {name}")
+		if not isinstance(value, expected):
+			raise RequestError(f"Option {name} must be a {expected.__name__}")
+	return document, textures, options
+
+
+def _is_safe_relpath(name):
+	if not isinstance(name, str) or not name or "\\" in name or "\0" in name:
+		return False
+	if name.startswith("/") or ":" in name:
+		return False
+	return ".." not in posixpath.normpath(name).split("/")
+
+
+def _generate_zip(document, textures, options):
+	workdir = tempfile.mkdtemp(prefix="fabricpy-serve-")
+	try:
+		for name, data in textures.items():
+			path = os.path.join(workdir, *name.split("/"))
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+			with open(path, "wb") as f:
+				f.write(data)
+
+		try:
+			mod_config, blocks, items = config_from_document(
+				document, workdir, "the request config"
+			)
+		except (TypeError, ValueError) as e:
+			raise RequestError(str(e)) from None
+		# Textures must be uploads; never read other files of this machine
+		root = os.path.realpath(workdir) + os.sep
+		for rows in (iter_item_rows(items), iter_block_rows(blocks)):
+			for entry_id, _, texture, _ in rows:
+				if not os.path.realpath(texture).startswith(root):
+					raise RequestError(
+						f"Texture of '{entry_id}' is outside the uploaded textures"
+					)
+
+		buffer = io.BytesIO()
+		try:
+			generate_mod_project(
+				mod_config,
+				blocks,
+				items,
+				None,
+				sink=ZipSink(buffer),
+				**options,
+			)
+		except ValidationError as e:
+			raise RequestError(str(e).splitlines()[0], errors=e.errors) from None
+		except ValueError as e:
+			raise RequestError(str(e)) from None
+		return buffer.getvalue()
+	finally:
+		shutil.rmtree(workdir, ignore_errors=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+	"""HTTP front end of a GenerationService."""
+
+	server_version = f"fabricpy/{fabricpy.__version__}"
+	service = None
+	max_body = 64 << 20
+	quiet = False
+
+	def do_GET(self):
+		if self.path == "/metrics":
+			self._send(
+				200, self.service.metrics().encode(), "text/plain; version=0.0.4"
+			)
+		elif self.path == "/health":
+			self._send(200, b"ok\n", "text/plain")
+		else:
+			self._send_error(RequestError("Not found", status=404))
+
+	def do_POST(self):
+		if self.path != "/generate":
+			self._send_error(RequestError("Not found", status=404))
+			return
+		start = time.perf_counter()
+		try:
+			length = self.headers.get("Content-Length") or "0"
+			# int() would also accept "-1", "+5" or " 5 "; read(-1) blocks
+			# until the client closes the connection
+			if not (length.isascii() and length.isdigit()):
+				self.close_connection = True
+				raise RequestError("Invalid Content-Length")
+			length = int(length)
+			if length > self.max_body:
+				self.close_connection = True
+				raise RequestError("Request body too large", status=413)
+			try:
+				request = json.loads(self.rfile.read(length).decode("utf-8"))
+			except ValueError as e:
+				raise RequestError(f"Invalid JSON: {e}") from None
+			data, mod_id, cache_status = self.service.generate(request)
+		except RequestError as e:
+			self._send_error(e)
+		except Exception as e:
+			self.log_error("Generation failed: %r", e)
+			self._send_error(RequestError(f"Generation failed: {e}", status=500))
+		else:
+			self._send(
+				200,
+				data,
+				"application/zip",
+				{
+					"Content-Disposition": f'attachment; filename="{mod_id}.zip"',
+					"X-Fabricpy-Cache": cache_status,
+				},
+			)
+		finally:
+			self.service.request_latency.observe(time.perf_counter() - start)
+
+	def log_message(self, format, *args):
+		if not self.quiet:
+			super().log_message(format, *args)
+
+	def _send_error(self, error):
+		body = {"error": str(error)}
+		if error.errors:
+			body["errors"] = error.errors
+		headers = {"Retry-After": "1"} if error.status == 503 else None
+		self._send(error.status, json.dumps(body).encode(), "application/json", headers)
+
+	def _send(self, status, body, content_type, headers=None):
+		self.service.count_response(status)
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(body)))
+		for name, value in (headers or {}).items():
+			self.send_header(name, value)
+		self.end_headers()
+		self.wfile.write(body)
+
+
+def make_server(
+	host: str = "127.0.0.1",
+	port: int = DEFAULT_PORT,
+	service: GenerationService = None,
+	max_body: int = 64 << 20,
+	quiet: bool = False,
+) -> ThreadingHTTPServer:
+	"""Create (but do not start) the HTTP server.
+
+	:param host: Interface to listen on
+	:param port: Port to listen on (0 picks a free one)
+	:param service: GenerationService handling the requests
+	:param max_body: Largest accepted request body, in bytes
+	:param quiet: If True, do not log every request to stderr
+	"""
+	handler = type(
+		"Handler",
+		(_Handler,),
+		{
+			"service": service or GenerationService(),
+			"max_body": max_body,
+			"quiet": quiet,
+		},
+	)
+	server = ThreadingHTTPServer((host, port), handler)
+	server.daemon_threads = True
+	server.service = handler.service
+	return server
+
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, **service_options):
+	"""Run the service until interrupted.
+
+	:param service_options: Keyword arguments for GenerationService
+	"""
+	service = GenerationService(**service_options)
+	server = make_server(host, port, service)
+	print(
+		f"Serving on http://{host}:{server.server_address[1]} "
+		f"({service.workers} workers)"
+	)
+	try:
+		server.serve_forever()
+	finally:
+		server.server_close()
+		service.shutdown()
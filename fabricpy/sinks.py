@@ -0,0 +1,243 @@
+"""sinks.py
+
+Destinations for a generated project.
+
+:func:`~fabricpy.generator.generate_mod_project` writes every output through
+a sink object with this interface:
+
+- ``write_bytes(relpath, data)``, ``write_text(relpath, text)`` and
+  ``write_json(relpath, obj, indent)`` for generated files
+- ``open_text(relpath)``, a context manager yielding an object with a
+  ``write(str)`` method, for files streamed piece by piece
+- ``copy_file(source, relpath)`` for textures
+- ``source_digest(source)``, the SHA-256 of an input file
+- ``finish()`` and ``abort()``, called once at the end of a successful or
+  failed run
+
+``relpath`` is always ``/``-separated and relative to the project root (see
+:func:`~fabricpy.manifest.check_relpath`). The methods may be called from
+several threads at once.
+
+Three implementations are available:
+
+- :class:`FileSystemSink` (:class:`~fabricpy.manifest.ProjectWriter`), used
+  by default: writes into a directory, incrementally
+- :class:`MemorySink`: keeps every file in a dict, e.g. for tests
+- :class:`ZipSink`: streams the project into a zip (or jar) file or any
+  writable binary stream, copying textures straight from their source files
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from contextlib import contextmanager
+
+from fabricpy.manifest import GenerationStats, ProjectWriter, check_relpath, hash_file
+
+FileSystemSink = ProjectWriter
+
+# Text streamed into a zip is buffered in memory up to this size, then on disk
+SPOOL_SIZE = 8 << 20
+
+# Fixed entry timestamp, so the same project always gives the same entries
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class OutputSink:
+	"""Base class for sinks that do not keep state between runs.
+
+	Subclasses implement :meth:`write_bytes`, :meth:`open_text` and
+	:meth:`copy_file`; every call counts as one written file.
+	"""
+
+	def __init__(self):
+		self.stats = GenerationStats()
+		self._lock = threading.Lock()
+		self._digests = {}
+
+	def write_bytes(self, relpath: str, data: bytes) -> bool:
+		"""Write ``data`` to ``relpath``. Returns True."""
+		raise NotImplementedError
+
+	def write_text(self, relpath: str, text: str) -> bool:
+		"""Write ``text`` encoded as UTF-8 to ``relpath``."""
+		return self.write_bytes(relpath, text.encode("utf-8"))
+
+	def write_json(self, relpath: str, obj, indent: int = 2) -> bool:
+		"""Serialize ``obj`` as JSON to ``relpath``."""
+		return self.write_text(relpath, json.dumps(obj, indent=indent))
+
+	def open_text(self, relpath: str):
+		"""Context manager yielding an object with a ``write(str)`` method."""
+		raise NotImplementedError
+
+	def copy_file(self, source: str, relpath: str, copier=None) -> bool:
+		"""Copy the file ``source`` to ``relpath``. Returns True.
+
+		:param copier: Ignored; accepted for compatibility with ProjectWriter
+		"""
+		raise NotImplementedError
+
+	def source_digest(self, source: str) -> str:
+		"""Return the SHA-256 of the input file ``source`` (cached per path)."""
+		source = os.path.abspath(source)
+		st = os.stat(source)
+		key = (source, st.st_size, st.st_mtime_ns)
+		digest = self._digests.get(key)
+		if digest is None:
+			digest = hash_file(source)
+			with self._lock:
+				self._digests[key] = digest
+		return digest
+
+	def finish(self) -> GenerationStats:
+		"""Complete the output and return the run's stats."""
+		return self.stats
+
+	def abort(self) -> GenerationStats:
+		"""Clean up after a failed run."""
+		return self.finish()
+
+	def _count(self):
+		with self._lock:
+			self.stats.written += 1
+
+
+class MemorySink(OutputSink):
+	"""Keeps the generated project in memory.
+
+	``files`` maps every relpath to its bytes::
+
+	    sink = MemorySink()
+	    generate_mod_project(mod_config, blocks, items, None, sink=sink)
+	    sink.read_text("src/main/resources/fabric.mod.json")
+	"""
+
+	def __init__(self):
+		super().__init__()
+		self.files = {}
+
+	def write_bytes(self, relpath: str, data: bytes) -> bool:
+		"""Store ``data`` as ``relpath``."""
+		with self._lock:
+			self.files[relpath] = bytes(data)
+		self._count()
+		return True
+
+	@contextmanager
+	def open_text(self, relpath: str):
+		"""Collect streamed text and store it as ``relpath`` on exit."""
+		buffer = io.StringIO()
+		yield buffer
+		self.write_text(relpath, buffer.getvalue())
+
+	def copy_file(self, source: str, relpath: str, copier=None) -> bool:
+		"""Store the bytes of ``source`` as ``relpath``."""
+		with open(source, "rb") as f:
+			return self.write_bytes(relpath, f.read())
+
+	def read_text(self, relpath: str) -> str:
+		"""Return the file ``relpath`` decoded as UTF-8."""
+		return self.files[relpath].decode("utf-8")
+
+	def __repr__(self):
+		return f"MemorySink({len(self.files)} files)"
+
+
+class ZipSink(OutputSink):
+	"""Streams the generated project into a zip archive.
+
+	Entries are written as soon as they are produced; the archive is
+	complete once :meth:`finish` has run. Textures are read from their
+	source files straight into the archive and stored uncompressed (PNGs are
+	compressed already). Streamed text files (lang files, the registry
+	resource) are buffered until they are complete, in memory up to
+	``SPOOL_SIZE`` and in a temporary file beyond that.
+	"""
+
+	def __init__(self, file, compression=zipfile.ZIP_DEFLATED):
+		"""Open the archive.
+
+		:param file: Path of the zip/jar file to create, or a writable
+		             binary file object (which may be unseekable, e.g. a
+		             socket or an HTTP response body)
+		:param compression: zipfile compression method for generated files
+		"""
+		super().__init__()
+		self.file = file
+		self._compression = compression
+		self._zip = zipfile.ZipFile(file, "w", compression=compression)
+		self._zip_lock = threading.Lock()
+
+	def write_bytes(self, relpath: str, data: bytes) -> bool:
+		"""Add ``data`` to the archive as ``relpath``."""
+		info = self._info(relpath, self._compression)
+		with self._zip_lock:
+			self._zip.writestr(info, data)
+		self._count()
+		return True
+
+	@contextmanager
+	def open_text(self, relpath: str):
+		"""Buffer streamed text and add it to the archive on exit.
+
+		Only one entry can be written to a zip at a time, and other files are
+		generated while this one is open, so it cannot be streamed directly.
+		"""
+		with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as spool:
+			yield _EncodingWriter(spool)
+			spool.seek(0)
+			self._add_stream(spool, relpath, self._compression)
+
+	def copy_file(self, source: str, relpath: str, copier=None) -> bool:
+		"""Stream the file ``source`` into the archive as ``relpath``."""
+		with open(source, "rb") as f:
+			self._add_stream(f, relpath, zipfile.ZIP_STORED)
+		return True
+
+	def finish(self) -> GenerationStats:
+		"""Write the archive's central directory and close it."""
+		with self._zip_lock:
+			self._zip.close()
+		return self.stats
+
+	def abort(self) -> GenerationStats:
+		"""Close the archive; a zip file created from a path is deleted."""
+		self.finish()
+		if isinstance(self.file, (str, os.PathLike)):
+			try:
+				os.remove(self.file)
+			except OSError:
+				pass
+		return self.stats
+
+	def _add_stream(self, stream, relpath, compression):
+		info = self._info(relpath, compression)
+		with self._zip_lock:
+			with self._zip.open(info, "w") as entry:
+				shutil.copyfileobj(stream, entry, 1 << 20)
+		self._count()
+
+	def _info(self, relpath, compression):
+		# Extracting an entry named "../x" would write outside the target
+		info = zipfile.ZipInfo(check_relpath(relpath), date_time=ZIP_DATE_TIME)
+		info.compress_type = compression
+		info.external_attr = 0o644 << 16
+		return info
+
+	def __repr__(self):
+		return f"ZipSink({self.file!r})"
+
+
+class _EncodingWriter:
+	"""Text ``write`` on top of a binary file."""
+
+	def __init__(self, f):
+		self._f = f
+
+	def write(self, text: str):
+		self._f.write(text.encode("utf-8"))
@@ -0,0 +1,270 @@
+"""tables.py
+
+Compact, column-oriented containers for configs with very many entries.
+
+An :class:`ItemTable` or :class:`BlockTable` stores the ID, name, texture
+path and category of every entry in array-backed columns instead of one
+Python object (and four string objects) per entry. Mostly-unique values
+(IDs, names, texture file names) are packed back to back in one UTF-8
+buffer; repeated values (categories, texture directories) are interned in a
+pool and stored as one integer per row. A table costs roughly the length of
+its strings plus a few dozen bytes per entry.
+
+Tables can be passed anywhere a list of Item or Block objects is accepted.
+The generator reads them row by row with :func:`iter_item_rows` and
+:func:`iter_block_rows` without creating Item or Block objects.
+"""
+
+import csv
+import json
+import os
+from array import array
+
+from fabricpy.block import Block
+from fabricpy.item import Item
+
+
+class _InternedColumn:
+	"""Strings stored as indexes into a pool of distinct values.
+
+	Used for columns with few distinct values, like categories.
+	"""
+
+	__slots__ = ("_pool", "_index", "_codes")
+
+	def __init__(self):
+		self._pool = []
+		self._index = {}
+		self._codes = array("I")
+
+	def append(self, value: str):
+		code = self._index.get(value)
+		if code is None:
+			code = self._index[value] = len(self._pool)
+			self._pool.append(value)
+		self._codes.append(code)
+
+	def __len__(self):
+		return len(self._codes)
+
+	def __getitem__(self, row):
+		return self._pool[self._codes[row]]
+
+	def __iter__(self):
+		pool = self._pool
+		return (pool[code] for code in self._codes)
+
+
+class _PackedColumn:
+	"""Strings stored back to back as UTF-8 in one buffer, plus end offsets.
+
+	Used for columns whose values are (nearly) all distinct, like IDs, where
+	a pool would only add a dict entry per value.
+	"""
+
+	__slots__ = ("_data", "_ends")
+
+	def __init__(self):
+		self._data = bytearray()
+		self._ends = array("Q")
+
+	def append(self, value: str):
+		self._data += value.encode("utf-8")
+		self._ends.append(len(self._data))
+
+	def __len__(self):
+		return len(self._ends)
+
+	def __getitem__(self, row):
+		if row < 0:
+			row += len(self._ends)
+		start = self._ends[row - 1] if row else 0
+		return self._data[start : self._ends[row]].decode("utf-8")
+
+	def __iter__(self):
+		data = self._data
+		start = 0
+		for end in self._ends:
+			yield data[start:end].decode("utf-8")
+			start = end
+
+
+class _TextureColumn:
+	"""Texture paths stored as an interned directory plus a file name."""
+
+	__slots__ = ("_dirs", "_names")
+
+	def __init__(self):
+		self._dirs = _InternedColumn()
+		self._names = _PackedColumn()
+
+	def append(self, path: str):
+		directory, name = os.path.split(path)
+		self._dirs.append(directory)
+		self._names.append(name)
+
+	def __len__(self):
+		return len(self._names)
+
+	def __getitem__(self, row):
+		return _join(self._dirs[row], self._names[row])
+
+	def __iter__(self):
+		return map(_join, self._dirs, self._names)
+
+
+def _join(directory, name):
+	return os.path.join(directory, name) if directory else name
+
+
+class _EntryTable:
+	"""Columns shared by ItemTable and BlockTable."""
+
+	entry_class = None
+	id_field = None
+	default_texture = None
+
+	def __init__(self, rows=()):
+		"""Create a table.
+
+		:param rows: Optional iterable of ``(id, name, texture_file, category)``
+		             tuples; ``texture_file`` and ``category`` may be omitted
+		"""
+		self.ids = _PackedColumn()
+		self.names = _PackedColumn()
+		self.textures = _TextureColumn()
+		self.categories = _InternedColumn()
+		self.extend(rows)
+
+	def append(self, entry_id: str, name: str, texture_file=None, category="misc"):
+		"""Add one entry."""
+		self.ids.append(entry_id)
+		self.names.append(name)
+		self.textures.append(texture_file or self.default_texture)
+		self.categories.append(category or "misc")
+
+	def extend(self, rows):
+		"""Add entries from ``(id, name[, texture_file[, category]])`` tuples."""
+		for row in rows:
+			self.append(*row)
+
+	def rows(self):
+		"""Iterate ``(id, name, texture_file, category)`` tuples."""
+		return zip(self.ids, self.names, self.textures, self.categories)
+
+	def __len__(self):
+		return len(self.ids)
+
+	def __bool__(self):
+		return len(self.ids) > 0
+
+	def __getitem__(self, row):
+		"""Return row ``row`` as an Item or Block object."""
+		if row < 0:
+			row += len(self)
+		return self.entry_class(
+			self.ids[row], self.names[row], self.textures[row], self.categories[row]
+		)
+
+	def __iter__(self):
+		"""Iterate the entries as Item or Block objects, created on the fly."""
+		entry_class = self.entry_class
+		return (entry_class(*row) for row in self.rows())
+
+	def __repr__(self):
+		return f"{type(self).__name__}({len(self)} entries)"
+
+	@classmethod
+	def from_entries(cls, entries):
+		"""Build a table from Item or Block objects."""
+		return cls(
+			(
+				getattr(entry, cls.id_field),
+				entry.name,
+				entry.texture_file,
+				entry.category,
+			)
+			for entry in entries
+		)
+
+	@classmethod
+	def from_csv(cls, path: str, delimiter: str = None):
+		"""Build a table from a CSV (or ``.tsv``) file.
+
+		The first row names the columns: ``id`` (or ``item_id``/``block_id``),
+		``name`` and optionally ``texture_file`` and ``category``.
+		"""
+		if delimiter is None:
+			delimiter = "\t" if path.lower().endswith(".tsv") else ","
+		table = cls()
+		with open(path, encoding="utf-8", newline="") as f:
+			for record in csv.DictReader(f, delimiter=delimiter):
+				table._append_record(record, path)
+		return table
+
+	@classmethod
+	def from_json(cls, path: str):
+		"""Build a table from a JSON file.
+
+		The file holds a list of objects with the same keys as the CSV
+		columns, or a list of ``[id, name, texture_file, category]`` lists.
+		"""
+		with open(path, encoding="utf-8") as f:
+			records = json.load(f)
+		table = cls()
+		for record in records:
+			if isinstance(record, dict):
+				table._append_record(record, path)
+			else:
+				table.append(*record)
+		return table
+
+	def _append_record(self, record, path):
+		entry_id = record.get("id") or record.get(self.id_field)
+		if not entry_id or not record.get("name"):
+			raise ValueError(f"Entry without an id or name in {path}: {record}")
+		self.append(
+			entry_id, record["name"], record.get("texture_file"), record.get("category")
+		)
+
+
+class ItemTable(_EntryTable):
+	"""Columnar storage for many items."""
+
+	entry_class = Item
+	id_field = "item_id"
+	default_texture = "item.png"
+
+
+class BlockTable(_EntryTable):
+	"""Columnar storage for many blocks."""
+
+	entry_class = Block
+	id_field = "block_id"
+	default_texture = "block.png"
+
+
+def iter_item_rows(items):
+	"""Iterate ``(item_id, name, texture_file, category)`` for each item.
+
+	:param items: ItemTable, iterable of Item objects, or None
+	"""
+	if isinstance(items, _EntryTable):
+		return items.rows()
+	return (
+		(item.item_id, item.name, item.texture_file, item.category)
+		for item in items or ()
+	)
+
+
+def iter_block_rows(blocks):
+	"""Iterate ``(block_id, name, texture_file, category)`` for each block.
+
+	:param blocks: BlockTable, iterable of Block objects, or None
+	"""
+	if isinstance(blocks, _EntryTable):
+		return blocks.rows()
+	return (
+		(block.block_id, block.name, block.texture_file, block.category)
+		for block in blocks or ()
+	)
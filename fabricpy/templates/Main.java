@@ -0,0 +1,39 @@
+package {{ mod_id }};
+
+import net.fabricmc.api.ModInitializer;
+import net.minecraft.item.Item;
+import net.minecraft.item.ItemGroups;
+import net.minecraft.registry.Registries;
+import net.minecraft.registry.Registry;
+import net.minecraft.util.Identifier;
+import net.fabricmc.fabric.api.itemgroup.v1.ItemGroupEvents;
+
+public class {{ class_name }} implements ModInitializer {
+    public static final String MOD_ID = "{{ mod_id }}";
+
+    private static Identifier makeId(String path) {
+        System.out.println("[" + MOD_ID + "] Creating Identifier: " + MOD_ID + ":" + path);
+        return new Identifier(MOD_ID, path);  // Use constructor directly
+    }
+
+    // Register item with proper translation key and settings
+    public static final Item EXAMPLE_ITEM = Registry.register(
+        Registries.ITEM,
+        makeId("example_item"),
+        new Item(new Item.Settings().translationKey(MOD_ID + ".example_item"))
+    );
+
+    @Override
+    public void onInitialize() {
+        System.out.println("[" + MOD_ID + "] Initializing mod...");
+        System.out.println("[" + MOD_ID + "] Item registered as: " + EXAMPLE_ITEM.getTranslationKey());
+        System.out.println("[" + MOD_ID + "] Item identifier: " + Registry.ITEM.getId(EXAMPLE_ITEM));
+
+        ItemGroupEvents.modifyEntriesEvent(ItemGroups.INGREDIENTS).register(entries -> {
+            entries.add(EXAMPLE_ITEM);
+            System.out.println("[" + MOD_ID + "] Added " + EXAMPLE_ITEM.toString() + " to ingredients group");
+        });
+
+        System.out.println("[" + MOD_ID + "] Initialization complete for {{ mod_name }}");
+    }
+}
\ No newline at end of file
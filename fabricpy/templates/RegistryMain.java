@@ -0,0 +1,81 @@
+package {{ mod_id }};
+
+import java.io.BufferedReader;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.InputStreamReader;
+import java.nio.charset.StandardCharsets;
+import java.util.ArrayList;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Map;
+
+import net.fabricmc.api.ModInitializer;
+import net.fabricmc.fabric.api.itemgroup.v1.ItemGroupEvents;
+import net.minecraft.block.AbstractBlock;
+import net.minecraft.block.Block;
+import net.minecraft.item.BlockItem;
+import net.minecraft.item.Item;
+import net.minecraft.item.ItemGroup;
+import net.minecraft.item.ItemGroups;
+import net.minecraft.registry.Registries;
+import net.minecraft.registry.Registry;
+import net.minecraft.registry.RegistryKey;
+import net.minecraft.util.Identifier;
+
+public class {{ class_name }} implements ModInitializer {
+    public static final String MOD_ID = "{{ mod_id }}";
+    private static final String REGISTRY_RESOURCE = "/{{ registry_resource }}";
+
+    @Override
+    public void onInitialize() {
+        Map<RegistryKey<ItemGroup>, List<Item>> groups = new LinkedHashMap<>();
+        int count = 0;
+        try (InputStream in = {{ class_name }}.class.getResourceAsStream(REGISTRY_RESOURCE)) {
+            if (in == null) {
+                throw new IllegalStateException("Missing resource " + REGISTRY_RESOURCE);
+            }
+            BufferedReader reader = new BufferedReader(new InputStreamReader(in, StandardCharsets.UTF_8));
+            String line;
+            while ((line = reader.readLine()) != null) {
+                if (line.isEmpty()) {
+                    continue;
+                }
+                // kind, id, category
+                String[] fields = line.split("\t", -1);
+                Identifier id = new Identifier(MOD_ID, fields[1]);
+                Item item;
+                if (fields[0].equals("block")) {
+                    Block block = Registry.register(Registries.BLOCK, id, new Block(AbstractBlock.Settings.create()));
+                    item = Registry.register(Registries.ITEM, id, new BlockItem(block, new Item.Settings()));
+                } else {
+                    item = Registry.register(Registries.ITEM, id, new Item(new Item.Settings()));
+                }
+                groups.computeIfAbsent(itemGroup(fields[2]), key -> new ArrayList<>()).add(item);
+                count++;
+            }
+        } catch (IOException e) {
+            throw new IllegalStateException("Could not read " + REGISTRY_RESOURCE, e);
+        }
+
+        groups.forEach((group, entries) ->
+            ItemGroupEvents.modifyEntriesEvent(group).register(content -> entries.forEach(content::add))
+        );
+        System.out.println("[" + MOD_ID + "] Registered " + count + " entries for {{ mod_name }}");
+    }
+
+    private static RegistryKey<ItemGroup> itemGroup(String category) {
+        switch (category) {
+            case "building_blocks": return ItemGroups.BUILDING_BLOCKS;
+            case "colored_blocks": return ItemGroups.COLORED_BLOCKS;
+            case "natural": return ItemGroups.NATURAL;
+            case "functional": return ItemGroups.FUNCTIONAL;
+            case "redstone": return ItemGroups.REDSTONE;
+            case "tools": return ItemGroups.TOOLS;
+            case "combat": return ItemGroups.COMBAT;
+            case "food": return ItemGroups.FOOD_AND_DRINK;
+            case "spawn_eggs": return ItemGroups.SPAWN_EGGS;
+            default: return ItemGroups.INGREDIENTS;
+        }
+    }
+}
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""templating.py
+
+A small registry of the text templates used to generate project files.
+
+Templates are plain text files with ``{{ name }}`` placeholders. The built-in
+templates live in ``fabricpy/templates``; a user template directory can
+override any of them by file name, and every other file in it is an extra
+template rendered into the project at the same relative path.
+
+Each template is read and split into literal text and placeholders once per
+registry, and registries are shared per template directory for the lifetime
+of the process, so rendering is a single ``str.join`` with no parsing.
+"""
+
+import os
+import re
+
+BUILTIN_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+_PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+_registries = {}
+
+
+class Template:
+	"""A template split into literal text and placeholder names."""
+
+	__slots__ = ("name", "_parts")
+
+	def __init__(self, name: str, text: str):
+		"""Compile a template.
+
+		:param name: Name used in error messages
+		:param text: Template text with ``{{ name }}`` placeholders
+		"""
+		self.name = name
+		# Literals at even indexes, placeholder names at odd ones
+		self._parts = _PLACEHOLDER.split(text)
+
+	@property
+	def fields(self) -> set:
+		"""Names of the placeholders used by the template."""
+		return set(self._parts[1::2])
+
+	def render(self, context: dict) -> str:
+		"""Return the template text with every placeholder filled in.
+
+		:param context: Placeholder name -> value (converted with ``str``)
+		:raises KeyError: If ``context`` has no value for a placeholder
+		"""
+		parts = self._parts[:]
+		try:
+			for index in range(1, len(parts), 2):
+				parts[index] = str(context[parts[index]])
+		except KeyError as e:
+			raise KeyError(f"Template {self.name} has no value for {e}") from None
+		return "".join(parts)
+
+
+class TemplateRegistry:
+	"""Looks up and caches compiled templates."""
+
+	def __init__(self, template_dir: str = None):
+		"""Initialize the registry.
+
+		:param template_dir: Optional directory whose templates override the
+		                     built-in ones and add extra project files
+		"""
+		self.template_dir = template_dir
+		self._templates = {}
+		self._extra = None
+
+	def get(self, name: str) -> Template:
+		"""Return the compiled template called ``name``.
+
+		:raises FileNotFoundError: If no directory has a template of that name
+		"""
+		template = self._templates.get(name)
+		if template is None:
+			template = Template(name, self._read(name))
+			self._templates[name] = template
+		return template
+
+	def render(self, name: str, context: dict) -> str:
+		"""Render the template called ``name`` with ``context``."""
+		return self.get(name).render(context)
+
+	def extra_templates(self) -> list:
+		"""Relative paths of the user templates that are not built-in ones."""
+		if self._extra is None:
+			self._extra = []
+			if self.template_dir:
+				for root, dirs, files in os.walk(self.template_dir):
+					dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+					for filename in sorted(files):
+						if filename.startswith("."):
+							continue
+						relpath = os.path.relpath(
+							os.path.join(root, filename), self.template_dir
+						).replace(os.sep, "/")
+						if not os.path.isfile(
+							os.path.join(BUILTIN_TEMPLATE_DIR, relpath)
+						):
+							self._extra.append(relpath)
+		return self._extra
+
+	def clear(self):
+		"""Forget every compiled template, e.g. after editing a template file."""
+		self._templates.clear()
+		self._extra = None
+
+	def _read(self, name):
+		for directory in (self.template_dir, BUILTIN_TEMPLATE_DIR):
+			if not directory:
+				continue
+			try:
+				with open(os.path.join(directory, name), encoding="utf-8") as f:
+					return f.read()
+			except FileNotFoundError:
+				continue
+		raise FileNotFoundError(f"No template named {name}")
+
+
+def get_registry(template_dir: str = None) -> TemplateRegistry:
+	"""Return the process-wide registry for ``template_dir``.
+
+	:param template_dir: User template directory, or None for the built-in
+	                     templates only
+	"""
+	key = os.path.abspath(template_dir) if template_dir else None
+	registry = _registries.get(key)
+	if registry is None:
+		registry = _registries[key] = TemplateRegistry(key)
+	return registry
@@ -0,0 +1,425 @@
+"""textures.py
+
+Copies item and block textures into the generated mod project.
+
+Textures are resolved and checked in batches, and every missing file is
+reported together. :class:`TexturePlanner` and :class:`TextureCopier` let the
+generator plan and copy textures while it streams through the entries. Byte-identical textures can be
+collapsed into a single shared asset, and PNGs can be losslessly optimized
+(see :mod:`fabricpy.pngopt`). The copies then run on a bounded thread pool,
+each one trying a hardlink, then an in-kernel copy
+(``copy_file_range``/``sendfile``), and finally a plain copy.
+"""
+
+import os
+import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from fabricpy.manifest import hash_file
+from fabricpy.pngopt import optimized_texture
+from fabricpy.tables import iter_block_rows, iter_item_rows
+
+
+class MissingTexturesError(FileNotFoundError):
+	"""Raised when texture files referenced by items or blocks do not exist."""
+
+	def __init__(self, missing):
+		"""Initialize the error.
+
+		:param missing: List of ``(kind, entry_id, path)`` tuples, one per
+		                entry whose texture could not be found
+		"""
+		self.missing = missing
+		lines = [f"{len(missing)} texture file(s) not found:"]
+		lines.extend(
+			f"  {kind} '{entry_id}': {path}" for kind, entry_id, path in missing
+		)
+		super().__init__("\n".join(lines))
+
+
+class TextureJob:
+	"""A single texture to place in the project."""
+
+	__slots__ = ("source", "relpath", "kind", "digest")
+
+	def __init__(self, source: str, relpath: str, kind: str, digest: str = None):
+		"""Initialize a texture job.
+
+		:param source: Absolute path of the source PNG
+		:param relpath: Destination path relative to the project root
+		:param kind: "item" or "block"
+		:param digest: SHA-256 of the source, if it has been computed
+		"""
+		self.source = source
+		self.relpath = relpath
+		self.kind = kind
+		self.digest = digest
+
+	def __repr__(self):
+		return (
+			f"TextureJob(source={self.source}, relpath={self.relpath}, "
+			f"kind={self.kind})"
+		)
+
+
+class TexturePlan:
+	"""The textures to place in a project and how models should refer to them."""
+
+	def __init__(self, mod_id: str, jobs: list, references: dict, duplicates: int = 0):
+		"""Initialize a texture plan.
+
+		:param mod_id: ID of the mod the textures belong to
+		:param jobs: TextureJob instances, one per destination file
+		:param references: ``(kind, absolute source path)`` -> TextureJob
+		                   providing it
+		:param duplicates: Number of sources collapsed into another texture
+		"""
+		self.mod_id = mod_id
+		self.jobs = jobs
+		self.duplicates = duplicates
+		self._references = references
+
+	def reference(self, kind: str, texture_file: str) -> str:
+		"""Return the texture identifier a model should use for ``texture_file``.
+
+		For example ``"mymod:item/ruby"``. If the texture was deduplicated,
+		this is the identifier of the shared asset, which may belong to the
+		other kind (a block model can point at ``"mymod:item/ruby"``).
+
+		:param kind: "item" or "block", the kind of the entry using the texture
+		:param texture_file: Texture path as given by the entry
+		"""
+		job = self._references[(kind, os.path.abspath(texture_file))]
+		name = job.relpath.rsplit("/", 1)[1][: -len(".png")]
+		return f"{self.mod_id}:{job.kind}/{name}"
+
+
+def default_workers() -> int:
+	"""Default size of the texture thread pool."""
+	return min(32, (os.cpu_count() or 1) * 4)
+
+
+def texture_name(texture_file: str) -> str:
+	"""Return the asset name for a texture file (its basename without ``.png``)."""
+	return os.path.splitext(os.path.basename(texture_file))[0]
+
+
+def plan_textures(
+	mod_config,
+	blocks,
+	items,
+	max_workers: int = None,
+	dedupe: bool = False,
+	digest=hash_file,
+) -> TexturePlan:
+	"""Resolve the texture copies needed for ``blocks`` and ``items``.
+
+	Every distinct source path is checked exactly once, concurrently, and all
+	missing textures are reported together.
+
+	:param mod_config: ModConfig instance with mod metadata
+	:param blocks: List of Block instances
+	:param items: List of Item instances
+	:param max_workers: Size of the thread pool used for the existence checks
+	:param dedupe: If True, hash the sources and collapse byte-identical
+	               textures into the asset of the first entry using them
+	:param digest: Callable returning the SHA-256 of a source path
+	:return: TexturePlan with one TextureJob per destination file
+	:raises MissingTexturesError: If any referenced texture does not exist
+	:raises ValueError: If two different textures map to the same destination
+	"""
+	with ThreadPoolExecutor(max_workers=max_workers or default_workers()) as pool:
+		planner = TexturePlanner(mod_config, pool, dedupe=dedupe, digest=digest)
+		planner.add(texture_entries(blocks, items))
+	planner.check()
+	return planner.plan
+
+
+class TexturePlanner:
+	"""Builds a TexturePlan incrementally, one batch of entries at a time.
+
+	Lets the generator plan (and start copying) textures while it streams
+	through the entries. Missing textures and name collisions are collected
+	instead of raised, so they can all be reported by :meth:`check` at the end.
+	"""
+
+	def __init__(self, mod_config, pool, dedupe: bool = False, digest=hash_file):
+		"""Initialize the planner.
+
+		:param mod_config: ModConfig instance with mod metadata
+		:param pool: Executor used for the existence checks and hashing
+		:param dedupe: If True, collapse byte-identical textures
+		:param digest: Callable returning the SHA-256 of a source path
+		"""
+		self.plan = TexturePlan(mod_config.mod_id, [], {})
+		self.missing = []
+		self.collisions = []
+		self._mod_id = mod_config.mod_id
+		self._pool = pool
+		self._dedupe = dedupe
+		self._digest = digest
+		self._abspaths = {}
+		self._missing_sources = set()
+		self._jobs = {}
+		self._by_digest = {}
+
+	def add(self, entries) -> list:
+		"""Plan the textures of ``(kind, entry_id, texture_file)`` entries.
+
+		:return: The TextureJobs created for sources not seen before
+		"""
+		abspaths = self._abspaths
+		resolved = []
+		new_sources = set()
+		for kind, entry_id, texture in entries:
+			source = abspaths.get(texture)
+			if source is None:
+				source = abspaths[texture] = os.path.abspath(texture)
+				new_sources.add(source)
+			resolved.append((kind, entry_id, texture, source))
+
+		sources = sorted(new_sources)
+		# Stat in batches: one task per path would cost more than the stat itself
+		batches = [sources[i : i + 256] for i in range(0, len(sources), 256)]
+		existing = set()
+		for found in self._pool.map(_existing_files, batches):
+			existing.update(found)
+		self._missing_sources.update(new_sources - existing)
+		digests = {}
+		if self._dedupe:
+			present = [source for source in sources if source in existing]
+			digests = dict(zip(present, self._pool.map(self._digest, present)))
+
+		references = self.plan._references
+		new_jobs = []
+		for kind, entry_id, texture, source in resolved:
+			if source in self._missing_sources:
+				self.missing.append((kind, entry_id, source))
+				continue
+			# An item and a block using the same PNG each get their own copy,
+			# unless deduplication collapses them into one shared asset
+			key = (kind, source)
+			if key in references:
+				continue
+			source_digest = digests.get(source)
+			shared = self._by_digest.get(source_digest) if self._dedupe else None
+			if shared is not None:
+				references[key] = shared
+				continue
+
+			relpath = "/".join(
+				(
+					"src",
+					"main",
+					"resources",
+					"assets",
+					self._mod_id,
+					"textures",
+					kind,
+					f"{texture_name(texture)}.png",
+				)
+			)
+			job = self._jobs.get(relpath)
+			if job is None:
+				job = self._jobs[relpath] = TextureJob(
+					source, relpath, kind, source_digest
+				)
+				self._by_digest[source_digest] = job
+				self.plan.jobs.append(job)
+				new_jobs.append(job)
+			elif job.source != source:
+				self.collisions.append(f"  {relpath}: {job.source} and {source}")
+			references[key] = job
+
+		self.plan.duplicates = len(references) - len(self.plan.jobs)
+		return new_jobs
+
+	def is_missing(self, texture_file: str) -> bool:
+		"""Return True if ``texture_file`` was added and does not exist."""
+		return self._abspaths.get(texture_file) in self._missing_sources
+
+	def check(self):
+		"""Raise if any texture was missing or two textures collided.
+
+		:raises MissingTexturesError: If any referenced texture does not exist
+		:raises ValueError: If two different textures map to the same destination
+		"""
+		if self.missing:
+			raise MissingTexturesError(self.missing)
+		if self.collisions:
+			raise ValueError(
+				"Different textures share the same file name:\n"
+				+ "\n".join(self.collisions)
+			)
+
+
+def texture_entries(blocks, items):
+	"""Yield ``(kind, entry_id, texture_file)`` for every item, then every block."""
+	for item_id, _, texture_file, _ in iter_item_rows(items):
+		yield "item", item_id, texture_file
+	for block_id, _, texture_file, _ in iter_block_rows(blocks):
+		yield "block", block_id, texture_file
+
+
+def _existing_files(paths):
+	return [path for path in paths if os.path.isfile(path)]
+
+
+def copy_textures(writer, jobs, max_workers: int = None, optimize: bool = False) -> int:
+	"""Copy the planned textures into the project on a bounded thread pool.
+
+	:param writer: ProjectWriter for the output directory
+	:param jobs: TextureJob instances from :func:`plan_textures`
+	:param max_workers: Size of the thread pool
+	:param optimize: If True, copy a losslessly optimized version of each PNG,
+	                 cached on disk by the source's hash
+	:return: Number of textures actually copied (unchanged ones are skipped)
+	"""
+	if not jobs:
+		return 0
+	with ThreadPoolExecutor(max_workers=max_workers or default_workers()) as pool:
+		copier = TextureCopier(writer, pool, optimize=optimize)
+		copier.submit(jobs)
+		return copier.wait()
+
+
+class TextureCopier:
+	"""Copies textures on an executor while the caller keeps working."""
+
+	def __init__(
+		self,
+		writer,
+		pool,
+		optimize: bool = False,
+		max_pending: int = 4096,
+		cancel_event=None,
+	):
+		"""Initialize the copier.
+
+		:param writer: ProjectWriter for the output directory
+		:param pool: Executor running the copies
+		:param optimize: If True, copy losslessly optimized PNGs
+		:param max_pending: Copies in flight before :meth:`submit` waits for
+		                    some to finish, which bounds memory use
+		:param cancel_event: ``threading.Event``; once set, copies that have
+		                     not started yet are skipped
+		"""
+		self.copied = 0
+		self._writer = writer
+		self._pool = pool
+		self._optimize = optimize
+		self._max_pending = max_pending
+		self._cancel_event = cancel_event
+		self._pending = deque()
+
+	def submit(self, jobs):
+		"""Start copying ``jobs`` (TextureJob instances)."""
+		for job in jobs:
+			if len(self._pending) >= self._max_pending:
+				self.copied += self._pending.popleft().result()
+			self._pending.append(self._pool.submit(self._copy, job))
+
+	def wait(self) -> int:
+		"""Wait for every submitted copy; return how many files were copied."""
+		while self._pending:
+			self.copied += self._pending.popleft().result()
+		return self.copied
+
+	def _copy(self, job):
+		if self._cancel_event is not None and self._cancel_event.is_set():
+			return 0
+		source = job.source
+		copier = link_or_copy
+		if self._optimize:
+			optimized = optimized_texture(
+				source, job.digest or self._writer.source_digest(source)
+			)
+			if optimized != source:
+				# A shared cache entry: copy it, so that editing the project's
+				# texture in place cannot change the entry for other projects
+				source, copier = optimized, copy_into_place
+		return self._writer.copy_file(source, job.relpath, copier=copier)
+
+
+def link_or_copy(source: str, target: str, link: bool = True):
+	"""Place ``source`` at ``target`` as cheaply as the filesystem allows.
+
+	Tries a hardlink (if ``link`` is True), then
+	``os.copy_file_range``/``os.sendfile``, and falls back to
+	:func:`shutil.copyfile`. Every method writes a temporary file
+	next to ``target`` that then replaces it, so an existing ``target`` is
+	never opened for writing: it may be a hardlink to a user's texture or to
+	a cache entry, whose bytes must not change.
+	"""
+	tmp_target = f"{target}.fabricpy-tmp"
+	try:
+		os.unlink(tmp_target)
+	except FileNotFoundError:
+		pass
+	try:
+		linked = False
+		if link:
+			try:
+				os.link(source, tmp_target)
+				linked = True
+			except OSError:
+				pass
+		if not linked and not _kernel_copy(source, tmp_target):
+			shutil.copyfile(source, tmp_target)
+		os.replace(tmp_target, target)
+	except BaseException:
+		try:
+			os.unlink(tmp_target)
+		except FileNotFoundError:
+			pass
+		raise
+
+
+def copy_into_place(source: str, target: str):
+	"""Like :func:`link_or_copy`, but always copies the bytes."""
+	link_or_copy(source, target, link=False)
+
+
+def _kernel_copy(source, target):
+	"""Copy with copy_file_range or sendfile into the new file ``target``.
+
+	Returns False if neither works.
+	"""
+	with open(source, "rb") as fsrc, open(target, "wb") as fdst:
+		size = os.fstat(fsrc.fileno()).st_size
+		for method in (_copy_file_range, _sendfile):
+			try:
+				if method(fsrc.fileno(), fdst.fileno(), size):
+					return True
+			except OSError:
+				pass
+			fdst.seek(0)
+			fdst.truncate()
+	return False
+
+
+def _copy_file_range(src_fd, dst_fd, size):
+	copy_file_range = getattr(os, "copy_file_range", None)
+	if copy_file_range is None:
+		return False
+	offset = 0
+	while offset < size:
+		copied = copy_file_range(src_fd, dst_fd, size - offset, offset, offset)
+		if copied == 0:
+			break
+		offset += copied
+	return offset == size
+
+
+def _sendfile(src_fd, dst_fd, size):
+	sendfile = getattr(os, "sendfile", None)
+	if sendfile is None:
+		return False
+	offset = 0
+	while offset < size:
+		sent = sendfile(dst_fd, src_fd, offset, size - offset)
+		if sent == 0:
+			break
+		offset += sent
+	return offset == size
@@ -0,0 +1,223 @@
+"""toolchain.py
+
+Finds installed Java toolchains (JDKs) and picks the best one for a mod.
+
+Candidates come from ``JAVA_HOME`` and the usual install locations on Linux
+(``/usr/lib/jvm``, ``/usr/java``, ``/opt``, SDKMAN, IntelliJ and Gradle
+managed JDKs) and macOS (``/Library/Java/JavaVirtualMachines``, Homebrew).
+Each candidate's version is read from the JDK's ``release`` file when it has
+one, and otherwise probed with ``java -version``; probes run concurrently.
+Results are cached on disk keyed by the java binary's path, size and mtime,
+so once every JDK has been seen, resolving Java starts no subprocess at all.
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from fabricpy.utils import cache_dir
+
+CACHE_FILE = "java-toolchains.json"
+
+_JAVA_BINARY = "java.exe" if sys.platform == "win32" else "java"
+
+# Glob patterns for directories that may contain a JDK home
+CANDIDATE_PATTERNS = [
+	# Linux distributions and manual installs
+	"/usr/lib/jvm/*",
+	"/usr/lib64/jvm/*",
+	"/usr/java/*",
+	"/usr/local/java/*",
+	"/opt/java/*",
+	"/opt/jdk*",
+	"/opt/*jdk*",
+	# SDKMAN, IntelliJ and Gradle toolchain downloads
+	"~/.sdkman/candidates/java/*",
+	"~/.jdks/*",
+	"~/.gradle/jdks/*",
+	# macOS
+	"/Library/Java/JavaVirtualMachines/*/Contents/Home",
+	"~/Library/Java/JavaVirtualMachines/*/Contents/Home",
+	"/opt/homebrew/opt/openjdk*",
+	"/usr/local/opt/openjdk*",
+]
+
+
+class JavaInstallation:
+	"""A Java installation found on this machine."""
+
+	__slots__ = ("home", "java", "version", "description")
+
+	def __init__(self, home: str, java: str, version: int, description: str = ""):
+		"""Initialize a Java installation.
+
+		:param home: JAVA_HOME directory
+		:param java: Path of the java binary
+		:param version: Major Java version (e.g. 17)
+		:param description: Human readable version string
+		"""
+		self.home = home
+		self.java = java
+		self.version = version
+		self.description = description
+
+	def __repr__(self):
+		return (
+			f"JavaInstallation(home={self.home}, java={self.java}, "
+			f"version={self.version})"
+		)
+
+
+def candidate_homes() -> list:
+	"""Return the JAVA_HOME directories worth checking, ``JAVA_HOME`` first."""
+	homes = []
+	if os.environ.get("JAVA_HOME"):
+		homes.append(os.environ["JAVA_HOME"])
+	for pattern in CANDIDATE_PATTERNS:
+		homes.extend(sorted(glob.glob(os.path.expanduser(pattern))))
+
+	seen = set()
+	result = []
+	for home in homes:
+		java = os.path.join(home, "bin", _JAVA_BINARY)
+		if not os.path.isfile(java):
+			continue
+		key = os.path.realpath(java)
+		if key not in seen:
+			seen.add(key)
+			result.append(home)
+	return result
+
+
+def discover_jdks(max_workers: int = None, use_cache: bool = True) -> list:
+	"""Return every Java installation found on this machine.
+
+	:param max_workers: Number of concurrent ``java -version`` probes
+	:param use_cache: If False, ignore (but still update) the on-disk cache
+	:return: List of JavaInstallation, in candidate order
+	"""
+	cache = _load_cache() if use_cache else {}
+	homes = candidate_homes()
+	keys = [_cache_key(home) for home in homes]
+
+	to_probe = [
+		(home, key)
+		for home, key in zip(homes, keys)
+		if key is not None and cache.get(key[0], {}).get("stat") != key[1]
+	]
+	if to_probe:
+		with ThreadPoolExecutor(max_workers=max_workers or len(to_probe)) as pool:
+			results = pool.map(lambda candidate: _probe(candidate[0]), to_probe)
+			for (home, key), (version, description) in zip(to_probe, results):
+				cache[key[0]] = {
+					"stat": key[1],
+					"version": version,
+					"description": description,
+				}
+		_save_cache(cache)
+
+	installations = []
+	for home, key in zip(homes, keys):
+		entry = cache.get(key[0]) if key is not None else None
+		if entry and entry["version"]:
+			installations.append(
+				JavaInstallation(
+					home,
+					os.path.join(home, "bin", _JAVA_BINARY),
+					entry["version"],
+					entry["description"],
+				)
+			)
+	return installations
+
+
+def find_java(min_version: int, recommended_version: int = None):
+	"""Pick the best Java installation for the given requirements.
+
+	``JAVA_HOME`` wins if it is new enough. Otherwise an installation of the
+	recommended version is preferred, then the oldest one that still meets
+	``min_version`` (newer JDKs are more likely to break old Gradle/Loom).
+
+	:param min_version: Minimum major Java version
+	:param recommended_version: Preferred major Java version
+	:return: JavaInstallation, or None if nothing suitable is installed
+	"""
+	installations = [jdk for jdk in discover_jdks() if jdk.version >= min_version]
+	if not installations:
+		return None
+
+	java_home = os.environ.get("JAVA_HOME")
+	for jdk in installations:
+		if java_home and jdk.home == java_home:
+			return jdk
+	for jdk in installations:
+		if jdk.version == recommended_version:
+			return jdk
+	return min(installations, key=lambda jdk: jdk.version)
+
+
+def parse_java_version(version: str) -> int:
+	"""Return the major version of a Java version string ("1.8.0", "21.0.1")."""
+	parts = version.split(".")
+	if parts[0] == "1" and len(parts) > 1:
+		return int(parts[1])
+	return int(parts[0].split("-")[0].split("+")[0])
+
+
+def _cache_key(home):
+	java = os.path.join(home, "bin", _JAVA_BINARY)
+	try:
+		st = os.stat(java)
+	except OSError:
+		return None
+	return os.path.realpath(java), [st.st_size, st.st_mtime_ns]
+
+
+def _probe(home):
+	"""Return ``(major_version, description)`` for a JDK home, or (None, "")."""
+	release = os.path.join(home, "release")
+	try:
+		with open(release, encoding="utf-8") as f:
+			for line in f:
+				key, _, value = line.partition("=")
+				if key.strip() == "JAVA_VERSION":
+					version = value.strip().strip('"')
+					return parse_java_version(version), f'java version "{version}"'
+	except (OSError, ValueError):
+		pass
+
+	# Fall back to asking the binary; java -version prints to stderr
+	try:
+		result = subprocess.run(
+			[os.path.join(home, "bin", _JAVA_BINARY), "-version"],
+			stdout=subprocess.PIPE,
+			stderr=subprocess.PIPE,
+			text=True,
+			timeout=30,
+		)
+		output = result.stderr
+		if "version" in output:
+			version = output.split('"')[1]
+			return parse_java_version(version), output.splitlines()[0]
+	except (OSError, ValueError, IndexError, subprocess.SubprocessError) as e:
+		print(f"Warning: Error checking Java at {home}: {e}", file=sys.stderr)
+	return None, ""
+
+
+def _load_cache():
+	try:
+		with open(os.path.join(cache_dir(), CACHE_FILE), encoding="utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def _save_cache(cache):
+	path = os.path.join(cache_dir(), CACHE_FILE)
+	tmp_path = f"{path}.{os.getpid()}.tmp"
+	with open(tmp_path, "w", encoding="utf-8") as f:
+		json.dump(cache, f, indent=1, sort_keys=True)
+	os.replace(tmp_path, path)
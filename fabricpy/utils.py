@@ -3,13 +3,38 @@
 Utility functions that might be used throughout the library.
 """
 
-import subprocess
+import os
+import shlex
 
+from fabricpy.runner import run_process
 
-def run_command(command: str, cwd: str = None, env: dict = None):
-	"""Runs a shell command in a subprocess."""
-	print(f"Running command: {command}")
-	try:
-		subprocess.check_call(command, shell=True, cwd=cwd, env=env)
-	except subprocess.CalledProcessError as e:
-		raise RuntimeError(f"Command failed: {command}\n{e!s}")
+
+def cache_dir(*parts: str) -> str:
+	"""Return (and create) a directory inside fabricpy's on-disk cache.
+
+	The cache root is ``$FABRICPY_CACHE_DIR`` if set, otherwise
+	``$XDG_CACHE_HOME/fabricpy`` (``~/.cache/fabricpy`` by default).
+	"""
+	root = os.environ.get("FABRICPY_CACHE_DIR")
+	if not root:
+		xdg = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+		root = os.path.join(xdg, "fabricpy")
+	path = os.path.join(root, *parts)
+	os.makedirs(path, exist_ok=True)
+	return path
+
+
+def run_command(command, cwd: str = None, env: dict = None):
+	"""Run a command without a shell, raising if it fails.
+
+	:param command: Argument list, or a string split like a POSIX shell
+	                would (quotes are honoured; pipes, globs and variables
+	                are not)
+	:param cwd: Working directory
+	:param env: Environment (defaults to the current one)
+	:raises RuntimeError: (a :class:`~fabricpy.runner.CommandError`) if the
+	                      command exits with a non-zero status
+	"""
+	if isinstance(command, str):
+		command = shlex.split(command)
+	run_process(command, cwd=cwd, env=env).check()
@@ -0,0 +1,135 @@
+"""validation.py
+
+Checks a mod definition before anything is generated.
+
+:func:`validate_config` makes one pass over the items and blocks, looking up
+every ID in a dict and every texture path in a cache of stat results, and
+reports all problems together in a :class:`ValidationError`:
+
+- ``mod_id`` must be a lowercase identifier (it is also the Java package
+  name), 2 to 64 characters long
+- item and block IDs may only contain ``a-z``, ``0-9``, ``_``, ``-``, ``.``
+  and ``/``, as in Minecraft identifiers; ``/`` separates non-empty path
+  segments, none of which may be ``.`` or ``..``
+- IDs must be unique, also between items and blocks (a block registers an
+  item with its own ID)
+- every entry needs a name, and its texture file must exist
+
+:func:`~fabricpy.generator.generate_mod_project` runs it before writing
+anything, so a bad config fails in milliseconds without leaving a partial
+project behind.
+"""
+
+import os
+import re
+
+from fabricpy.tables import iter_block_rows, iter_item_rows
+
+MOD_ID_PATTERN = re.compile(r"[a-z][a-z0-9_]{1,63}")
+# "/"-separated segments of a-z, 0-9, _, - and ., none of them "." or ".."
+# (entry IDs become file names under assets/, so they must stay inside it)
+ENTRY_ID_SEGMENT = r"(?!\.\.?(?:/|$))[a-z0-9_.\-]+"
+ENTRY_ID_PATTERN = re.compile(rf"{ENTRY_ID_SEGMENT}(?:/{ENTRY_ID_SEGMENT})*")
+
+# At most this many problems are listed in a ValidationError's message
+MAX_REPORTED = 50
+
+
+class ValidationError(ValueError):
+	"""Raised when a mod definition has problems.
+
+	``errors`` holds one message per problem found.
+	"""
+
+	def __init__(self, errors):
+		"""Initialize the error.
+
+		:param errors: List of problem descriptions
+		"""
+		self.errors = errors
+		lines = [f"{len(errors)} problem(s) in the mod config:"]
+		lines.extend(f"  {error}" for error in errors[:MAX_REPORTED])
+		if len(errors) > MAX_REPORTED:
+			lines.append(f"  ... and {len(errors) - MAX_REPORTED} more")
+		super().__init__("\n".join(lines))
+
+
+class ConfigValidator:
+	"""Collects the problems of a mod definition as its entries are added.
+
+	Used directly when the entries can only be read once; otherwise
+	:func:`validate_config` is simpler.
+	"""
+
+	def __init__(self, mod_config, check_textures: bool = True):
+		"""Initialize the validator and check the mod metadata.
+
+		:param mod_config: ModConfig instance with mod metadata
+		:param check_textures: If True, report texture files that do not exist
+		"""
+		self.errors = []
+		self._check_textures = check_textures
+		self._ids = {}
+		self._textures = {}
+		if not MOD_ID_PATTERN.fullmatch(mod_config.mod_id or ""):
+			self.errors.append(
+				f"mod_id '{mod_config.mod_id}' must be 2-64 characters of a-z, 0-9 "
+				"and _, starting with a letter"
+			)
+
+	def add(self, kind: str, rows):
+		"""Check ``(entry_id, name, texture_file, category)`` rows.
+
+		:param kind: "item" or "block"
+		:param rows: Rows as yielded by :func:`~fabricpy.tables.iter_item_rows`
+		"""
+		errors = self.errors
+		ids = self._ids
+		textures = self._textures
+		for entry_id, name, texture_file, _ in rows:
+			if not entry_id or not ENTRY_ID_PATTERN.fullmatch(entry_id):
+				errors.append(
+					f"{kind} ID '{entry_id}' may only contain a-z, 0-9, _, -, . and /, "
+					"with no empty, '.' or '..' path segments"
+				)
+			first = ids.get(entry_id)
+			if first is None:
+				ids[entry_id] = kind
+			else:
+				errors.append(
+					f"{kind} ID '{entry_id}' duplicates an earlier {first} ID"
+				)
+			if not name:
+				errors.append(f"{kind} '{entry_id}' has no name")
+			if self._check_textures:
+				exists = textures.get(texture_file)
+				if exists is None:
+					exists = textures[texture_file] = os.path.isfile(texture_file)
+				if not exists:
+					errors.append(
+						f"{kind} '{entry_id}': texture file not found: "
+						f"{os.path.abspath(texture_file)}"
+					)
+
+	def check(self):
+		"""Raise if any problem was found.
+
+		:raises ValidationError: With every problem found so far
+		"""
+		if self.errors:
+			raise ValidationError(self.errors)
+
+
+def validate_config(mod_config, blocks, items, check_textures: bool = True):
+	"""Check a whole mod definition and report every problem at once.
+
+	:param mod_config: ModConfig instance with mod metadata
+	:param blocks: Iterable of Block instances, or a BlockTable
+	:param items: Iterable of Item instances, or an ItemTable
+	:param check_textures: If True, report texture files that do not exist
+	:raises ValidationError: If the definition has any problem
+	"""
+	validator = ConfigValidator(mod_config, check_textures=check_textures)
+	validator.add("item", iter_item_rows(items))
+	validator.add("block", iter_block_rows(blocks))
+	validator.check()
@@ -0,0 +1,335 @@
+"""watch.py
+
+Keeps a generated mod project up to date while its inputs are being edited.
+
+:func:`watch_project` generates the project once, then waits for changes to
+the config script, the referenced textures and the translation tables. Only
+the outputs that depend on a changed file are refreshed: an edited texture is
+copied again on its own, an edited translation table rewrites the lang files,
+and only a change to the config script itself, or to a CSV/JSON table of
+items or blocks it names, regenerates the whole project (which is still
+incremental, see :mod:`fabricpy.manifest`).
+
+On Linux, changes are picked up with inotify; elsewhere the files are polled.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from itertools import chain
+
+from fabricpy.config_loader import config_table_files, load_config
+from fabricpy.generator import (
+	generate_mod_project,
+	update_lang_files,
+	update_textures,
+)
+from fabricpy.lang import find_translation_tables
+from fabricpy.tables import iter_block_rows, iter_item_rows
+from fabricpy.templating import get_registry
+
+# Event masks and flags from <sys/inotify.h>
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+	_IN_ATTRIB
+	| _IN_CLOSE_WRITE
+	| _IN_MOVED_FROM
+	| _IN_MOVED_TO
+	| _IN_CREATE
+	| _IN_DELETE
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Editors often save with several writes/renames; group them into one change
+DEBOUNCE_SECONDS = 0.02
+
+
+class PollingWatcher:
+	"""Detects changes to a set of files by comparing their size and mtime."""
+
+	def __init__(self, interval: float = 0.05):
+		"""Initialize the watcher.
+
+		:param interval: Seconds between two scans of the watched files
+		"""
+		self.interval = interval
+		self._snapshot = {}
+
+	def watch(self, paths):
+		"""Replace the set of watched files with ``paths``."""
+		snapshot = {}
+		for path in paths:
+			snapshot[path] = self._snapshot.get(path, self._stat(path))
+		self._snapshot = snapshot
+
+	def wait(self, timeout: float = None) -> set:
+		"""Block until some watched files change and return their paths.
+
+		Returns an empty set if ``timeout`` seconds pass without a change.
+		"""
+		deadline = None if timeout is None else time.monotonic() + timeout
+		while True:
+			changed = set()
+			for path, previous in self._snapshot.items():
+				current = self._stat(path)
+				if current != previous:
+					self._snapshot[path] = current
+					changed.add(path)
+			if changed:
+				return changed
+			if deadline is not None and time.monotonic() >= deadline:
+				return changed
+			time.sleep(self.interval)
+
+	def close(self):
+		"""Release the watcher's resources."""
+		self._snapshot = {}
+
+	@staticmethod
+	def _stat(path):
+		try:
+			st = os.stat(path)
+		except OSError:
+			return None
+		return st.st_size, st.st_mtime_ns
+
+
+class InotifyWatcher:
+	"""Detects changes to a set of files with Linux inotify.
+
+	The parent directory of every file is watched rather than the file
+	itself, so editors that save by writing a new file and renaming it over
+	the old one are handled.
+	"""
+
+	def __init__(self):
+		"""Initialize the watcher.
+
+		:raises OSError: If inotify is not available
+		"""
+		self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+		self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+		if self._fd < 0:
+			errno = ctypes.get_errno()
+			raise OSError(errno, os.strerror(errno))
+		self._paths = set()
+		self._dirs = {}  # watch descriptor -> directory
+		self._wds = {}  # directory -> watch descriptor
+
+	def watch(self, paths):
+		"""Replace the set of watched files with ``paths``."""
+		self._paths = {os.path.abspath(path) for path in paths}
+		directories = {os.path.dirname(path) for path in self._paths}
+		for directory in set(self._wds) - directories:
+			self._libc.inotify_rm_watch(self._fd, self._wds.pop(directory))
+		for directory in directories - set(self._wds):
+			wd = self._libc.inotify_add_watch(
+				self._fd, os.fsencode(directory), _WATCH_MASK
+			)
+			if wd >= 0:
+				self._wds[directory] = wd
+				self._dirs[wd] = directory
+
+	def wait(self, timeout: float = None) -> set:
+		"""Block until some watched files change and return their paths.
+
+		Returns an empty set if ``timeout`` seconds pass without a change.
+		"""
+		deadline = None if timeout is None else time.monotonic() + timeout
+		changed = set()
+		while True:
+			if changed:
+				remaining = DEBOUNCE_SECONDS
+			elif deadline is None:
+				remaining = None
+			else:
+				remaining = max(0.0, deadline - time.monotonic())
+			ready, _, _ = select.select([self._fd], [], [], remaining)
+			if not ready:
+				if changed or remaining is not None:
+					return changed
+				continue
+			changed |= self._read_events()
+
+	def close(self):
+		"""Release the watcher's resources."""
+		if self._fd >= 0:
+			os.close(self._fd)
+			self._fd = -1
+
+	def _read_events(self):
+		try:
+			data = os.read(self._fd, 64 * 1024)
+		except BlockingIOError:
+			return set()
+		changed = set()
+		offset = 0
+		while offset + _EVENT_HEADER.size <= len(data):
+			wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+			offset += _EVENT_HEADER.size
+			name = data[offset : offset + length].rstrip(b"\0")
+			offset += length
+			directory = self._dirs.get(wd)
+			if directory is None or not name:
+				continue
+			path = os.path.join(directory, os.fsdecode(name))
+			if path in self._paths:
+				changed.add(path)
+		return changed
+
+
+def create_watcher(poll_interval: float = 0.05):
+	"""Return an InotifyWatcher where supported, otherwise a PollingWatcher."""
+	if sys.platform.startswith("linux"):
+		try:
+			return InotifyWatcher()
+		except (OSError, AttributeError):
+			pass
+	return PollingWatcher(poll_interval)
+
+
+class WatchSession:
+	"""Regenerates a project from a config script and refreshes what changed."""
+
+	def __init__(self, config_script: str, output_dir: str, **options):
+		"""Initialize the session.
+
+		:param config_script: Path of the config script or TOML/JSON config
+		:param output_dir: Where to place the generated mod project
+		:param options: Keyword arguments for
+		                :func:`~fabricpy.generator.generate_mod_project`
+		"""
+		self.config_script = os.path.abspath(config_script)
+		self.output_dir = output_dir
+		self.options = options
+		self.mod_config = None
+		self.blocks = []
+		self.items = []
+		# Item/block table files named by a declarative config
+		self.table_files = set()
+
+	def watched_paths(self) -> set:
+		"""Return every input file the generated project depends on."""
+		paths = {self.config_script}
+		paths.update(self.table_files)
+		paths.update(self._texture_paths())
+		paths.update(self._translation_paths())
+		paths.update(self._template_paths())
+		return paths
+
+	def regenerate(self):
+		"""Reload the config script and regenerate the whole project."""
+		self.table_files = set(config_table_files(self.config_script))
+		self.mod_config, self.blocks, self.items = load_config(self.config_script)
+		generate_mod_project(
+			self.mod_config, self.blocks, self.items, self.output_dir, **self.options
+		)
+
+	def handle_changes(self, changed):
+		"""Refresh the outputs that depend on the ``changed`` input files."""
+		start = time.perf_counter()
+		textures = changed & self._texture_paths()
+		tables = changed & self._translation_paths()
+		templates = changed & self._template_paths()
+		if templates:
+			get_registry(self.options.get("templates")).clear()
+		if (
+			self.mod_config is None
+			or self.config_script in changed
+			or changed & self.table_files
+			or templates
+			or (textures and self.options.get("dedupe_textures"))
+		):
+			# Deduplication can change which asset models point at
+			what = "project"
+			self.regenerate()
+		else:
+			what = []
+			if textures:
+				update_textures(
+					self.mod_config,
+					self.blocks,
+					self.items,
+					self.output_dir,
+					textures,
+					texture_workers=self.options.get("texture_workers"),
+					optimize_textures=self.options.get("optimize_textures", False),
+				)
+				what.append(f"{len(textures)} texture(s)")
+			if tables:
+				update_lang_files(
+					self.mod_config,
+					self.blocks,
+					self.items,
+					self.output_dir,
+					translations=self.options.get("translations"),
+					registration=self.options.get("registration", "static"),
+				)
+				what.append("lang files")
+			what = " and ".join(what)
+		elapsed_ms = (time.perf_counter() - start) * 1000
+		print(f"Updated {what} in {elapsed_ms:.0f} ms")
+
+	def _texture_paths(self):
+		rows = chain(iter_item_rows(self.items), iter_block_rows(self.blocks))
+		return {os.path.abspath(texture) for _, _, texture, _ in rows}
+
+	def _template_paths(self):
+		template_dir = self.options.get("templates")
+		if not template_dir:
+			return set()
+		paths = set()
+		for root, _, files in os.walk(template_dir):
+			paths.update(os.path.abspath(os.path.join(root, name)) for name in files)
+		return paths
+
+	def _translation_paths(self):
+		translations = self.options.get("translations")
+		if isinstance(translations, str):
+			translations = find_translation_tables(translations)
+		return {os.path.abspath(path) for path in (translations or {}).values()}
+
+
+def watch_project(config_script: str, output_dir: str, poll_interval=0.05, **options):
+	"""Generate a project, then keep it up to date until interrupted.
+
+	Errors raised while regenerating (a broken config script, a missing
+	texture, ...) are printed and the watch continues.
+
+	:param config_script: Path of the config script or TOML/JSON config
+	:param output_dir: Where to place the generated mod project
+	:param poll_interval: Seconds between scans when inotify is unavailable
+	:param options: Keyword arguments for
+	                :func:`~fabricpy.generator.generate_mod_project`
+	"""
+	session = WatchSession(config_script, output_dir, **options)
+	_report_errors(session.regenerate)
+
+	watcher = create_watcher(poll_interval)
+	print(f"Watching {len(session.watched_paths())} files for changes...")
+	try:
+		while True:
+			watcher.watch(session.watched_paths())
+			changed = watcher.wait()
+			if changed:
+				_report_errors(session.handle_changes, changed)
+	finally:
+		watcher.close()
+
+
+def _report_errors(function, *args):
+	try:
+		function(*args)
+	except Exception as e:
+		print(f"Error: {e}", file=sys.stderr)
@@ -10,7 +10,9 @@ setup(
 	url="https://github.com/danielkorkin/fabricpy",
 	packages=find_packages(),
 	include_package_data=True,
+	package_data={"fabricpy": ["templates/*", "data/*.json"]},
 	install_requires=[],
+	extras_require={"toml": ["tomli; python_version < '3.11'"]},
 	entry_points={
 		"console_scripts": [
 			"fabricpy = fabricpy.cli:main",